@@ -0,0 +1 @@
+"""HXinWatch 集成的离线基准测试与模拟云端服务。"""
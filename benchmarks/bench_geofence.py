@@ -0,0 +1,169 @@
+"""地理围栏判定基准测试。
+
+engine 模式：在若干区域中随机生成围栏，沿随机路线生成定位点，比较网格索引引擎与逐个计算距离的
+线性扫描每次定位的耗时，并校验两者得到的所在围栏相同。
+
+ha 模式：在真实 Home Assistant 核心中加载若干条目，测量写入与集成无关的实体状态的耗时，
+以及地理围栏处理函数被调用的次数（只订阅 zone 实体，应为 0）。
+
+    python -m benchmarks.bench_geofence --mode engine --zones 10,100,1000,10000 --fixes 5000
+    python -m benchmarks.bench_geofence --mode ha --entries 10 --writes 5000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib
+import json
+import random
+import time
+from typing import Any
+
+from .core import summarize
+from .mock_server import MockHXinWatchServer, add_mock_arguments, mock_config_from_args
+
+# 定位点和围栏分布的中心（上海）及范围（度）
+CENTER = (31.2, 121.4)
+SPREAD = 0.5
+IMEI_BASE = 860000000000000
+
+
+def _random_fences(geofence: Any, count: int, rng: random.Random) -> list[Any]:
+    fences = []
+    for index in range(count):
+        # 大多数为常见的 100-500 米区域，少数为覆盖较多网格单元的大区域
+        radius = rng.uniform(100, 500) if index % 50 else rng.uniform(2000, 20000)
+        fences.append(
+            geofence.Geofence(
+                f"zone.bench_{index}",
+                f"区域{index}",
+                CENTER[0] + rng.uniform(-SPREAD, SPREAD),
+                CENTER[1] + rng.uniform(-SPREAD, SPREAD),
+                radius,
+                30,
+            )
+        )
+    return fences
+
+
+def _random_route(count: int, rng: random.Random) -> list[tuple[float, float]]:
+    lat, lon = CENTER
+    route = []
+    for _ in range(count):
+        # 每次定位移动约 0-500 米
+        lat += rng.uniform(-0.0045, 0.0045)
+        lon += rng.uniform(-0.0045, 0.0045)
+        route.append((lat, lon))
+    return route
+
+
+def _linear_evaluate(geo: Any, fences: list[Any], lat: float, lon: float, inside: set[str]) -> set[str]:
+    """不使用索引的基准：逐个计算到每个围栏的距离。"""
+    now_inside = set()
+    for fence in fences:
+        distance = geo.haversine_distance(lat, lon, fence.latitude, fence.longitude)
+        if distance <= (fence.exit_radius if fence.fence_id in inside else fence.radius):
+            now_inside.add(fence.fence_id)
+    return now_inside
+
+
+def run_engine_benchmark(zone_counts: list[int], fixes: int, seed: int) -> dict[str, Any]:
+    """比较网格引擎与线性扫描每次定位的耗时（微秒）。"""
+    geofence = importlib.import_module("custom_components.hxinwatch.geofence")
+    geo = importlib.import_module("custom_components.hxinwatch.geo")
+    results = {}
+    for count in zone_counts:
+        rng = random.Random(seed)
+        fences = _random_fences(geofence, count, rng)
+        route = _random_route(fixes, rng)
+        build_started = time.perf_counter()
+        engine = geofence.GeofenceEngine(fences)
+        build_ms = (time.perf_counter() - build_started) * 1000
+
+        engine_us, linear_us = [], []
+        inside: set[str] = set()
+        linear_inside: set[str] = set()
+        mismatches = 0
+        for lat, lon in route:
+            started = time.perf_counter()
+            inside, _transitions = engine.evaluate(lat, lon, inside)
+            engine_us.append((time.perf_counter() - started) * 1_000_000)
+            started = time.perf_counter()
+            linear_inside = _linear_evaluate(geo, fences, lat, lon, linear_inside)
+            linear_us.append((time.perf_counter() - started) * 1_000_000)
+            if inside != linear_inside:
+                mismatches += 1
+        results[str(count)] = {
+            "build_ms": round(build_ms, 2),
+            "engine_us_per_fix": summarize(engine_us),
+            "linear_us_per_fix": summarize(linear_us),
+            "mismatches": mismatches,
+        }
+    return {"fixes": fixes, "zones": results}
+
+
+async def run_ha_benchmark(args: argparse.Namespace) -> dict[str, Any]:
+    """测量条目加载后无关实体状态写入的耗时及地理围栏处理函数的调用次数。"""
+    from .harness import HomeAssistantHarness  # pylint: disable=import-outside-toplevel
+
+    async with MockHXinWatchServer(mock_config_from_args(args)) as server:
+        async with HomeAssistantHarness(server.url) as harness:
+            hass = harness.hass
+            # 条目设置时订阅的是绑定方法，需要在添加条目之前替换类上的处理函数才能统计调用次数
+            geofence = importlib.import_module("custom_components.hxinwatch.geofence")
+            handler = geofence.GeofenceMonitor.async_handle_state_changed
+            calls = 0
+
+            def _counting_handler(self: Any, event: Any) -> None:
+                nonlocal calls
+                calls += 1
+                handler(self, event)
+
+            geofence.GeofenceMonitor.async_handle_state_changed = _counting_handler
+            try:
+                for index in range(args.entries):
+                    await harness.async_add_entry(str(IMEI_BASE + index), scan_interval=3600)
+                await hass.async_block_till_done()
+                calls = 0  # 不计入设置过程中的区域变化
+
+                write_us = []
+                for index in range(args.writes):
+                    started = time.perf_counter()
+                    hass.states.async_set("sensor.bench_unrelated", str(index))
+                    await hass.async_block_till_done()
+                    write_us.append((time.perf_counter() - started) * 1_000_000)
+                unrelated_calls = calls
+                hass.states.async_set(
+                    "zone.bench", "0", {"latitude": CENTER[0], "longitude": CENTER[1], "radius": 100}
+                )
+                await hass.async_block_till_done()
+            finally:
+                geofence.GeofenceMonitor.async_handle_state_changed = handler
+    return {
+        "entries": args.entries,
+        "writes": args.writes,
+        "unrelated_write_us": summarize(write_us),
+        "geofence_calls_for_unrelated_writes": unrelated_calls,
+        "geofence_calls_for_zone_change": calls - unrelated_calls,
+    }
+
+
+def main() -> None:
+    """命令行入口。"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=("engine", "ha"), default="engine")
+    parser.add_argument("--zones", default="10,100,1000,10000", help="engine 模式的围栏数量，逗号分隔")
+    parser.add_argument("--fixes", type=int, default=5000, help="engine 模式的定位点数量")
+    parser.add_argument("--entries", type=int, default=10, help="ha 模式的条目数量")
+    parser.add_argument("--writes", type=int, default=2000, help="ha 模式写入无关实体状态的次数")
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+    if args.mode == "engine":
+        result = run_engine_benchmark([int(item) for item in args.zones.split(",")], args.fixes, args.seed or 1)
+    else:
+        result = asyncio.run(run_ha_benchmark(args))
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""刷新周期基准测试。
+
+测量每个刷新周期的延迟、请求数、内存分配以及（ha 模式下）实体状态写入次数，
+结果以 JSON 输出，便于在版本之间对比。
+
+    python -m benchmarks.bench_refresh --mode api --cycles 200 --latency 0.02
+    python -m benchmarks.bench_refresh --mode ha --cycles 50
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable
+
+from .core import load_core_module, summarize
+from .mock_server import MockHXinWatchServer, add_mock_arguments, mock_config_from_args
+
+BENCH_IMEI = "860000000000001"
+
+
+async def _measure_cycles(
+    server: MockHXinWatchServer,
+    cycle: Callable[[], Awaitable[Any]],
+    cycles: int,
+    warmup: int,
+    state_writes: Callable[[], int] | None = None,
+) -> dict[str, Any]:
+    """执行若干刷新周期并汇总指标。"""
+    for _ in range(warmup):
+        try:
+            await cycle()
+        except Exception:  # pylint: disable=broad-except
+            pass
+
+    latencies: list[float] = []
+    requests: list[float] = []
+    alloc_peaks: list[float] = []
+    alloc_blocks: list[float] = []
+    writes: list[float] = []
+    failures = 0
+
+    tracemalloc.start()
+    try:
+        for _ in range(cycles):
+            server_before = server.total_requests
+            writes_before = state_writes() if state_writes else 0
+            blocks_before = sys.getallocatedblocks()
+            tracemalloc.reset_peak()
+            baseline, _peak = tracemalloc.get_traced_memory()
+
+            start = time.perf_counter()
+            try:
+                await cycle()
+            except Exception:  # pylint: disable=broad-except
+                failures += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+            _current, peak = tracemalloc.get_traced_memory()
+            alloc_peaks.append((peak - baseline) / 1024)
+            alloc_blocks.append(sys.getallocatedblocks() - blocks_before)
+            requests.append(server.total_requests - server_before)
+            if state_writes:
+                writes.append(state_writes() - writes_before)
+    finally:
+        tracemalloc.stop()
+
+    result: dict[str, Any] = {
+        "cycles": cycles,
+        "failures": failures,
+        "latency_ms": summarize(latencies),
+        "requests_per_cycle": summarize(requests),
+        "alloc_peak_kib_per_cycle": summarize(alloc_peaks),
+        "net_blocks_per_cycle": summarize(alloc_blocks),
+        "server_requests": dict(server.requests),
+        "server_errors": dict(server.errors),
+    }
+    if state_writes:
+        result["state_writes_per_cycle"] = summarize(writes)
+    return result
+
+
+async def run_api_benchmark(server: MockHXinWatchServer, cycles: int, warmup: int) -> dict[str, Any]:
+    """只使用 HXinWatchAPI（不需要 Home Assistant）执行与协调器相同的请求序列。"""
+    import aiohttp  # pylint: disable=import-outside-toplevel
+
+    api_module = load_core_module("api")
+    async with aiohttp.ClientSession() as session:
+        api = api_module.HXinWatchAPI(
+            imei=BENCH_IMEI, appid="bench-appid", session=session, base_url=server.url
+        )
+
+        async def cycle() -> None:
+            # 每个周期都测量实际请求，而不是响应缓存
+            api.invalidate_cache()
+            await api.async_get_device_status()
+            await api.async_get_voice_messages()
+            await api.async_get_contacts()
+            await api.async_get_alarms()
+
+        result = await _measure_cycles(server, cycle, cycles, warmup)
+        result["api_metrics"] = api.metrics.as_dict()
+        return result
+
+
+async def run_ha_benchmark(server: MockHXinWatchServer, cycles: int, warmup: int) -> dict[str, Any]:
+    """在真实 Home Assistant 中测量协调器刷新与实体状态写入。"""
+    from .harness import HomeAssistantHarness  # pylint: disable=import-outside-toplevel
+
+    async with HomeAssistantHarness(server.url) as harness:
+        entry = await harness.async_add_entry(BENCH_IMEI, scan_interval=60)
+        coordinator = harness.coordinator(entry.entry_id)
+
+        async def cycle() -> None:
+            coordinator.api.invalidate_cache()
+            await coordinator.async_refresh()
+            await harness.hass.async_block_till_done()
+
+        result = await _measure_cycles(
+            server, cycle, cycles, warmup, state_writes=lambda: harness.state_writes
+        )
+        result["api_metrics"] = harness.entry_data(entry.entry_id)["api"].metrics.as_dict()
+        result["import_seconds"] = harness.import_seconds
+        result["setup_timings_seconds"] = harness.entry_data(entry.entry_id)["timings"]
+        return result
+
+
+async def _main(args: argparse.Namespace) -> dict[str, Any]:
+    async with MockHXinWatchServer(mock_config_from_args(args)) as server:
+        runner = run_api_benchmark if args.mode == "api" else run_ha_benchmark
+        result = await runner(server, args.cycles, args.warmup)
+    result["mode"] = args.mode
+    return result
+
+
+def main() -> None:
+    """命令行入口。"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=("api", "ha"), default="api")
+    parser.add_argument("--cycles", type=int, default=100)
+    parser.add_argument("--warmup", type=int, default=3)
+    add_mock_arguments(parser)
+    result = asyncio.run(_main(parser.parse_args()))
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
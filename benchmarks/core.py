@@ -0,0 +1,95 @@
+"""基准测试的公共工具。"""
+from __future__ import annotations
+
+import asyncio
+import math
+from typing import Any, Iterable
+
+# 集成模块的加载与车队轮询工具共用，基准测试脚本从这里导入
+from hxinwatch_fleet.integration import INTEGRATION_DIR, load_core_module
+
+__all__ = [
+    "INTEGRATION_DIR",
+    "LoopLagMonitor",
+    "load_core_module",
+    "percentile",
+    "rate_profile",
+    "summarize",
+]
+
+
+def percentile(sorted_values: list[float], quantile: float) -> float | None:
+    """对已排序的数据计算分位数（最近秩法）。"""
+    if not sorted_values:
+        return None
+    index = max(0, math.ceil(quantile * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def summarize(values: Iterable[float], digits: int = 2) -> dict[str, float | None]:
+    """返回均值、分位数和最大值摘要。"""
+    ordered = sorted(values)
+    if not ordered:
+        return {"count": 0}
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered), digits),
+        "p50": round(percentile(ordered, 0.50), digits),
+        "p95": round(percentile(ordered, 0.95), digits),
+        "p99": round(percentile(ordered, 0.99), digits),
+        "max": round(ordered[-1], digits),
+    }
+
+
+def rate_profile(
+    timestamps: Iterable[float], start: float, end: float, curve: bool = False
+) -> dict[str, Any]:
+    """把请求时间戳按秒分桶，返回平均速率、峰值速率和峰均比，curve 为真时附带每秒请求数。"""
+    seconds = max(1, math.ceil(end - start))
+    buckets = [0] * seconds
+    for stamp in timestamps:
+        if start <= stamp < end:
+            buckets[min(seconds - 1, int(stamp - start))] += 1
+    mean = sum(buckets) / seconds
+    peak = max(buckets)
+    profile: dict[str, Any] = {
+        "mean_rps": round(mean, 2),
+        "peak_rps": peak,
+        "peak_to_mean": round(peak / mean, 2) if mean else None,
+    }
+    if curve:
+        profile["per_second"] = buckets
+    return profile
+
+
+class LoopLagMonitor:
+    """周期性休眠并记录实际唤醒时间与预期的偏差，用来衡量事件循环延迟。"""
+
+    def __init__(self, interval: float = 0.05) -> None:
+        """初始化监视器。"""
+        self._interval = interval
+        self._task: asyncio.Task | None = None
+        self.samples: list[float] = []
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self._interval
+            await asyncio.sleep(self._interval)
+            self.samples.append(max(0.0, (loop.time() - expected) * 1000))
+
+    def start(self) -> None:
+        """开始采样。"""
+        self.samples = []
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> dict[str, float | None]:
+        """停止采样并返回延迟摘要（毫秒）。"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        return summarize(self.samples)
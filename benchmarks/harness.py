@@ -0,0 +1,176 @@
+"""在临时配置目录中运行真实 Home Assistant 核心的基准测试夹具。
+
+通过配置流程创建 HXinWatch 条目，完整走 async_setup_entry、DataUpdateCoordinator
+和各实体平台，所有云端请求都指向本地模拟服务器。需要安装 homeassistant。
+"""
+from __future__ import annotations
+
+import importlib
+import os
+from pathlib import Path
+import shutil
+import socket
+import sys
+import tempfile
+import time
+from typing import Any
+
+from .core import INTEGRATION_DIR
+
+DOMAIN = "hxinwatch"
+
+_CORE_CONFIG = {
+    "name": "HXinWatch Bench",
+    "latitude": 31.2,
+    "longitude": 121.4,
+    "elevation": 0,
+    "unit_system": "metric",
+    "time_zone": "Asia/Shanghai",
+}
+
+
+class HomeAssistantHarness:
+    """启动真实 Home Assistant 核心并管理 HXinWatch 配置入口。"""
+
+    def __init__(self, base_url: str, config_dir: str | None = None) -> None:
+        """初始化夹具，base_url 为模拟服务器地址。"""
+        self.base_url = base_url
+        self._config_dir = config_dir
+        self._own_config_dir = config_dir is None
+        self.hass: Any = None
+        self.state_writes = 0
+        self._entity_ids: set[str] | None = None
+        self._unsub_state: Any = None
+        self.http_url: str | None = None
+        # 集成包的导入耗时（秒），本进程中已经导入过时为 None
+        self.import_seconds: float | None = None
+
+    @property
+    def config_dir(self) -> str:
+        """配置目录。"""
+        assert self._config_dir is not None
+        return self._config_dir
+
+    async def start(self) -> Any:
+        """创建配置目录并启动最小化的 Home Assistant 核心。
+
+        不走完整的 bootstrap（它会加载前端等默认集成及其大量依赖），
+        只加载注册表、配置入口和 homeassistant 核心集成，其余由 HXinWatch 的依赖按需加载。
+        """
+        # pylint: disable=import-outside-toplevel
+        from homeassistant import bootstrap, config as conf_util, config_entries, core, loader
+        from homeassistant.const import EVENT_STATE_CHANGED
+        from homeassistant.setup import async_setup_component
+
+        if self._config_dir is None:
+            self._config_dir = tempfile.mkdtemp(prefix="hxinwatch-bench-")
+        config_dir = Path(self._config_dir)
+        custom_components = config_dir / "custom_components"
+        custom_components.mkdir(exist_ok=True)
+        link = custom_components / DOMAIN
+        if not link.exists():
+            os.symlink(INTEGRATION_DIR, link, target_is_directory=True)
+
+        if str(config_dir) not in sys.path:
+            sys.path.insert(0, str(config_dir))
+        package = f"custom_components.{DOMAIN}"
+        if package not in sys.modules:
+            started = time.perf_counter()
+            importlib.import_module(package)
+            self.import_seconds = time.perf_counter() - started
+        api_module = importlib.import_module(f"{package}.api")
+        api_module.DEFAULT_BASE_URL = self.base_url
+
+        hass = self.hass = core.HomeAssistant(str(config_dir))
+        hass.config.skip_pip = True
+        if hasattr(loader, "async_setup"):
+            loader.async_setup(hass)
+        hass.config_entries = config_entries.ConfigEntries(hass, {})
+        await bootstrap.async_load_base_functionality(hass)
+        await conf_util.async_process_ha_core_config(hass, _CORE_CONFIG)
+        if not await async_setup_component(hass, "homeassistant", {}):
+            raise RuntimeError("Home Assistant 启动失败")
+        # 推送模式依赖 webhook/http，使用随机的本地端口，避免与正在运行的实例冲突
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        http_config = {"server_host": ["127.0.0.1"], "server_port": port}
+        if not await async_setup_component(hass, "http", {"http": http_config}):
+            raise RuntimeError("Home Assistant HTTP 组件启动失败")
+        self.http_url = f"http://127.0.0.1:{port}"
+        await hass.async_start()
+        self._unsub_state = hass.bus.async_listen(EVENT_STATE_CHANGED, self._count_state_write)
+        return hass
+
+    async def stop(self) -> None:
+        """停止 Home Assistant 并清理临时目录。"""
+        if self._unsub_state is not None:
+            self._unsub_state()
+            self._unsub_state = None
+        if self.hass is not None:
+            await self.hass.async_stop()
+            self.hass = None
+        if self._own_config_dir and self._config_dir:
+            shutil.rmtree(self._config_dir, ignore_errors=True)
+
+    async def __aenter__(self) -> HomeAssistantHarness:
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.stop()
+
+    @property
+    def tracked_entity_ids(self) -> set[str]:
+        """HXinWatch 集成注册的全部实体。"""
+        if self._entity_ids is None:
+            # pylint: disable=import-outside-toplevel
+            from homeassistant.helpers import entity_registry as er
+
+            self._entity_ids = {
+                entity.entity_id
+                for entity in er.async_get(self.hass).entities.values()
+                if entity.platform == DOMAIN
+            }
+        return self._entity_ids
+
+    def _count_state_write(self, event: Any) -> None:
+        if event.data.get("entity_id") in self.tracked_entity_ids:
+            self.state_writes += 1
+
+    async def async_add_entry(self, imei: str, appid: str = "bench-appid", **user_input: Any) -> Any:
+        """通过用户配置流程添加一个条目，返回创建的 ConfigEntry。"""
+        result = await self.hass.config_entries.flow.async_init(
+            DOMAIN,
+            context={"source": "user"},
+            data={"imei": imei, "appid": appid, **user_input},
+        )
+        if result.get("type") != "create_entry":
+            raise RuntimeError(f"创建条目失败: {result}")
+        await self.hass.async_block_till_done()
+        # 新实体已加入注册表，下一次统计时重新收集
+        self._entity_ids = None
+        return result["result"]
+
+    async def async_remove_entry(self, entry_id: str) -> None:
+        """删除条目。"""
+        await self.hass.config_entries.async_remove(entry_id)
+        await self.hass.async_block_till_done()
+        self._entity_ids = None
+
+    def set_rate_limit(self, rate: float, burst: int) -> None:
+        """在添加条目之前替换集成默认的共享限流器参数。"""
+        ratelimit = importlib.import_module(f"custom_components.{DOMAIN}.ratelimit")
+        self.hass.data[f"{DOMAIN}_rate_limiter"] = ratelimit.PriorityRateLimiter(rate, burst)
+
+    def rate_limiter(self) -> Any:
+        """返回所有条目共享的限流器。"""
+        return self.hass.data[f"{DOMAIN}_rate_limiter"]
+
+    def entry_data(self, entry_id: str) -> dict[str, Any]:
+        """返回条目在 hass.data 中保存的运行时数据。"""
+        return self.hass.data[DOMAIN][entry_id]
+
+    def coordinator(self, entry_id: str) -> Any:
+        """返回条目的协调器。"""
+        return self.entry_data(entry_id)["coordinator"]
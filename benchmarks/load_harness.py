@@ -0,0 +1,158 @@
+"""车队规模负载测试。
+
+在真实 Home Assistant 核心中逐级增加 HXinWatch 配置入口（例如 50、200、500 台），
+每一级都走完整的配置流程、async_setup_entry、DataUpdateCoordinator 和实体平台，
+并报告事件循环延迟、每次刷新的 CPU 时间、每台设备的内存、请求速率和尾延迟。
+
+    python -m benchmarks.load_harness --devices 50,200,500 --duration 60 --latency 0.05
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from typing import Any
+
+from .core import LoopLagMonitor, rate_profile, summarize
+from .harness import HomeAssistantHarness
+from .mock_server import MockHXinWatchServer, add_mock_arguments, mock_config_from_args
+
+IMEI_BASE = 860000000000000
+
+
+def _imei(index: int) -> str:
+    return str(IMEI_BASE + index)
+
+
+async def _timed_refresh(coordinator: Any) -> float:
+    coordinator.api.invalidate_cache()
+    start = time.perf_counter()
+    await coordinator.async_refresh()
+    return (time.perf_counter() - start) * 1000
+
+
+async def run_level(
+    harness: HomeAssistantHarness,
+    server: MockHXinWatchServer,
+    entries: list[Any],
+    target: int,
+    duration: float,
+    scan_interval: int,
+    lockstep: bool = False,
+    curve: bool = False,
+) -> dict[str, Any]:
+    """把设备数增加到 target 并测量这一级的负载指标。
+
+    lockstep 为真时把所有设备的轮询相位设为 0，模拟未错峰时所有设备同时刷新的情况。
+    """
+    hass = harness.hass
+
+    # 添加设备，并统计新增设备带来的内存增量
+    memory_before, _peak = tracemalloc.get_traced_memory()
+    setup_start = time.perf_counter()
+    added = 0
+    while len(entries) < target:
+        entries.append(
+            await harness.async_add_entry(_imei(len(entries)), scan_interval=scan_interval)
+        )
+        added += 1
+    setup_seconds = time.perf_counter() - setup_start
+    await hass.async_block_till_done()
+    memory_after, _peak = tracemalloc.get_traced_memory()
+
+    coordinators = [harness.coordinator(entry.entry_id) for entry in entries]
+    if lockstep:
+        for coordinator in coordinators:
+            coordinator.poll_phase = 0.0
+
+    # 一轮强制刷新：测每次刷新的 CPU 时间和端到端延迟
+    server.reset_stats()
+    cpu_start = time.process_time()
+    refresh_latencies = await asyncio.gather(*(_timed_refresh(c) for c in coordinators))
+    await hass.async_block_till_done()
+    cpu_per_refresh_ms = (time.process_time() - cpu_start) * 1000 / len(coordinators)
+
+    # 稳态运行：让协调器按各自的定时器轮询
+    server.reset_stats()
+    writes_before = harness.state_writes
+    monitor = LoopLagMonitor()
+    monitor.start()
+    run_start = time.monotonic()
+    await asyncio.sleep(duration)
+    run_end = time.monotonic()
+    loop_lag = await monitor.stop()
+
+    api_latencies: list[float] = []
+    for entry in entries:
+        latency = harness.entry_data(entry.entry_id)["api"].metrics.total_latency
+        if latency.total:
+            api_latencies.append(latency.percentile(0.99) or 0.0)
+
+    return {
+        "devices": len(entries),
+        "setup_seconds_for_new_devices": round(setup_seconds, 2),
+        "setup_ms_per_new_device": round(setup_seconds * 1000 / added, 2) if added else None,
+        "memory_kib_per_device": round((memory_after - memory_before) / 1024 / added, 1) if added else None,
+        "cpu_ms_per_refresh": round(cpu_per_refresh_ms, 3),
+        "refresh_latency_ms": summarize(refresh_latencies),
+        "loop_lag_ms": loop_lag,
+        "request_rate": rate_profile(server.request_times, run_start, run_end, curve),
+        "server_max_in_flight": server.max_in_flight,
+        "server_errors": dict(server.errors),
+        "state_writes_per_second": round((harness.state_writes - writes_before) / duration, 2),
+        "device_api_p99_ms": summarize(api_latencies),
+        "rate_limiter": harness.rate_limiter().as_dict(),
+    }
+
+
+async def _main(args: argparse.Namespace) -> list[dict[str, Any]]:
+    levels = sorted({int(level) for level in args.devices.split(",")})
+    results = []
+    tracemalloc.start()
+    try:
+        async with MockHXinWatchServer(mock_config_from_args(args)) as server:
+            async with HomeAssistantHarness(server.url) as harness:
+                if args.rate_limit:
+                    harness.set_rate_limit(args.rate_limit, args.burst)
+                entries: list[Any] = []
+                for level in levels:
+                    result = await run_level(
+                        harness,
+                        server,
+                        entries,
+                        level,
+                        args.duration,
+                        args.scan_interval,
+                        args.lockstep,
+                        args.curve,
+                    )
+                    results.append(result)
+                    print(json.dumps(result, ensure_ascii=False), flush=True)
+    finally:
+        tracemalloc.stop()
+    return results
+
+
+def main() -> None:
+    """命令行入口。"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", default="50,200,500", help="逗号分隔的设备数量级别")
+    parser.add_argument("--duration", type=float, default=60.0, help="每一级的稳态观测时长（秒）")
+    parser.add_argument("--scan-interval", type=int, default=30, help="每个条目的刷新间隔（秒，1-60）")
+    parser.add_argument("--lockstep", action="store_true", help="关闭错峰，所有设备使用相同的轮询相位")
+    parser.add_argument("--curve", action="store_true", help="输出稳态阶段每秒的请求数")
+    parser.add_argument("--rate-limit", type=float, default=0, help="覆盖共享限流器的每秒请求数，0 表示使用集成默认值")
+    parser.add_argument("--burst", type=int, default=40, help="与 --rate-limit 一起使用的突发请求数")
+    parser.add_argument("--output", help="把全部结果写入 JSON 文件")
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+    results = asyncio.run(_main(args))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
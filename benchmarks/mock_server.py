@@ -0,0 +1,375 @@
+"""本地模拟的 HXinWatch 云端服务 (yg.hxinwatch.com)。
+
+覆盖 /wechat/auth、/related/main、/device/config/contact、/device/config/remind、
+/device/config/update 和 /chat/chats，支持可配置的延迟、错误注入和负载大小。
+
+单独运行：
+    python -m benchmarks.mock_server --port 8765 --latency 0.05 --error-rate 0.01
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import Counter
+import json
+import random
+import time
+from typing import Any
+import uuid
+
+from aiohttp import web
+
+API_PREFIX = "/sdkapi/api"
+
+# 可注入的错误类型
+ERROR_KINDS = ("http500", "timeout", "business", "malformed")
+
+
+class MockConfig:
+    """模拟服务器的行为配置。"""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_kinds: tuple[str, ...] = ("http500",),
+        timeout_delay: float = 10.0,
+        voice_messages: int = 10,
+        contacts: int = 10,
+        alarms: int = 5,
+        pad_bytes: int = 0,
+        token_ttl: float = 7200.0,
+        seed: int | None = None,
+    ) -> None:
+        """初始化配置。"""
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_kinds = error_kinds
+        self.timeout_delay = timeout_delay
+        self.voice_messages = voice_messages
+        self.contacts = contacts
+        self.alarms = alarms
+        self.pad_bytes = pad_bytes
+        self.token_ttl = token_ttl
+        self.random = random.Random(seed)
+
+
+class _Device:
+    """单个模拟手表的状态，位置和健康数据在每次查询时随机游走。"""
+
+    def __init__(self, imei: str, config: MockConfig) -> None:
+        rnd = config.random
+        self.imei = imei
+        self.name = f"watch-{imei[-4:]}"
+        self.battery = rnd.randint(20, 100)
+        self.latitude = 31.2 + rnd.uniform(-0.05, 0.05)
+        self.longitude = 121.4 + rnd.uniform(-0.05, 0.05)
+        self.steps = 0
+        self.next_id = 1000
+        self.contacts = [
+            {"id": self._new_id(), "name": f"联系人{i}", "phone": f"138{i:08d}"}
+            for i in range(config.contacts)
+        ]
+        self.alarms = [
+            {
+                "id": str(self._new_id()),
+                "name": f"闹钟{i}",
+                "time": f"{6 + i % 12:02d}:{(i * 7) % 60:02d}",
+                "week": "1111100" if i % 2 else "0000011",
+                "status": 1,
+            }
+            for i in range(config.alarms)
+        ]
+        self.chats = [
+            {
+                "id": self._new_id(),
+                "fromme": i % 2,
+                "type": 2,
+                "content": f"https://example.invalid/voice/{i}.amr",
+                "duration": 3,
+                "time": int(time.time() * 1000) - i * 60000,
+            }
+            for i in range(config.voice_messages)
+        ]
+
+    def _new_id(self) -> int:
+        self.next_id += 1
+        return self.next_id
+
+    def status(self, config: MockConfig) -> dict[str, Any]:
+        rnd = config.random
+        now_ms = int(time.time() * 1000)
+        self.latitude += rnd.gauss(0, 0.00005)
+        self.longitude += rnd.gauss(0, 0.00005)
+        self.steps += rnd.randint(0, 30)
+        data = {
+            "info": {"name": self.name, "battery": self.battery, "imei": self.imei},
+            "location": {
+                "latitude": round(self.latitude, 6),
+                "longitude": round(self.longitude, 6),
+                "address": "上海市模拟路1号",
+                "time": now_ms,
+            },
+            "heart": {"heart": rnd.randint(60, 110), "time": now_ms},
+            "oxygen": {"oxygen": rnd.randint(94, 100), "time": now_ms},
+            "temperature": {"temperature": round(rnd.uniform(36.0, 37.5), 1), "time": now_ms},
+            "sport": {"step": self.steps, "time": now_ms},
+        }
+        if config.pad_bytes:
+            data["padding"] = "x" * config.pad_bytes
+        return data
+
+    def send(self, body: dict[str, Any]) -> None:
+        self.chats.insert(
+            0,
+            {
+                "id": self._new_id(),
+                "fromme": 1,
+                "type": body.get("type"),
+                "content": body.get("content"),
+                "time": int(time.time() * 1000),
+            },
+        )
+
+    def update(self, body: dict[str, Any]) -> None:
+        if "contacts" in body:
+            self.contacts = [
+                {**contact, "id": contact.get("id") or self._new_id()}
+                for contact in body["contacts"]
+            ]
+        if "reminds" in body:
+            self.alarms = [
+                {**alarm, "id": str(alarm.get("id") or self._new_id())}
+                for alarm in body["reminds"]
+            ]
+
+
+class MockHXinWatchServer:
+    """基于 aiohttp 的模拟云端服务，可作为异步上下文管理器使用。"""
+
+    def __init__(
+        self,
+        config: MockConfig | None = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        """初始化服务器。"""
+        self.config = config or MockConfig()
+        self._host = host
+        self._port = port
+        self._runner: web.AppRunner | None = None
+        self._devices: dict[str, _Device] = {}
+        self._tokens: dict[str, float] = {}
+        self.requests: Counter[str] = Counter()
+        self.errors: Counter[str] = Counter()
+        self.request_times: list[float] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+        self.app = web.Application(middlewares=[self._middleware])
+        self.app.router.add_get(f"{API_PREFIX}/wechat/auth", self._handle_auth)
+        self.app.router.add_post(f"{API_PREFIX}/related/main", self._handle_main)
+        self.app.router.add_post(f"{API_PREFIX}/device/config/contact", self._handle_contact)
+        self.app.router.add_post(f"{API_PREFIX}/device/config/remind", self._handle_remind)
+        self.app.router.add_post(f"{API_PREFIX}/device/config/update", self._handle_update)
+        self.app.router.add_post(f"{API_PREFIX}/chat/chats", self._handle_chats)
+        self.app.router.add_post(f"{API_PREFIX}/chat/send", self._handle_send)
+
+    @property
+    def url(self) -> str:
+        """客户端应使用的 base_url。"""
+        return f"http://{self._host}:{self._port}{API_PREFIX}"
+
+    @property
+    def total_requests(self) -> int:
+        """收到的请求总数。"""
+        return sum(self.requests.values())
+
+    def reset_stats(self) -> None:
+        """清空请求统计。"""
+        self.requests.clear()
+        self.errors.clear()
+        self.request_times.clear()
+        self.max_in_flight = self.in_flight
+
+    async def start(self) -> None:
+        """启动服务器。"""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self._host, self._port)
+        await site.start()
+        if not self._port:
+            self._port = site._server.sockets[0].getsockname()[1]  # pylint: disable=protected-access
+
+    async def stop(self) -> None:
+        """停止服务器。"""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> MockHXinWatchServer:
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.stop()
+
+    def device(self, imei: str) -> _Device:
+        """返回（必要时创建）模拟设备。"""
+        device = self._devices.get(imei)
+        if device is None:
+            device = self._devices[imei] = _Device(imei, self.config)
+        return device
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler: Any) -> web.StreamResponse:
+        endpoint = request.path[len(API_PREFIX):]
+        self.requests[endpoint] += 1
+        self.request_times.append(time.monotonic())
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            config = self.config
+            delay = config.latency + (config.random.uniform(0, config.jitter) if config.jitter else 0)
+            if delay:
+                await asyncio.sleep(delay)
+            if config.error_rate and config.random.random() < config.error_rate:
+                kind = config.random.choice(config.error_kinds)
+                self.errors[kind] += 1
+                if kind == "http500":
+                    return web.Response(status=500, text="Internal Server Error")
+                if kind == "timeout":
+                    await asyncio.sleep(config.timeout_delay)
+                    return web.Response(status=504, text="Gateway Timeout")
+                if kind == "business":
+                    return web.json_response({"code": 500, "msg": "服务器繁忙", "data": None})
+                if kind == "malformed":
+                    return web.Response(text="{not json", content_type="application/json")
+            return await handler(request)
+        finally:
+            self.in_flight -= 1
+
+    async def _device_for(self, request: web.Request) -> _Device | web.Response:
+        body = await request.json()
+        token = body.get("token")
+        expires = self._tokens.get(token)
+        if expires is None or expires < time.time():
+            return web.json_response({"code": 401, "msg": "token已失效", "data": None})
+        request["body"] = body
+        return self.device(str(body.get("imei")))
+
+    @staticmethod
+    def _ok(data: Any) -> web.Response:
+        return web.json_response(
+            {"code": 200, "msg": "success", "data": data},
+            dumps=lambda obj: json.dumps(obj, ensure_ascii=False),
+        )
+
+    async def _handle_auth(self, request: web.Request) -> web.Response:
+        if not request.query.get("appid"):
+            return web.json_response({"code": 400, "msg": "缺少appid", "data": None})
+        token = uuid.uuid4().hex
+        expires = time.time() + self.config.token_ttl
+        self._tokens[token] = expires
+        return self._ok({"token": token, "expires_time": int(expires * 1000)})
+
+    async def _handle_main(self, request: web.Request) -> web.Response:
+        device = await self._device_for(request)
+        if isinstance(device, web.Response):
+            return device
+        return self._ok(device.status(self.config))
+
+    async def _handle_contact(self, request: web.Request) -> web.Response:
+        device = await self._device_for(request)
+        if isinstance(device, web.Response):
+            return device
+        return self._ok(device.contacts)
+
+    async def _handle_remind(self, request: web.Request) -> web.Response:
+        device = await self._device_for(request)
+        if isinstance(device, web.Response):
+            return device
+        return self._ok(device.alarms)
+
+    async def _handle_update(self, request: web.Request) -> web.Response:
+        device = await self._device_for(request)
+        if isinstance(device, web.Response):
+            return device
+        device.update(request["body"])
+        return self._ok(None)
+
+    async def _handle_chats(self, request: web.Request) -> web.Response:
+        device = await self._device_for(request)
+        if isinstance(device, web.Response):
+            return device
+        return self._ok(device.chats)
+
+    async def _handle_send(self, request: web.Request) -> web.Response:
+        device = await self._device_for(request)
+        if isinstance(device, web.Response):
+            return device
+        device.send(request["body"])
+        return self._ok(None)
+
+
+def add_mock_arguments(parser: argparse.ArgumentParser) -> None:
+    """为命令行添加模拟服务器相关参数。"""
+    group = parser.add_argument_group("mock server")
+    group.add_argument("--latency", type=float, default=0.0, help="每个请求的基础延迟（秒）")
+    group.add_argument("--jitter", type=float, default=0.0, help="额外随机延迟上限（秒）")
+    group.add_argument("--error-rate", type=float, default=0.0, help="注入错误的概率 (0-1)")
+    group.add_argument(
+        "--error-kinds",
+        default="http500",
+        help=f"逗号分隔的错误类型，可选 {','.join(ERROR_KINDS)}",
+    )
+    group.add_argument("--timeout-delay", type=float, default=10.0, help="timeout 错误的挂起时长（秒）")
+    group.add_argument("--voice-messages", type=int, default=10, help="每台设备的语音消息数")
+    group.add_argument("--contacts", type=int, default=10, help="每台设备的联系人数")
+    group.add_argument("--alarms", type=int, default=5, help="每台设备的闹钟数")
+    group.add_argument("--pad-bytes", type=int, default=0, help="/related/main 额外填充的字节数")
+    group.add_argument("--seed", type=int, default=None, help="随机数种子")
+
+
+def mock_config_from_args(args: argparse.Namespace) -> MockConfig:
+    """根据命令行参数创建配置。"""
+    kinds = tuple(kind.strip() for kind in args.error_kinds.split(",") if kind.strip())
+    unknown = set(kinds) - set(ERROR_KINDS)
+    if unknown:
+        raise SystemExit(f"未知的错误类型: {', '.join(sorted(unknown))}")
+    return MockConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_kinds=kinds,
+        timeout_delay=args.timeout_delay,
+        voice_messages=args.voice_messages,
+        contacts=args.contacts,
+        alarms=args.alarms,
+        pad_bytes=args.pad_bytes,
+        seed=args.seed,
+    )
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    async with MockHXinWatchServer(mock_config_from_args(args), args.host, args.port) as server:
+        print(f"模拟服务器已启动: {server.url}")
+        await asyncio.Event().wait()
+
+
+def main() -> None:
+    """命令行入口。"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_mock_arguments(parser)
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
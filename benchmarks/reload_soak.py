@@ -0,0 +1,175 @@
+"""配置入口反复重新加载的资源泄漏检测。
+
+在真实 Home Assistant 核心中添加若干条目（可启用推送和抓取），反复重新加载，
+每一轮在重新加载完成后统计任务数、定时器数、事件监听器数、服务数、notify 服务对象数、
+集成对象实例数和 Python 内存分配。预热之后任何一项持续增长都视为泄漏，以非零状态退出。
+
+    python -m benchmarks.reload_soak --entries 3 --reloads 50 --push --capture
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import json
+import sys
+import tracemalloc
+from typing import Any
+
+from .harness import HomeAssistantHarness
+from .mock_server import MockHXinWatchServer, add_mock_arguments, mock_config_from_args
+
+IMEI_BASE = 860000000000000
+
+# 统计实例数的集成类：(模块, 类名)
+TRACKED_CLASSES = (
+    ("api", "HXinWatchAPI"),
+    ("coordinator", "HXinWatchDataUpdateCoordinator"),
+    ("outbound", "OutboundQueue"),
+    ("notify", "HXinWatchNotificationService"),
+    ("push", "PushReceiver"),
+    ("capture", "TrafficRecorder"),
+)
+
+
+def _instances(classes: dict[str, type]) -> dict[str, int]:
+    counts = dict.fromkeys(classes, 0)
+    for obj in gc.get_objects():
+        for name, cls in classes.items():
+            if type(obj) is cls:  # pylint: disable=unidiomatic-typecheck
+                counts[name] += 1
+    return counts
+
+
+def snapshot(harness: HomeAssistantHarness, classes: dict[str, type]) -> dict[str, Any]:
+    """统计当前持有的资源。"""
+    hass = harness.hass
+    gc.collect()
+    memory, _peak = tracemalloc.get_traced_memory()
+    return {
+        "tasks": len(asyncio.all_tasks()),
+        # 已取消的定时器由事件循环延迟清理，不计入
+        "timers": sum(
+            1 for handle in hass.loop._scheduled if not handle.cancelled()  # pylint: disable=protected-access
+        ),
+        "listeners": sum(hass.bus.async_listeners().values()),
+        "services": sum(len(services) for services in hass.services.async_services().values()),
+        "notify_services": len(hass.data.get("notify_services", {}).get("hxinwatch", [])),
+        "threads": _thread_count(),
+        "memory_kib": round(memory / 1024, 1),
+        "instances": _instances(classes),
+    }
+
+
+def _thread_count() -> int:
+    import threading  # pylint: disable=import-outside-toplevel
+
+    return threading.active_count()
+
+
+def _growth(first: dict[str, Any], last: dict[str, Any]) -> dict[str, float]:
+    growth = {
+        key: last[key] - first[key]
+        for key in ("tasks", "timers", "listeners", "services", "notify_services", "threads", "memory_kib")
+    }
+    growth.update(
+        {f"instances.{name}": last["instances"][name] - first["instances"][name] for name in first["instances"]}
+    )
+    return growth
+
+
+async def soak(args: argparse.Namespace) -> dict[str, Any]:
+    """添加条目并反复重新加载，返回每轮的统计和预热后的增长量。"""
+    import importlib  # pylint: disable=import-outside-toplevel
+
+    tracemalloc.start()
+    try:
+        async with MockHXinWatchServer(mock_config_from_args(args)) as server:
+            async with HomeAssistantHarness(server.url) as harness:
+                hass = harness.hass
+                entries = []
+                for index in range(args.entries):
+                    entries.append(
+                        await harness.async_add_entry(
+                            str(IMEI_BASE + index),
+                            scan_interval=30,
+                            push=args.push,
+                            capture=args.capture,
+                        )
+                    )
+                await hass.async_block_till_done()
+                classes = {
+                    name: getattr(importlib.import_module(f"custom_components.hxinwatch.{module}"), name)
+                    for module, name in TRACKED_CLASSES
+                }
+
+                samples = []
+                for _round in range(args.reloads):
+                    for entry in entries:
+                        if not await hass.config_entries.async_reload(entry.entry_id):
+                            raise RuntimeError(f"重新加载 {entry.entry_id} 失败")
+                    await hass.async_block_till_done()
+                    # 让出站队列、抓取线程等后台工作结束
+                    await asyncio.sleep(0.05)
+                    samples.append(snapshot(harness, classes))
+
+                # 全部卸载后，集成对象应全部释放
+                for entry in entries:
+                    await hass.config_entries.async_unload(entry.entry_id)
+                await hass.async_block_till_done()
+                await asyncio.sleep(0.05)
+                unloaded = snapshot(harness, classes)
+    finally:
+        tracemalloc.stop()
+
+    warmup = min(args.warmup, len(samples) - 1)
+    growth = _growth(samples[warmup], samples[-1])
+    # Home Assistant 自身的实体平台、翻译缓存等每次重新加载会增加少量内存，
+    # 按每次重新加载的平均增长判断；其余计数必须不增长
+    reloads = max(1, (len(samples) - 1 - warmup) * args.entries)
+    memory_per_reload = round(growth["memory_kib"] / reloads, 2)
+    leaks = {key: value for key, value in growth.items() if key != "memory_kib" and value > 0}
+    if memory_per_reload > args.memory_per_reload_kib:
+        leaks["memory_kib"] = growth["memory_kib"]
+    leftover = {name: count for name, count in unloaded["instances"].items() if count}
+    return {
+        "entries": args.entries,
+        "reloads": args.reloads,
+        "first": samples[warmup],
+        "last": samples[-1],
+        "growth_after_warmup": growth,
+        "memory_kib_per_reload": memory_per_reload,
+        "after_unload": unloaded,
+        "leaks": leaks,
+        "leftover_instances": leftover,
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """命令行参数，也可用于在其他脚本中以默认参数调用 soak()：
+
+        asyncio.run(soak(build_parser().parse_args(["--entries", "1", "--reloads", "15"])))
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=3, help="条目数量")
+    parser.add_argument("--reloads", type=int, default=50, help="每个条目重新加载的次数")
+    parser.add_argument("--warmup", type=int, default=5, help="不计入增长的预热轮数")
+    parser.add_argument("--push", action="store_true", help="条目启用推送模式（注册 webhook）")
+    parser.add_argument("--capture", action="store_true", help="条目启用API流量抓取（写入线程）")
+    parser.add_argument(
+        "--memory-per-reload-kib", type=float, default=8.0, help="预热后每次重新加载允许的平均内存增长"
+    )
+    add_mock_arguments(parser)
+    return parser
+
+
+def main() -> None:
+    """命令行入口。"""
+    result = asyncio.run(soak(build_parser().parse_args()))
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if result["leaks"] or result["leftover_instances"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
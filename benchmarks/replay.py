@@ -0,0 +1,171 @@
+"""把抓取的 API 流量回放到真实 Home Assistant 中的协调器和实体。
+
+抓取文件由集成的“抓取API流量”选项生成（配置目录下的 hxinwatch_capture_<imei>.jsonl.gz）。
+回放服务器按刷新周期提供抓取到的原始响应（包括当时的 HTTP 错误），
+驱动程序按原始时间间隔除以加速倍数依次触发刷新，用于复现问题和性能回归测试。
+
+    python -m benchmarks.replay /config/hxinwatch_capture_860000000000001.jsonl.gz --speed 60
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import time
+from typing import Any
+
+from aiohttp import web
+
+from .core import load_core_module, summarize
+from .mock_server import MockConfig, MockHXinWatchServer
+
+MAIN_ENDPOINT = "/related/main"
+# 抓取文件中请求参数的 IMEI 已脱敏，从文件名中取得；无法取得时使用该 IMEI
+DEFAULT_IMEI = "860000000000001"
+_FILENAME_IMEI = re.compile(r"hxinwatch_capture_(\d+)\.jsonl\.gz")
+
+
+def capture_imei(path: str) -> str:
+    """回放使用的 IMEI：抓取文件名中的 IMEI，文件被重命名时使用 DEFAULT_IMEI。
+
+    回放服务器不校验 IMEI，它只决定回放时创建的条目和实体名称。
+    """
+    match = _FILENAME_IMEI.fullmatch(os.path.basename(path))
+    return match.group(1) if match else DEFAULT_IMEI
+
+
+def load_cycles(path: str, backups: int) -> list[dict[str, Any]]:
+    """读取抓取文件并按刷新周期分组。
+
+    每条 /related/main 记录开始一个新周期，其后的其他接口记录归入该周期。
+    返回周期列表，每个周期包含 time 以及 endpoint 到记录的映射。
+    """
+    capture = load_core_module("capture")
+    cycles: list[dict[str, Any]] = []
+    for record in capture.iter_capture(path, backups):
+        endpoint = record["endpoint"]
+        if endpoint == "/wechat/auth":
+            continue
+        if endpoint == MAIN_ENDPOINT or not cycles:
+            cycles.append({"time": record["time"], "responses": {}})
+        cycles[-1]["responses"].setdefault(endpoint, record)
+    if not cycles:
+        raise SystemExit(f"抓取文件 {path} 中没有可回放的记录")
+    return cycles
+
+
+class ReplayServer(MockHXinWatchServer):
+    """按当前周期返回抓取响应的模拟服务器，认证仍由模拟服务器签发 Token。"""
+
+    def __init__(self, cycles: list[dict[str, Any]]) -> None:
+        """初始化服务器。"""
+        super().__init__(MockConfig())
+        self.cycles = cycles
+        self.cycle = 0
+        self.fallbacks = 0  # 当前周期没有该接口的记录时，使用更早周期记录的次数
+
+    async def _replay(self, request: web.Request, endpoint: str) -> web.Response:
+        device = await self._device_for(request)
+        if isinstance(device, web.Response):
+            return device
+        record = None
+        for index in range(self.cycle, -1, -1):
+            record = self.cycles[index]["responses"].get(endpoint)
+            if record is not None:
+                if index != self.cycle:
+                    self.fallbacks += 1
+                break
+        if record is None:
+            return web.Response(status=404, text="no captured response")
+        if record["status"] is not None and record["status"] >= 400:
+            return web.Response(status=record["status"], text="captured error")
+        if record["body"] is None:
+            # 抓取时连接失败或超时，没有收到响应
+            return web.Response(status=504, text=record.get("error") or "captured failure")
+        return web.Response(text=record["body"], content_type="application/json")
+
+    async def _handle_main(self, request: web.Request) -> web.Response:
+        return await self._replay(request, MAIN_ENDPOINT)
+
+    async def _handle_contact(self, request: web.Request) -> web.Response:
+        return await self._replay(request, "/device/config/contact")
+
+    async def _handle_remind(self, request: web.Request) -> web.Response:
+        return await self._replay(request, "/device/config/remind")
+
+    async def _handle_update(self, request: web.Request) -> web.Response:
+        return await self._replay(request, "/device/config/update")
+
+    async def _handle_chats(self, request: web.Request) -> web.Response:
+        return await self._replay(request, "/chat/chats")
+
+
+async def replay(path: str, backups: int, speed: float, imei: str | None = None) -> dict[str, Any]:
+    """回放抓取文件并返回每个周期的指标。"""
+    from .harness import HomeAssistantHarness  # pylint: disable=import-outside-toplevel
+
+    imei = imei or capture_imei(path)
+    cycles = load_cycles(path, backups)
+    latencies: list[float] = []
+    writes: list[float] = []
+    failures = 0
+
+    async with ReplayServer(cycles) as server:
+        async with HomeAssistantHarness(server.url) as harness:
+            # 配置流程验证和首次刷新都使用第一个周期的响应
+            entry = await harness.async_add_entry(imei, scan_interval=60)
+            coordinator = harness.coordinator(entry.entry_id)
+            replay_start = time.perf_counter()
+            for index in range(1, len(cycles)):
+                if speed > 0:
+                    gap = cycles[index]["time"] - cycles[index - 1]["time"]
+                    await asyncio.sleep(max(0.0, gap / speed))
+                server.cycle = index
+                # 加速回放时周期间隔可能短于缓存时间，确保每个周期都请求回放服务器
+                coordinator.api.invalidate_cache()
+                writes_before = harness.state_writes
+                start = time.perf_counter()
+                await coordinator.async_refresh()
+                await harness.hass.async_block_till_done()
+                latencies.append((time.perf_counter() - start) * 1000)
+                writes.append(harness.state_writes - writes_before)
+                if not coordinator.last_update_success:
+                    failures += 1
+            elapsed = time.perf_counter() - replay_start
+
+            states = {
+                state.entity_id: state.state
+                for state in harness.hass.states.async_all()
+                if state.entity_id in harness.tracked_entity_ids
+            }
+
+    return {
+        "imei": imei,
+        "cycles": len(cycles),
+        "captured_seconds": round(cycles[-1]["time"] - cycles[0]["time"], 1),
+        "replay_seconds": round(elapsed, 2),
+        "failures": failures,
+        "refresh_latency_ms": summarize(latencies),
+        "state_writes_per_cycle": summarize(writes),
+        "server_requests": dict(server.requests),
+        "fallback_responses": server.fallbacks,
+        "final_states": states,
+    }
+
+
+def main() -> None:
+    """命令行入口。"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("capture", help="抓取文件路径（hxinwatch_capture_<imei>.jsonl.gz）")
+    parser.add_argument("--backups", type=int, default=3, help="同时读取的轮转文件数量")
+    parser.add_argument("--speed", type=float, default=60.0, help="加速倍数，0 表示不等待")
+    parser.add_argument("--imei", help="回放条目使用的 IMEI，默认取自抓取文件名")
+    args = parser.parse_args()
+    result = asyncio.run(replay(args.capture, args.backups, args.speed, args.imei))
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,18 +3,52 @@
 from __future__ import annotations
 
 import logging
+import time
 from datetime import timedelta
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ConfigEntryNotReady
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
-from homeassistant.helpers import discovery
+from homeassistant.helpers.event import (
+    TrackStates,
+    async_track_state_change_filtered,
+    async_track_time_interval,
+)
 
-from .const import DOMAIN, DEFAULT_SCAN_INTERVAL
+from .const import (
+    DOMAIN,
+    DEFAULT_SCAN_INTERVAL,
+    HEALTH_STATISTICS_FLUSH_INTERVAL,
+    CONF_AGGREGATE_WINDOWS,
+    DEFAULT_AGGREGATE_WINDOWS,
+    SERVICE_ADD_CONTACT,
+    CONF_CAPTURE,
+    CAPTURE_FILENAME,
+    CAPTURE_MAX_BYTES,
+    CAPTURE_BACKUPS,
+    CAPTURE_CLOSE_TIMEOUT,
+    DATA_RATE_LIMITER,
+    RATE_LIMIT_PER_SECOND,
+    RATE_LIMIT_BURST,
+    CONF_POLL_JITTER,
+    DEFAULT_POLL_JITTER,
+    CONF_PUSH,
+    DATA_CREDENTIALS,
+    DATA_ONBOARDING,
+    ONBOARDING_MAX_AGE,
+    EVENT_NOTIFY_RESULT,
+    NOTIFY_COALESCE_SECONDS,
+    NOTIFY_RETRY_DELAYS,
+    NOTIFY_MAX_PENDING,
+    NOTIFY_MAX_TEXT_LENGTH,
+    DATA_PROFILER,
+)
 from .api import HXinWatchAPI
-from . import services
+from .coordinator import HXinWatchDataUpdateCoordinator, snapshot_store
+from .options import async_update_options, effective_options, entry_option
+from .ratelimit import PriorityRateLimiter
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -24,18 +58,29 @@ PLATFORMS: list[Platform] = [
     Platform.DEVICE_TRACKER,
 ]
 
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """设置HXinWatch设备的配置入口。"""
     _LOGGER.debug("Async setup entry started for HXinWatch (Entry ID: %s).", entry.entry_id)
+    setup_started = time.perf_counter()
+    timings: dict[str, float] = {}
     
     imei = entry.data["imei"]
     appid = entry.data["appid"] # 从配置中获取 appid
-    language = entry.data.get("language", "zh-Hans")
+    # 可调整的配置项以选项为准，见 options.py
+    language = entry_option(entry, "language")
     
-    scan_interval_seconds = entry.data.get("scan_interval", DEFAULT_SCAN_INTERVAL)
+    scan_interval_seconds = entry_option(entry, "scan_interval", DEFAULT_SCAN_INTERVAL)
     
     _LOGGER.debug("刷新间隔设置为: %s 秒", scan_interval_seconds)
     
+    # 所有配置入口共享同一个限流器，避免多台设备同时刷新触发云端限流
+    rate_limiter = hass.data.get(DATA_RATE_LIMITER)
+    if rate_limiter is None:
+        rate_limiter = hass.data[DATA_RATE_LIMITER] = PriorityRateLimiter(
+            RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST
+        )
+
     try:
         session = async_get_clientsession(hass)
         # HXinWatchAPI 实例化时传入 appid
@@ -44,108 +89,199 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             appid=appid,
             language=language,
             session=session,
+            rate_limiter=rate_limiter,
+            credentials=hass.data.setdefault(DATA_CREDENTIALS, {}),
         )
         _LOGGER.debug("HXinWatchAPI 实例已创建。")
+        # 卸载时取消进行中的请求、清空缓存（在协调器保存快照之后执行）
+        entry.async_on_unload(api.async_close)
 
     except Exception as e:
         _LOGGER.error("创建 HXinWatchAPI 实例失败: %s", e)
         return False
 
-    async def async_update_data():
-        """获取最新数据的函数。"""
-        try:
-            # 协调器在每次更新时，内部会先调用 async_refresh_token_if_needed
-            # 该方法会自动使用 appid 获取或刷新 token
-            _LOGGER.debug("开始从HXinWatch API获取设备状态...")
-            status = await api.async_get_device_status()
-            _LOGGER.debug("从HXinWatch API获取到设备状态: %s", status)
-            
-            _LOGGER.debug("开始从HXinWatch API获取语音消息...")
-            voice_messages = await api.async_get_voice_messages()
-            _LOGGER.debug("从HXinWatch API获取到语音消息: %s", voice_messages)
-
-            _LOGGER.debug("开始从HXinWatch API获取通讯录...")
-            contacts = await api.async_get_contacts()
-            _LOGGER.debug("从HXinWatch API获取到通讯录: %s", contacts)
-
-            _LOGGER.debug("开始从HXinWatch API获取闹钟...")
-            alarms = await api.async_get_alarms()
-            _LOGGER.debug("从HXinWatch API获取到闹钟: %s", alarms)
-            
-            full_data = status.get("data", {})
-            full_data["voice_messages"] = voice_messages
-            full_data["contacts"] = contacts
-            full_data["alarms"] = alarms
-            
-            return {
-                "msg": status.get("msg"),
-                "code": status.get("code"),
-                "data": full_data,
-            }
-        except Exception as error:
-            _LOGGER.error("获取设备数据失败: %s", error)
-            raise UpdateFailed(f"获取设备数据失败: {error}") from error
-    
+    # 刚通过配置流程验证的设备：复用验证时获取的设备状态作为首次刷新的数据
+    onboarding = hass.data.get(DATA_ONBOARDING, {}).pop(imei, None)
+    if onboarding is not None:
+        validated_at, status = onboarding
+        api.prime_cache("/related/main", status, ONBOARDING_MAX_AGE - (time.monotonic() - validated_at))
+
+    capture = None
+    if entry_option(entry, CONF_CAPTURE):
+        from .capture import TrafficRecorder  # pylint: disable=import-outside-toplevel
+
+        capture = TrafficRecorder(
+            hass.config.path(CAPTURE_FILENAME.format(imei=imei)), CAPTURE_MAX_BYTES, CAPTURE_BACKUPS
+        )
+        api.capture = capture
+
+        async def _async_close_capture() -> None:
+            # 等写入线程写完并关闭文件，重新加载后的新记录器才会打开同一个文件
+            capture.close()
+            await hass.async_add_executor_job(capture.join, CAPTURE_CLOSE_TIMEOUT)
+
+        entry.async_on_unload(_async_close_capture)
+        _LOGGER.info("已启用API流量抓取，写入 %s", capture.path)
+
+    timings["api"] = time.perf_counter() - setup_started
+
     try:
-        coordinator = DataUpdateCoordinator(
+        coordinator = HXinWatchDataUpdateCoordinator(
             hass,
-            _LOGGER,
-            name=f"{DOMAIN}_{entry.data['imei']}",
-            update_method=async_update_data,
+            entry,
+            api,
             update_interval=timedelta(seconds=scan_interval_seconds),
+            jitter=entry_option(entry, CONF_POLL_JITTER, DEFAULT_POLL_JITTER),
         )
         _LOGGER.debug("DataUpdateCoordinator 实例已创建。")
     except Exception as e:
         _LOGGER.error("创建 DataUpdateCoordinator 实例失败: %s", e)
         return False
     
-    _LOGGER.debug("首次加载HXinWatch设备数据...")
-    try:
-        # 首次刷新会触发 Token 获取和设备状态获取
-        await coordinator.async_config_entry_first_refresh()
-        _LOGGER.debug("HXinWatch协调器首次刷新完成，数据: %s", coordinator.data)
-    except Exception as e:
-        _LOGGER.error("协调器首次刷新失败: %s", e)
-        return False
+    phase_started = time.perf_counter()
+    # 先用上次保存的数据让实体立即可用，首次刷新推迟到本设备的时间槽，避免重启后所有设备同时请求
+    restored = await coordinator.async_restore_snapshot()
+    if not restored:
+        _LOGGER.debug("首次加载HXinWatch设备数据...")
+        try:
+            # 首次刷新会触发 Token 获取和设备状态获取
+            await coordinator.async_config_entry_first_refresh()
+            _LOGGER.debug("HXinWatch协调器首次刷新完成。")
+        except ConfigEntryNotReady:
+            _LOGGER.warning("协调器首次刷新失败，稍后重试。")
+            raise
+    timings["restore" if restored else "first_refresh"] = time.perf_counter() - phase_started
     
     hass.data.setdefault(DOMAIN, {})[entry.entry_id] = {
         "coordinator": coordinator,
         "api": api,
+        "timings": timings,
+        "capture": capture,
+        "options": effective_options(entry),  # 已应用的选项，用于判断哪些选项发生了变化
     }
     _LOGGER.debug("协调器和 API 已存储在 hass.data 中。")
+
+    phase_started = time.perf_counter()
+    # 以下模块只在有配置入口时才需要，延迟导入以缩短集成加载时间
+    from .aggregates import HealthAggregator, parse_aggregate_windows  # pylint: disable=import-outside-toplevel
+    from .geofence import ZONE_DOMAIN, GeofenceMonitor  # pylint: disable=import-outside-toplevel
+    from .health import HealthStatisticsImporter, health_store  # pylint: disable=import-outside-toplevel
+    from .schedule import AlarmSchedule  # pylint: disable=import-outside-toplevel
+
+    geofence = GeofenceMonitor(hass, coordinator, entry.entry_id, imei)
+    entry.async_on_unload(coordinator.async_add_listener(geofence.async_handle_update))
+    # 只订阅 zone 实体的状态变化，其他实体的状态写入不会调用本条目的处理函数
+    zone_tracker = async_track_state_change_filtered(
+        hass, TrackStates(False, set(), {ZONE_DOMAIN}), geofence.async_handle_state_changed
+    )
+    entry.async_on_unload(zone_tracker.async_remove)
+    geofence.async_handle_update()
+    hass.data[DOMAIN][entry.entry_id]["geofence"] = geofence
+
+    health = HealthStatisticsImporter(hass, coordinator, imei, health_store(hass, entry.entry_id))
+    await health.async_load()
+    entry.async_on_unload(coordinator.async_add_listener(health.async_handle_update))
+    entry.async_on_unload(
+        async_track_time_interval(
+            hass, health.async_flush, timedelta(seconds=HEALTH_STATISTICS_FLUSH_INTERVAL)
+        )
+    )
+    entry.async_on_unload(health.async_shutdown)
+    health.async_handle_update()
+    hass.data[DOMAIN][entry.entry_id]["health"] = health
+
+    aggregates = HealthAggregator(
+        coordinator,
+        parse_aggregate_windows(entry_option(entry, CONF_AGGREGATE_WINDOWS, DEFAULT_AGGREGATE_WINDOWS)),
+    )
+    entry.async_on_unload(coordinator.async_add_listener(aggregates.async_handle_update))
+    aggregates.async_handle_update()
+    hass.data[DOMAIN][entry.entry_id]["aggregates"] = aggregates
+
+    # 闹钟列表变化时重新编译每周计划；先于实体注册监听器，实体更新时计划已是最新
+    alarm_schedule = AlarmSchedule()
+
+    def _update_alarm_schedule() -> None:
+        if coordinator.data is not None:
+            alarm_schedule.update(coordinator.data["data"]["alarms"])
+
+    entry.async_on_unload(coordinator.async_add_listener(_update_alarm_schedule))
+    _update_alarm_schedule()
+    hass.data[DOMAIN][entry.entry_id]["alarm_schedule"] = alarm_schedule
+    timings["features"] = time.perf_counter() - phase_started
     
     _LOGGER.debug("转发平台设置: %s", PLATFORMS)
+    phase_started = time.perf_counter()
     try:
         await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
         _LOGGER.debug("平台设置转发成功。")
     except Exception as e:
         _LOGGER.error("平台设置转发失败: %s", e)
         return False
+    timings["platforms"] = time.perf_counter() - phase_started
+
+    push = None
+    if entry_option(entry, CONF_PUSH):
+        from .push import PushReceiver, async_ensure_webhook_id  # pylint: disable=import-outside-toplevel
+
+        push = PushReceiver(hass, coordinator, imei, async_ensure_webhook_id(hass, entry))
+        push.async_register(entry.title)
+        entry.async_on_unload(push.async_unregister)
+    hass.data[DOMAIN][entry.entry_id]["push"] = push
+
+    from .outbound import OutboundQueue  # pylint: disable=import-outside-toplevel
+
+    def _report_delivery(result: dict) -> None:
+        hass.bus.async_fire(EVENT_NOTIFY_RESULT, {"entry_id": entry.entry_id, "imei": imei, **result})
+
+    # 通知消息经由每台设备的出站队列发送，复用本配置入口的 API 客户端
+    outbox = OutboundQueue(
+        api.async_send_chat,
+        _report_delivery,
+        coalesce_window=NOTIFY_COALESCE_SECONDS,
+        retry_delays=NOTIFY_RETRY_DELAYS,
+        max_pending=NOTIFY_MAX_PENDING,
+        max_text_length=NOTIFY_MAX_TEXT_LENGTH,
+    )
+    entry.async_on_unload(outbox.close)
+    hass.data[DOMAIN][entry.entry_id]["outbox"] = outbox
 
     _LOGGER.debug("加载通知平台。")
     try:
-        hass.async_create_task(
+        from homeassistant.helpers import discovery  # pylint: disable=import-outside-toplevel
+
+        # 由配置入口跟踪，卸载时等待其完成
+        entry.async_create_task(
+            hass,
             discovery.async_load_platform(
                 hass,
                 Platform.NOTIFY,
                 DOMAIN,
-                {"entry_id": entry.entry_id},
-                entry,
+                # 每台设备注册独立的通知服务 notify.hxinwatch_<IMEI>
+                {"entry_id": entry.entry_id, "name": f"{DOMAIN}_{imei}"},
+                {},
             )
         )
         _LOGGER.debug("通知平台加载任务已创建。")
     except Exception as e:
         _LOGGER.error("通知平台加载失败: %s", e)
 
-    _LOGGER.debug("设置 HXinWatch 服务。")
-    try:
-        await services.async_setup_services(hass)
-        _LOGGER.debug("HXinWatch 服务设置成功。")
-    except Exception as e:
-        _LOGGER.error("服务注册失败: %s", e)
-        return False
+    # 服务按集成注册一次，而不是每个配置入口重复注册
+    if not hass.services.has_service(DOMAIN, SERVICE_ADD_CONTACT):
+        _LOGGER.debug("设置 HXinWatch 服务。")
+        try:
+            from . import services  # pylint: disable=import-outside-toplevel
+
+            await services.async_setup_services(hass)
+            _LOGGER.debug("HXinWatch 服务设置成功。")
+        except Exception as e:
+            _LOGGER.error("服务注册失败: %s", e)
+            return False
 
-    _LOGGER.debug("Async setup entry 完成成功。")
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
+
+    timings["total"] = time.perf_counter() - setup_started
+    _LOGGER.debug("Async setup entry 完成成功，耗时 %.3f 秒。", timings["total"])
     return True
 
 
@@ -155,8 +291,31 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        integration_data = hass.data[DOMAIN].pop(entry.entry_id)
+        # 其余资源（协调器、API 客户端、监听器、webhook、出站队列等）都通过 entry.async_on_unload 释放
+        if integration_data.get("notify") is not None:
+            from .notify import async_unload_service  # pylint: disable=import-outside-toplevel
+
+            await async_unload_service(hass, integration_data["notify"])
+        if DATA_PROFILER in hass.data:
+            from .profiler import async_cancel_profiling  # pylint: disable=import-outside-toplevel
+
+            async_cancel_profiling(hass, entry.entry_id)
         _LOGGER.debug("HXinWatch 集成数据已从 hass.data 中移除。")
+        if not hass.data[DOMAIN]:
+            from . import services  # pylint: disable=import-outside-toplevel
+
+            await services.async_unload_services(hass)
+            hass.data.pop(DATA_RATE_LIMITER).close()
+            _LOGGER.debug("最后一个配置入口已卸载，HXinWatch 服务已移除。")
     
     _LOGGER.debug("Async unload entry 完成，卸载状态: %s", unload_ok)
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """删除配置入口时清理保存的快照和健康统计状态。"""
+    from .health import health_store  # pylint: disable=import-outside-toplevel
+
+    await snapshot_store(hass, entry.entry_id).async_remove()
+    await health_store(hass, entry.entry_id).async_remove()
@@ -0,0 +1,147 @@
+"""HXinWatch集成的健康数据滚动窗口聚合。"""
+from __future__ import annotations
+
+from collections import deque
+import logging
+from typing import Any
+
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.util import dt as dt_util
+
+from .const import SENSOR_TYPE_HEART_RATE, SENSOR_TYPE_OXYGEN, SENSOR_TYPE_TEMPERATURE
+from .health import extract_health_samples
+
+_LOGGER = logging.getLogger(__name__)
+
+# 参与滚动聚合的健康指标
+AGGREGATE_METRICS = (SENSOR_TYPE_HEART_RATE, SENSOR_TYPE_OXYGEN, SENSOR_TYPE_TEMPERATURE)
+
+
+def parse_aggregate_windows(value: str | list[int]) -> list[int]:
+    """解析窗口配置（如 "10,60,1440"，单位分钟），返回去重排序后的列表。"""
+    if isinstance(value, str):
+        items = [item.strip() for item in value.replace("，", ",").split(",") if item.strip()]
+    else:
+        items = list(value)
+    windows = sorted({int(item) for item in items})
+    if any(minutes <= 0 or minutes > 10080 for minutes in windows):
+        raise ValueError("窗口时长必须在 1-10080 分钟之间")
+    return windows
+
+
+class RollingWindow:
+    """固定时长的滑动窗口，均摊 O(1) 维护均值、最小值、最大值和计数。
+
+    最小/最大值使用单调队列，样本必须按时间递增加入。
+    """
+
+    __slots__ = ("_seconds", "_samples", "_mins", "_maxs", "_total")
+
+    def __init__(self, seconds: float) -> None:
+        """初始化窗口。"""
+        self._seconds = seconds
+        self._samples: deque[tuple[float, float]] = deque()
+        self._mins: deque[tuple[float, float]] = deque()
+        self._maxs: deque[tuple[float, float]] = deque()
+        self._total = 0.0
+
+    def add(self, timestamp: float, value: float) -> None:
+        """加入一个采样。"""
+        self._samples.append((timestamp, value))
+        self._total += value
+        while self._mins and self._mins[-1][1] >= value:
+            self._mins.pop()
+        self._mins.append((timestamp, value))
+        while self._maxs and self._maxs[-1][1] <= value:
+            self._maxs.pop()
+        self._maxs.append((timestamp, value))
+
+    def expire(self, now: float) -> None:
+        """移除窗口之外的采样。"""
+        cutoff = now - self._seconds
+        samples = self._samples
+        while samples and samples[0][0] <= cutoff:
+            self._total -= samples.popleft()[1]
+        while self._mins and self._mins[0][0] <= cutoff:
+            self._mins.popleft()
+        while self._maxs and self._maxs[0][0] <= cutoff:
+            self._maxs.popleft()
+        if not samples:
+            # 窗口清空时归零，避免浮点累计误差
+            self._total = 0.0
+
+    @property
+    def count(self) -> int:
+        """窗口内采样数。"""
+        return len(self._samples)
+
+    @property
+    def mean(self) -> float | None:
+        """窗口内均值。"""
+        return self._total / len(self._samples) if self._samples else None
+
+    @property
+    def min(self) -> float | None:
+        """窗口内最小值。"""
+        return self._mins[0][1] if self._mins else None
+
+    @property
+    def max(self) -> float | None:
+        """窗口内最大值。"""
+        return self._maxs[0][1] if self._maxs else None
+
+
+class HealthAggregator:
+    """为每个健康指标和每个窗口维护滚动聚合，每次协调器刷新更新一次。"""
+
+    def __init__(
+        self,
+        coordinator: DataUpdateCoordinator,
+        windows_minutes: list[int],
+    ) -> None:
+        """初始化聚合器。"""
+        self._coordinator = coordinator
+        self.windows_minutes = sorted(set(windows_minutes))
+        self._windows: dict[tuple[str, int], RollingWindow] = {
+            (metric, minutes): RollingWindow(minutes * 60)
+            for metric in AGGREGATE_METRICS
+            for minutes in self.windows_minutes
+        }
+        self._last_measured: dict[str, float] = {}
+
+    def window(self, metric: str, minutes: int) -> RollingWindow:
+        """返回指定指标和时长的窗口。"""
+        return self._windows[(metric, minutes)]
+
+    @callback
+    def async_handle_update(self) -> None:
+        """处理协调器的数据更新。"""
+        data = (self._coordinator.data or {}).get("data") or {}
+        now = dt_util.utcnow()
+        for metric, measured_at, value in extract_health_samples(data, now):
+            if metric not in AGGREGATE_METRICS:
+                continue
+            timestamp = measured_at.timestamp()
+            # 同一次测量只计入一次，乱序的旧测量直接忽略
+            if timestamp <= self._last_measured.get(metric, float("-inf")):
+                continue
+            self._last_measured[metric] = timestamp
+            for minutes in self.windows_minutes:
+                self._windows[(metric, minutes)].add(timestamp, value)
+
+        now_ts = now.timestamp()
+        for window in self._windows.values():
+            window.expire(now_ts)
+
+    def as_dict(self) -> dict[str, Any]:
+        """返回所有窗口的当前聚合值（用于诊断）。"""
+        return {
+            f"{metric}_{minutes}m": {
+                "mean": window.mean,
+                "min": window.min,
+                "max": window.max,
+                "count": window.count,
+            }
+            for (metric, minutes), window in self._windows.items()
+        }
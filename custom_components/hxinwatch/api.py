@@ -1,14 +1,69 @@
 # hxinwatch/api.py
 """HXinWatch API客户端。"""
 import asyncio
+import copy
+import functools
+import json
 import logging
 import time
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import aiohttp
 
+from .capture import TrafficRecorder
+from .logs import DeviceLogger, Payload
+from .metrics import ApiMetrics
+from .ratelimit import (
+    PRIORITY_CONFIG,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_POLL,
+    PriorityRateLimiter,
+    current_priority,
+)
+from .schema import STATUS_ENDPOINT, SchemaError, normalize_list, normalize_status
+
 _LOGGER = logging.getLogger(__name__)
 
+# 云端接口地址（基准测试会将其指向本地模拟服务器）
+DEFAULT_BASE_URL = "https://yg.hxinwatch.com/sdkapi/api"
+
+# 只读接口的响应缓存时间（秒），用于合并协调器刷新和服务调用等短时间内的重复读取
+CACHE_TTLS = {
+    "/related/main": 1.0,
+    "/chat/chats": 1.0,
+    "/device/config/contact": 5.0,
+    "/device/config/remind": 5.0,
+}
+
+# 未通过 request_priority 指定优先级时，各接口在限流器中的默认优先级
+ENDPOINT_PRIORITIES = {
+    "/related/main": PRIORITY_POLL,
+    "/chat/chats": PRIORITY_POLL,
+    "/device/config/contact": PRIORITY_CONFIG,
+    "/device/config/remind": PRIORITY_CONFIG,
+    "/device/config/update": PRIORITY_INTERACTIVE,
+    "/chat/send": PRIORITY_INTERACTIVE,
+}
+
+# /chat/send 的消息类型，与 /chat/chats 返回的 type 字段一致
+CHAT_TYPES = {"text": 1, "voice": 2}
+
+
+class ApiError(Exception):
+    """云端返回了非 200 的业务状态码。"""
+
+    def __init__(self, endpoint: str, code: Any, msg: Any) -> None:
+        """记录接口、业务状态码和错误信息。"""
+        super().__init__(f"{endpoint} 返回业务错误 {code}: {msg}")
+        self.endpoint = endpoint
+        self.code = code
+        self.msg = msg
+
+
+class TokenExpired(ApiError):
+    """云端返回 401，Token 已失效。"""
+
+
 class HXinWatchAPI:
     """HXinWatch API客户端。"""
 
@@ -18,6 +73,10 @@ class HXinWatchAPI:
         appid: str, # appid 现在是必需的，用于获取Token
         language: str = "zh-Hans",
         session: Optional[aiohttp.ClientSession] = None,
+        base_url: Optional[str] = None,
+        rate_limiter: Optional[PriorityRateLimiter] = None,
+        credentials: Optional[Dict[str, Tuple[str, int]]] = None,
+        log: Optional[DeviceLogger] = None,
     ) -> None:
         """初始化API客户端。"""
         self._token: Optional[str] = None # Token 将由异步方法获取和管理
@@ -25,8 +84,41 @@ class HXinWatchAPI:
         self._appid = appid # 存储 appid
         self._language = language
         self._session = session or aiohttp.ClientSession()
-        self._base_url = "https://yg.hxinwatch.com/sdkapi/api"
+        self._owns_session = session is None # 自行创建的会话由 async_close 关闭
+        self._base_url = base_url or DEFAULT_BASE_URL
+        self._rate_limiter = rate_limiter # 所有配置入口共享的限流器
         self._token_expires_time = 0 # Unix timestamp in milliseconds
+        self.metrics = ApiMetrics() # 各接口的请求数、错误、延迟和流量统计
+        self.capture: Optional[TrafficRecorder] = None # 启用抓取时记录原始请求和响应
+        self._cache: Dict[str, Tuple[float, Dict[str, Any]]] = {} # 接口 -> (过期时间, 响应)
+        self._primed: Dict[str, Tuple[float, Dict[str, Any]]] = {} # 只使用一次的预热响应，同上
+        self._generations: Dict[str, int] = {} # 每次失效时递增，旧请求的结果不再写入缓存
+        self._inflight: Dict[Tuple[str, int], asyncio.Future] = {}
+        self._token_task: Optional[asyncio.Future] = None
+        # 按 appid 共享的 Token 缓存：appid -> (Token, 过期时间毫秒)，同一 appid 的客户端无需各自认证
+        self._credentials = credentials
+        # 本设备的日志记录器，协调器、实体和推送共用
+        self.log = log or DeviceLogger(imei)
+
+    def set_language(self, language: str) -> None:
+        """切换接口语言，已缓存的响应随之失效，Token 保持不变。"""
+        self._language = language
+        self.invalidate_cache()
+
+    async def async_close(self) -> None:
+        """释放客户端持有的资源：取消进行中的请求，清空缓存，关闭自行创建的会话。"""
+        tasks = list(self._inflight.values())
+        if self._token_task is not None:
+            tasks.append(self._token_task)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._inflight.clear()
+        self._cache.clear()
+        self._primed.clear()
+        if self._owns_session and not self._session.closed:
+            await self._session.close()
 
     async def async_refresh_token_if_needed(self) -> None:
         """检查Token是否即将过期，如果过期则自动刷新。"""
@@ -34,8 +126,22 @@ class HXinWatchAPI:
         current_time_ms = time.time() * 1000
         # 如果 token 为 None 或 token 已经过期或将在 5 分钟内过期
         if self._token is None or current_time_ms > (self._token_expires_time - 300000): # 300000 ms = 5 minutes
-            _LOGGER.info("HXinWatch Token即将过期或不存在，尝试刷新Token。")
-            await self.async_get_token_by_appid()
+            shared = self._credentials.get(self._appid) if self._credentials is not None else None
+            if shared is not None and current_time_ms <= shared[1] - 300000:
+                # 其他客户端（或配置流程）已经为该 appid 获取了有效的 Token
+                self._token, self._token_expires_time = shared
+                return
+            # 多个请求同时发现 Token 过期时只刷新一次
+            if self._token_task is None:
+                _LOGGER.info("HXinWatch Token即将过期或不存在，尝试刷新Token。")
+                self._token_task = asyncio.ensure_future(self.async_get_token_by_appid())
+                self._token_task.add_done_callback(self._token_refreshed)
+            await asyncio.shield(self._token_task)
+
+    def _token_refreshed(self, task: asyncio.Future) -> None:
+        self._token_task = None
+        if not task.cancelled():
+            task.exception() # 等待者都已取消时避免“异常未被获取”的警告
 
     async def async_get_token_by_appid(self) -> None:
         """通过 appid 接口获取新的Token。"""
@@ -64,108 +170,211 @@ class HXinWatchAPI:
             "Accept-Language": "zh-CN,zh;q=0.9,en-US;q=0.8,en;q=0.7", #
         }
 
+        await self._async_throttle("/wechat/auth")
+        start = time.perf_counter()
+        size = 0
+        status: Optional[int] = None
+        error_class: Optional[str] = None
         try:
-            _LOGGER.debug("正在通过AppID获取新的Token。URL: %s, Params: %s", url, params)
+            _LOGGER.debug("正在通过AppID获取新的Token。URL: %s", url)
             async with self._session.get(url, params=params, headers=headers) as response: # 使用 GET 请求
+                status = response.status
                 response.raise_for_status()
-                data = await response.json()
-                _LOGGER.debug("Token获取接口响应: %s", data)
+                body = await response.read()
+                size = len(body)
+                data = json.loads(body)
 
                 if data.get("code") == 200 and "data" in data and "token" in data["data"]:
                     self._token = data["data"]["token"]
                     self._token_expires_time = int(data["data"]["expires_time"])
+                    if self._credentials is not None:
+                        self._credentials[self._appid] = (self._token, self._token_expires_time)
                     _LOGGER.info("成功获取并更新HXinWatch Token。新Token有效期至: %s",
                                  time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self._token_expires_time / 1000)))
                 else:
+                    error_class = "AuthRejected"
                     _LOGGER.error("通过AppID获取Token失败: %s", data.get("msg", "未知错误"))
                     raise Exception(f"获取Token失败: {data.get('msg', '未知错误')}")
         except aiohttp.ClientError as error:
+            error_class = type(error).__name__
             _LOGGER.error("与HXinWatch认证API通信错误: %s", error)
             raise
         except asyncio.TimeoutError:
+            error_class = "TimeoutError"
             _LOGGER.error("与HXinWatch认证API通信超时。")
             raise
+        except ValueError:
+            error_class = "InvalidResponse"
+            _LOGGER.error("HXinWatch认证API返回了无法解析的响应。")
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.metrics.record("/wechat/auth", elapsed_ms, size, error_class)
+            if self.capture is not None:
+                # 响应中包含 Token，不写入抓取文件；回放时由模拟服务器重新签发
+                self.capture.record("/wechat/auth", "GET", params, status, None, elapsed_ms, error_class)
 
-    # 以下所有业务方法（async_get_device_status, async_get_contacts 等）都保持不变，
-    # 它们内部会先调用 async_refresh_token_if_needed，确保Token有效。
-    # 唯一需要修改的是 _async_post 中 Authorization header 使用 self._token
-    # async_get_device_status, async_get_contacts, async_update_contacts,
-    # async_get_alarms, async_update_alarms, async_get_voice_messages 保持不变。
+    # 以下业务方法都会先调用 async_refresh_token_if_needed，确保Token有效。
+    # 只读接口经 _async_read 合并请求并短时缓存，更新接口完成后使对应接口的缓存失效。
 
     async def async_get_device_status(self) -> Dict[str, Any]:
         """获取设备状态。"""
-        await self.async_refresh_token_if_needed()
-        url = f"{self._base_url}/related/main"
-        payload = {
-            "token": self._token,
-            "imei": self._imei,
-            "language": self._language,
-        }
-        return await self._async_post(url, payload)
+        return await self._async_read("/related/main")
 
     async def async_get_contacts(self) -> List[Dict[str, Any]]:
         """获取通讯录列表。"""
-        await self.async_refresh_token_if_needed()
-        url = f"{self._base_url}/device/config/contact"
-        payload = {
-            "token": self._token,
-            "imei": self._imei,
-            "language": self._language,
-        }
-        response = await self._async_post(url, payload)
-        return response.get("data", [])
+        response = await self._async_read("/device/config/contact")
+        return response["data"]
 
     async def async_update_contacts(self, contacts: List[Dict[str, Any]]) -> Dict[str, Any]:
         """更新通讯录。"""
-        await self.async_refresh_token_if_needed()
-        url = f"{self._base_url}/device/config/update"
-        payload = {
-            "contacts": contacts,
-            "token": self._token,
-            "imei": self._imei,
-            "language": self._language,
-        }
-        return await self._async_post(url, payload)
+        try:
+            return await self._async_write("/device/config/update", {"contacts": contacts})
+        finally:
+            # 无论成功与否，云端数据都可能已变化
+            self.invalidate_cache("/device/config/contact")
 
     async def async_get_alarms(self) -> List[Dict[str, Any]]:
         """获取闹钟列表。"""
-        await self.async_refresh_token_if_needed()
-        url = f"{self._base_url}/device/config/remind"
-        payload = {
-            "token": self._token,
-            "imei": self._imei,
-            "language": self._language,
-        }
-        response = await self._async_post(url, payload)
-        return response.get("data", [])
+        response = await self._async_read("/device/config/remind")
+        return response["data"]
 
     async def async_update_alarms(self, alarms: List[Dict[str, Any]]) -> Dict[str, Any]:
         """更新闹钟。"""
-        await self.async_refresh_token_if_needed()
-        url = f"{self._base_url}/device/config/update"
-        payload = {
-            "reminds": alarms,
-            "token": self._token,
-            "imei": self._imei,
-            "language": self._language,
-        }
-        return await self._async_post(url, payload)
+        try:
+            return await self._async_write("/device/config/update", {"reminds": alarms})
+        finally:
+            # 无论成功与否，云端数据都可能已变化
+            self.invalidate_cache("/device/config/remind")
 
     async def async_get_voice_messages(self) -> List[Dict[str, Any]]:
         """获取语音消息。"""
+        response = await self._async_read("/chat/chats")
+        return [msg for msg in response["data"] if msg["fromme"] == 0]
+
+    async def async_send_chat(self, kind: str, content: str) -> Dict[str, Any]:
+        """向设备发送消息，kind 为 text（content 为文字）或 voice（content 为语音文件URL）。"""
+        try:
+            return await self._async_write("/chat/send", {"type": CHAT_TYPES[kind], "content": content})
+        finally:
+            self.invalidate_cache("/chat/chats")
+
+    def prime_cache(self, endpoint: str, response: Dict[str, Any], max_age: float) -> None:
+        """用已经获取到的响应预热缓存，例如配置流程验证时取得的设备状态。
+
+        预热的响应只供 max_age 秒内的下一次读取使用一次，之后的读取照常请求云端。
+        """
+        if max_age > 0:
+            self._primed[endpoint] = (time.monotonic() + max_age, copy.deepcopy(response))
+
+    def invalidate_cache(self, endpoint: Optional[str] = None) -> None:
+        """使某个接口（默认全部接口）的缓存失效，进行中的旧请求完成后也不会写入缓存。"""
+        for key in [endpoint] if endpoint else list(CACHE_TTLS):
+            self._cache.pop(key, None)
+            self._primed.pop(key, None)
+            self._generations[key] = self._generations.get(key, 0) + 1
+
+    async def _async_read(self, endpoint: str) -> Dict[str, Any]:
+        """读取只读接口。
+
+        TTL 内的重复读取直接返回缓存，相同的进行中请求只发出一次。
+        响应在写入缓存前经 schema 规范化，返回的都是副本，调用方可以自由修改。
+        """
+        primed = self._primed.pop(endpoint, None)
+        if primed is not None and primed[0] > time.monotonic():
+            self.metrics.record_cache_hit(endpoint)
+            return primed[1]
+
+        cached = self._cache.get(endpoint)
+        if cached is not None and cached[0] > time.monotonic():
+            self.metrics.record_cache_hit(endpoint)
+            return copy.deepcopy(cached[1])
+
+        key = (endpoint, self._generations.get(endpoint, 0))
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._async_fetch(*key))
+            self._inflight[key] = task
+            task.add_done_callback(functools.partial(self._fetch_done, key))
+        else:
+            self.metrics.record_coalesced(endpoint)
+        # shield：某个调用方被取消时不影响共享同一请求的其他调用方
+        return copy.deepcopy(await asyncio.shield(task))
+
+    async def _async_fetch(self, endpoint: str, generation: int) -> Dict[str, Any]:
+        await self.async_refresh_token_if_needed()
+        try:
+            response = await self._async_post(endpoint, self._read_payload())
+        except TokenExpired:
+            # Token 在到期前被云端作废（例如同一 appid 在别处重新认证），重新认证后重试一次
+            await self.async_refresh_token_if_needed()
+            response = await self._async_post(endpoint, self._read_payload())
+        response = self._normalize(endpoint, response)
+        if self._generations.get(endpoint, 0) == generation:
+            self._cache[endpoint] = (time.monotonic() + CACHE_TTLS[endpoint], response)
+        return response
+
+    async def _async_write(self, endpoint: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """调用写接口。
+
+        与 _async_fetch 一样，Token 在到期前被云端作废时重新认证后重试一次；
+        云端返回 401 时请求未被执行，重试不会重复写入。
+        """
         await self.async_refresh_token_if_needed()
-        url = f"{self._base_url}/chat/chats"
-        payload = {
+        try:
+            return await self._async_post(endpoint, {**fields, **self._read_payload()})
+        except TokenExpired:
+            await self.async_refresh_token_if_needed()
+            return await self._async_post(endpoint, {**fields, **self._read_payload()})
+
+    def _read_payload(self) -> Dict[str, Any]:
+        return {
             "token": self._token,
             "imei": self._imei,
             "language": self._language,
         }
-        response = await self._async_post(url, payload)
-        return [msg for msg in response.get("data", []) if msg.get("fromme") == 0]
 
+    def _normalize(self, endpoint: str, response: Dict[str, Any]) -> Dict[str, Any]:
+        """校验并规范化响应的 data，结构错误按接口和字段路径计数。"""
+        try:
+            if endpoint == STATUS_ENDPOINT:
+                data, errors = normalize_status(response.get("data"))
+                for error in errors:
+                    self.metrics.record_schema_error(endpoint, error.path)
+                    self.log.warning("schema", "已丢弃不合法的数据段: %s", error)
+            else:
+                data = normalize_list(endpoint, response.get("data"))
+        except SchemaError as error:
+            self.metrics.record_schema_error(endpoint, error.path)
+            self.log.error("schema", "HXinWatch API 响应结构不合法: %s", error)
+            raise
+        return {**response, "data": data}
+
+    def _invalidate_token(self) -> None:
+        """作废当前 Token；共享缓存中的同一 Token 一并移除，其他客户端不会再取用。"""
+        if self._credentials is not None:
+            shared = self._credentials.get(self._appid)
+            if shared is not None and shared[0] == self._token:
+                del self._credentials[self._appid]
+        self._token = None
+        self._token_expires_time = 0
 
-    async def _async_post(self, url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
-        """发送POST请求并处理响应。"""
+    def _fetch_done(self, key: Tuple[str, int], task: asyncio.Future) -> None:
+        self._inflight.pop(key, None)
+        if not task.cancelled():
+            task.exception() # 等待者都已取消时避免“异常未被获取”的警告
+
+    async def _async_throttle(self, endpoint: str) -> None:
+        """从共享限流器获取令牌，等待时间不计入接口延迟统计。"""
+        if self._rate_limiter is None:
+            return
+        priority = current_priority()
+        if priority is None:
+            priority = ENDPOINT_PRIORITIES.get(endpoint, PRIORITY_POLL)
+        await self._rate_limiter.acquire(priority)
+
+    async def _async_post(self, endpoint: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """发送POST请求并处理响应，同时按接口记录请求统计。"""
         # 确保 token 存在，因为它可能在 async_refresh_token_if_needed 中被设置为 None
         if self._token is None:
             _LOGGER.error("尝试发送POST请求但Token为None，请检查Token刷新机制。")
@@ -176,13 +385,52 @@ class HXinWatchAPI:
             "Content-Type": "application/json;charset=UTF-8",
         }
         
+        url = f"{self._base_url}{endpoint}"
+        await self._async_throttle(endpoint)
+        start = time.perf_counter()
+        size = 0
+        status: Optional[int] = None
+        body: Optional[bytes] = None
+        error_class: Optional[str] = None
         try:
             async with self._session.post(url, json=payload, headers=headers) as response:
+                status = response.status
                 response.raise_for_status()
-                return await response.json()
+                body = await response.read()
+                size = len(body)
+                data = json.loads(body)
+            if not isinstance(data, dict):
+                raise ValueError("响应不是JSON对象")
+            code = data.get("code")
+            if code != 200:
+                if code == 401:
+                    error_class = "TokenExpired"
+                    self._invalidate_token()
+                    raise TokenExpired(endpoint, code, data.get("msg"))
+                error_class = "BusinessError"
+                raise ApiError(endpoint, code, data.get("msg"))
+            self.log.debug(
+                "api", "%s 响应 %d 字节，耗时 %.0f 毫秒: %s",
+                endpoint, size, (time.perf_counter() - start) * 1000, Payload(data),
+            )
+            return data
+        except ApiError as error:
+            self.log.error("api", "HXinWatch API error: %s", error)
+            raise
         except aiohttp.ClientError as error:
-            _LOGGER.error("Error communicating with HXinWatch API: %s", error)
+            error_class = type(error).__name__
+            self.log.error("api", "Error communicating with HXinWatch API (%s): %s", endpoint, error)
             raise
         except asyncio.TimeoutError:
-            _LOGGER.error("Timeout communicating with HXinWatch API")
+            error_class = "TimeoutError"
+            self.log.error("api", "Timeout communicating with HXinWatch API (%s)", endpoint)
+            raise
+        except ValueError:
+            error_class = "InvalidResponse"
+            self.log.error("api", "Invalid JSON received from HXinWatch API (%s)", endpoint)
             raise
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.metrics.record(endpoint, elapsed_ms, size, error_class)
+            if self.capture is not None:
+                self.capture.record(endpoint, "POST", payload, status, body, elapsed_ms, error_class)
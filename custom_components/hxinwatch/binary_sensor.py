@@ -18,6 +18,7 @@ from homeassistant.helpers.update_coordinator import (
 )
 
 from .const import DOMAIN, BINARY_SENSOR_TYPE_LOW_BATTERY
+from .logs import Payload
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -41,7 +42,7 @@ async def async_setup_entry(
     coordinator = integration_data["coordinator"]
     
     entities = []
-    _LOGGER.debug("开始设置二进制传感器实体，协调器数据: %s", coordinator.data)
+    _LOGGER.debug("开始设置二进制传感器实体，协调器数据: %s", Payload(coordinator.data))
     for description in BINARY_SENSOR_TYPES:
         entities.append(HXinWatchBinarySensor(coordinator, description, entry.unique_id))
     
@@ -73,8 +74,5 @@ class HXinWatchBinarySensor(CoordinatorEntity, BinarySensorEntity):
     @property
     def is_on(self) -> bool:
         """返回二进制传感器的状态。"""
-        data = self.coordinator.data.get("data", {})
-        battery_level = data.get("info", {}).get("battery")
-        _LOGGER.debug("二进制传感器 '%s' 获取到协调器数据（已解析顶层 'data'）：%s, 电池电量: %s", self.entity_description.key, data, battery_level)
-        
+        battery_level = self.coordinator.data["data"]["info"]["battery"]
         return battery_level is not None and battery_level < 15
\ No newline at end of file
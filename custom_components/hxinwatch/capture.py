@@ -0,0 +1,187 @@
+"""HXinWatch API原始流量的抓取与读取。
+
+抓取文件为 gzip 压缩的 JSON Lines，每行一条请求/响应记录，请求参数按 logs.REDACT_KEYS 脱敏。写入在独立线程中完成，
+不阻塞事件循环；单个文件超过上限后轮转，最多保留 backups 个历史文件。
+本模块不依赖 Home Assistant，基准测试中的回放工具也使用它读取抓取文件。
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Iterator, Optional
+
+from .logs import redact
+
+_LOGGER = logging.getLogger(__name__)
+
+_STOP = object()
+# 未落盘的未压缩数据达到该字节数时落盘一次，使轮转检查看到的文件大小与实际写入量的差距有界
+_FLUSH_BYTES = 64 * 1024
+
+
+def rotated_paths(path: str, backups: int) -> list[str]:
+    """按从旧到新的顺序返回抓取文件及其轮转文件的路径。"""
+    return [f"{path}.{index}" for index in range(backups, 0, -1)] + [path]
+
+
+class TrafficRecorder:
+    """把请求/响应对写入大小受限、自动轮转的压缩文件。"""
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int,
+        backups: int = 3,
+        max_pending: int = 1000,
+    ) -> None:
+        """初始化记录器，写入线程在第一次记录时启动。"""
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.records = 0  # 已写入的记录数
+        self.dropped = 0  # 写入线程跟不上时丢弃的记录数
+        self.rotations = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        # 队列已满、无法放入停止标记时，写入线程写完队列后据此退出
+        self._stop_requested = threading.Event()
+
+    def record(
+        self,
+        endpoint: str,
+        method: str,
+        payload: Optional[dict[str, Any]],
+        status: Optional[int],
+        body: Optional[bytes],
+        elapsed_ms: float,
+        error: Optional[str] = None,
+    ) -> None:
+        """记录一次请求，只做入队，不在调用方线程中执行任何 I/O。"""
+        if self._closed:
+            return
+        item = {
+            "time": time.time(),
+            "endpoint": endpoint,
+            "method": method,
+            "payload": redact(payload),  # 与日志和诊断信息相同的脱敏字段（Token、AppID、IMEI 等）
+            "status": status,
+            "elapsed_ms": round(elapsed_ms, 3),
+            "error": error,
+            "body": body,
+        }
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+            return
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name=f"hxinwatch-capture-{os.path.basename(self.path)}", daemon=True
+            )
+            self._thread.start()
+
+    def close(self) -> None:
+        """停止记录，写入线程写完队列中剩余的记录后关闭文件，不等待其结束（见 join）。
+
+        在事件循环中调用，不会阻塞：队列已满时不放入停止标记，写入线程清空队列后自行退出。
+        """
+        if self._closed:
+            return
+        self._closed = True
+        # 先设置标志再放入标记：写入线程在两者之间清空队列时也能看到标志
+        self._stop_requested.set()
+        if self._thread is not None:
+            try:
+                self._queue.put_nowait(_STOP)
+            except queue.Full:
+                pass
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """等待写入线程写完并关闭文件，会阻塞，应在线程池中调用。
+
+        重新加载时新的记录器会打开同一个文件，必须等旧线程结束后才能开始写入。
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                _LOGGER.warning("API抓取文件 %s 的写入线程在 %s 秒内没有结束。", self.path, timeout)
+
+    def as_dict(self) -> dict[str, Any]:
+        """返回记录器状态，用于诊断信息。"""
+        return {
+            "path": self.path,
+            "max_bytes": self.max_bytes,
+            "backups": self.backups,
+            "records": self.records,
+            "dropped": self.dropped,
+            "rotations": self.rotations,
+        }
+
+    def _open(self) -> tuple[Any, gzip.GzipFile]:
+        raw = open(self.path, "ab")  # pylint: disable=consider-using-with
+        return raw, gzip.GzipFile(fileobj=raw, mode="ab")
+
+    def _rotate(self) -> None:
+        paths = rotated_paths(self.path, self.backups)
+        if self.backups:
+            for older, newer in zip(paths, paths[1:]):
+                if os.path.exists(newer):
+                    os.replace(newer, older)
+        else:
+            os.remove(self.path)
+        self.rotations += 1
+
+    def _run(self) -> None:
+        raw, stream = self._open()
+        unflushed = 0
+        try:
+            while True:
+                item = self._queue.get()
+                if item is _STOP:
+                    break
+                body = item["body"]
+                item["body"] = body.decode("utf-8", "replace") if body is not None else None
+                line = json.dumps(item, ensure_ascii=False).encode("utf-8") + b"\n"
+                stream.write(line)
+                self.records += 1
+                unflushed += len(line)
+                # 队列暂时为空或积累了足够数据时落盘，使文件大小反映已写入的数据；
+                # 每次写入后都检查大小，持续有流量时文件也不会超出上限
+                if unflushed >= _FLUSH_BYTES or self._queue.empty():
+                    stream.flush()
+                    unflushed = 0
+                if raw.tell() >= self.max_bytes:
+                    stream.close()
+                    raw.close()
+                    self._rotate()
+                    raw, stream = self._open()
+                    unflushed = 0
+                if self._stop_requested.is_set() and self._queue.empty():
+                    break
+        except OSError as error:
+            _LOGGER.error("写入API抓取文件 %s 失败: %s", self.path, error)
+            self._closed = True
+        finally:
+            stream.close()
+            raw.close()
+
+
+def iter_capture(path: str, backups: int = 3) -> Iterator[dict[str, Any]]:
+    """按时间顺序读取抓取文件（含轮转文件）中的记录。"""
+    for file_path in rotated_paths(path, backups):
+        if not os.path.exists(file_path):
+            continue
+        with gzip.open(file_path, "rt", encoding="utf-8") as file:
+            try:
+                for line in file:
+                    if line.strip():
+                        yield json.loads(line)
+            except EOFError:
+                # 最后一个文件可能在写入过程中被读取，忽略不完整的尾部
+                _LOGGER.debug("抓取文件 %s 的尾部不完整。", file_path)
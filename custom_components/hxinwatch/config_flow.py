@@ -3,31 +3,72 @@
 from __future__ import annotations
 
 import logging
+import time
 from typing import Any
 
 import voluptuous as vol
 
 from homeassistant import config_entries
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
-from .const import DOMAIN, DEFAULT_SCAN_INTERVAL
-from .api import HXinWatchAPI
+from .const import (
+    DOMAIN,
+    DEFAULT_SCAN_INTERVAL,
+    CONF_MIN_DISTANCE,
+    CONF_MIN_PUBLISH_INTERVAL,
+    CONF_AGGREGATE_WINDOWS,
+    DEFAULT_AGGREGATE_WINDOWS,
+    CONF_CAPTURE,
+    CONF_POLL_JITTER,
+    CONF_PUSH,
+    DATA_CREDENTIALS,
+    DATA_ONBOARDING,
+    ONBOARDING_MAX_AGE,
+)
+from .aggregates import parse_aggregate_windows
+from .api import ApiError, HXinWatchAPI
+from .options import OPTION_DEFAULTS, effective_options
 
 _LOGGER = logging.getLogger(__name__)
 
+def _tuning_schema(defaults: dict[str, Any]) -> dict[Any, Any]:
+    """可调整配置项的表单字段，创建条目和选项流程共用。"""
+    return {
+        vol.Optional("language", default=defaults["language"]): str,
+        vol.Optional(
+            "scan_interval",
+            default=defaults["scan_interval"],
+        ): vol.All(vol.Coerce(int), vol.Range(min=1, max=60)),
+        vol.Optional(
+            CONF_MIN_DISTANCE,
+            default=defaults[CONF_MIN_DISTANCE],
+        ): vol.All(vol.Coerce(int), vol.Range(min=0, max=1000)),  # 米，0 表示不过滤
+        vol.Optional(
+            CONF_MIN_PUBLISH_INTERVAL,
+            default=defaults[CONF_MIN_PUBLISH_INTERVAL],
+        ): vol.All(vol.Coerce(int), vol.Range(min=0, max=3600)),  # 秒
+        vol.Optional(
+            CONF_AGGREGATE_WINDOWS,
+            default=defaults[CONF_AGGREGATE_WINDOWS],
+        ): str,  # 逗号分隔的分钟数，如 "10,60,1440"
+        vol.Optional(
+            CONF_POLL_JITTER,
+            default=defaults[CONF_POLL_JITTER],
+        ): vol.All(vol.Coerce(int), vol.Range(min=0, max=30)),  # 秒
+        vol.Optional(CONF_PUSH, default=defaults[CONF_PUSH]): bool,  # 通过 webhook 接收本地中继推送的数据
+        vol.Optional(CONF_CAPTURE, default=defaults[CONF_CAPTURE]): bool,  # 抓取原始API流量，用于排查问题
+    }
+
+
 # 定义配置表单的schema
 STEP_USER_DATA_SCHEMA = vol.Schema(
     {
         vol.Required("imei"): str,  # IMEI 是必填项
         vol.Required("appid"): str, # AppID 是必填项，用于获取Token
-        vol.Optional("language", default="zh-Hans"): str,
-        vol.Optional(
-            "scan_interval",
-            default=30,
-        ): vol.All(vol.Coerce(int), vol.Range(min=1, max=60)),
+        **_tuning_schema(OPTION_DEFAULTS),
     }
 )
 
@@ -37,6 +78,11 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
     appid = data["appid"]
     language = data.get("language", "zh-Hans")
 
+    try:
+        parse_aggregate_windows(data.get(CONF_AGGREGATE_WINDOWS, DEFAULT_AGGREGATE_WINDOWS))
+    except ValueError as e:
+        raise InvalidWindows(f"聚合窗口配置无效: {e}") from e
+
     session = async_get_clientsession(hass)
     # HXinWatchAPI 现在需要 appid 作为初始化参数
     api = HXinWatchAPI(
@@ -44,26 +90,41 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
         appid=appid,
         language=language,
         session=session,
+        # 获取到的 Token 写入共享缓存，新条目（以及同一 appid 的其他设备）可直接使用
+        credentials=hass.data.setdefault(DATA_CREDENTIALS, {}),
     )
 
     try:
-        # 首先尝试通过 AppID 获取 Token (此步骤不再需要IMEI)
-        await api.async_get_token_by_appid()
+        # 首先通过 AppID 获取 Token (此步骤不再需要IMEI)，同一 appid 已有有效 Token 时直接复用
+        await api.async_refresh_token_if_needed()
         _LOGGER.debug("通过 AppID 获取 Token 成功。")
         
         # 然后尝试使用获取到的 Token 和用户提供的 IMEI 获取设备状态进行验证
-        await api.async_get_device_status()
+        status = await api.async_get_device_status()
         _LOGGER.debug("使用新获取的Token和IMEI获取设备状态成功，输入验证通过。")
 
     except Exception as e:
         _LOGGER.warning("HXinWatch输入验证失败: %s", e)
         if isinstance(e, HomeAssistantError):
             raise e
+        # 云端返回业务错误（Token 无效、IMEI 不存在等）视为认证信息无效
+        if isinstance(e, ApiError):
+            raise InvalidAuth("认证信息（AppID或IMEI）无效。") from e
         # 尝试区分认证错误和连接错误
         if "401" in str(e) or "Unauthorized" in str(e) or "认证失败" in str(e) or "获取Token失败" in str(e):
              raise InvalidAuth("认证信息（AppID或IMEI）无效。") from e
         raise CannotConnect(f"无法连接或获取设备数据: {e}") from e
-    
+
+    # 暂存验证时获取的设备状态，新条目的首次刷新直接使用，不再重复请求
+    onboarding = hass.data.setdefault(DATA_ONBOARDING, {})
+    now = time.monotonic()
+    # 清理验证后没有创建条目（例如流程被放弃）的过期数据
+    for stale in [
+        key for key, (validated_at, _status) in onboarding.items()
+        if now - validated_at > ONBOARDING_MAX_AGE
+    ]:
+        del onboarding[stale]
+    onboarding[imei] = (now, status)
     return {"title": f"HXinWatch Device ({imei})"}
 
 
@@ -72,6 +133,14 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> config_entries.OptionsFlow:
+        """返回选项流程。"""
+        return OptionsFlowHandler(config_entry)
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
@@ -89,6 +158,8 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             errors["base"] = "cannot_connect"
         except InvalidAuth:
             errors["base"] = "invalid_auth"
+        except InvalidWindows:
+            errors[CONF_AGGREGATE_WINDOWS] = "invalid_windows"
         except Exception: # pylint: disable=broad-except
             _LOGGER.exception("Unexpected exception")
             errors["base"] = "unknown"
@@ -103,9 +174,39 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         )
 
 
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """处理HXinWatch集成的选项流程，大部分选项无需重新加载即可生效。"""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """初始化选项流程。"""
+        self._config_entry = config_entry
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """处理选项表单。"""
+        errors = {}
+        if user_input is not None:
+            try:
+                parse_aggregate_windows(user_input[CONF_AGGREGATE_WINDOWS])
+            except ValueError:
+                errors[CONF_AGGREGATE_WINDOWS] = "invalid_windows"
+            else:
+                return self.async_create_entry(title="", data=user_input)
+
+        defaults = {**effective_options(self._config_entry), **(user_input or {})}
+        return self.async_show_form(
+            step_id="init", data_schema=vol.Schema(_tuning_schema(defaults)), errors=errors
+        )
+
+
 class CannotConnect(HomeAssistantError):
     """无法连接到API的错误。"""
 
 
 class InvalidAuth(HomeAssistantError):
     """认证失败的错误。"""
+
+
+class InvalidWindows(HomeAssistantError):
+    """聚合窗口配置无效的错误。"""
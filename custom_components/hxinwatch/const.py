@@ -4,7 +4,7 @@
 DOMAIN = "hxinwatch"
 
 # 默认配置
-DEFAULT_SCAN_INTERVAL = 300  # 5分钟
+DEFAULT_SCAN_INTERVAL = 30  # 秒，配置表单允许 1-60 秒
 
 # 设备类型
 DEVICE_TYPE_WATCH = "watch"
@@ -19,6 +19,7 @@ SENSOR_TYPE_STEPS = "steps"
 # 新增的传感器类型
 SENSOR_TYPE_CONTACT_COUNT = "contact_count" # 新增
 SENSOR_TYPE_ALARM_COUNT = "alarm_count"     # 新增
+SENSOR_TYPE_NEXT_ALARM = "next_alarm"
 
 # 二进制传感器类型
 BINARY_SENSOR_TYPE_ONLINE = "online"
@@ -28,4 +29,81 @@ BINARY_SENSOR_TYPE_LOW_BATTERY = "low_battery"
 SERVICE_ADD_CONTACT = "add_contact"
 SERVICE_DELETE_CONTACT = "delete_contact"
 SERVICE_ADD_ALARM = "add_alarm"
-SERVICE_DELETE_ALARM = "delete_alarm"
\ No newline at end of file
+SERVICE_DELETE_ALARM = "delete_alarm"
+SERVICE_EXPORT_HISTORY = "export_history"
+
+# 地理围栏
+EVENT_GEOFENCE = "hxinwatch_geofence"
+GEOFENCE_HYSTERESIS_METERS = 30  # 离开围栏需超出半径的距离，用于抑制GPS抖动
+GEOFENCE_GRID_CELL_DEGREES = 0.01  # 网格单元大小（约1公里）
+GEOFENCE_MAX_CELLS_PER_FENCE = 64  # 超过此单元数的大围栏单独检查
+
+# 设备追踪器抖动过滤
+CONF_MIN_DISTANCE = "min_distance"
+CONF_MIN_PUBLISH_INTERVAL = "min_publish_interval"
+DEFAULT_MIN_DISTANCE = 20  # 米，小于此位移的定位视为原地漂移
+DEFAULT_MIN_PUBLISH_INTERVAL = 0  # 秒，两次发布位置之间的最短间隔，0 表示不限制
+
+# 健康数据长期统计
+HEALTH_STATISTICS_FLUSH_INTERVAL = 300  # 秒，批量导入长期统计的间隔
+HEALTH_STORAGE_VERSION = 1
+
+# 健康数据滚动聚合
+CONF_AGGREGATE_WINDOWS = "aggregate_windows"
+DEFAULT_AGGREGATE_WINDOWS = "10,60,1440"  # 分钟
+
+# 最近一次有效数据的快照
+SNAPSHOT_STORAGE_VERSION = 1
+SNAPSHOT_SAVE_DELAY = 60  # 秒，快照合并写入的延迟
+
+# API原始流量抓取
+CONF_CAPTURE = "capture"
+CAPTURE_FILENAME = "hxinwatch_capture_{imei}.jsonl.gz"  # 位于配置目录下
+CAPTURE_MAX_BYTES = 5 * 1024 * 1024  # 单个抓取文件的大小上限
+CAPTURE_BACKUPS = 3  # 保留的轮转文件数量
+CAPTURE_CLOSE_TIMEOUT = 10  # 秒，卸载时等待抓取写入线程结束的最长时间
+
+# 所有配置入口共享的API限流器
+DATA_RATE_LIMITER = f"{DOMAIN}_rate_limiter"  # hass.data 中的键
+RATE_LIMIT_PER_SECOND = 20  # 每秒补充的请求令牌数
+RATE_LIMIT_BURST = 40  # 允许的突发请求数
+
+# 错峰轮询
+CONF_POLL_JITTER = "poll_jitter"
+DEFAULT_POLL_JITTER = 0  # 秒，在设备固定相位之外附加的随机延迟上限
+
+# 推送模式（由本地中继通过 webhook 推送设备数据）
+CONF_PUSH = "push"
+PUSH_ACTIVE_SECONDS = 600  # 最近一次推送在此时间内视为推送正常，轮询降为对账频率
+PUSH_RECONCILE_INTERVAL = 300  # 秒，推送正常时的对账轮询间隔
+PUSH_RESERVED_KEYS = ("voice_messages", "contacts", "alarms")  # 状态推送中不接受的字段
+
+# 按需刷新服务
+SERVICE_REFRESH = "refresh"
+REFRESH_SECTIONS = ("status", "voice", "contacts", "alarms")
+REFRESH_MIN_SPACING = 10  # 秒，同一设备两次按需刷新之间的最短间隔
+
+# 配置流程与新条目之间共享的认证和验证数据
+DATA_CREDENTIALS = f"{DOMAIN}_credentials"  # hass.data 中按 appid 共享的 Token
+DATA_ONBOARDING = f"{DOMAIN}_onboarding"  # hass.data 中按 IMEI 暂存的验证时设备状态
+ONBOARDING_MAX_AGE = 60  # 秒，验证时获取的设备状态在此时间内可直接用于首次刷新（只使用一次）
+
+# 通知消息出站队列
+EVENT_NOTIFY_RESULT = "hxinwatch_notify_result"
+NOTIFY_COALESCE_SECONDS = 1.0  # 合并窗口内连续发送的文字消息合并为一条
+NOTIFY_RETRY_DELAYS = (2.0, 10.0, 30.0)  # 暂时性失败的重试间隔（秒）
+NOTIFY_MAX_PENDING = 50  # 每台设备最多排队的消息数
+NOTIFY_MAX_TEXT_LENGTH = 500  # 合并后单条文字消息的最大长度
+
+# 历史数据导出
+EXPORT_DIRECTORY = "hxinwatch_exports"  # 位于配置目录下
+EXPORT_CHUNK_HOURS = 6  # 每次从 recorder 查询的时间段长度
+EXPORT_FORMATS = ("csv", "jsonl")
+
+# 刷新周期性能分析
+SERVICE_PROFILE = "profile"
+EVENT_PROFILE_COMPLETE = "hxinwatch_profile_complete"
+DATA_PROFILER = f"{DOMAIN}_profiler"  # hass.data 中正在进行的分析会话
+PROFILE_DIRECTORY = "hxinwatch_profiles"  # 位于配置目录下
+PROFILE_FORMATS = ("pstats", "collapsed")
+PROFILE_MAX_CYCLES = 20
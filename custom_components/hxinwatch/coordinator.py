@@ -2,53 +2,321 @@
 from __future__ import annotations
 
 import logging
+import random
+import time
+import zlib
 from datetime import timedelta
+from typing import Any, Awaitable, Callable
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
 
 from .api import HXinWatchAPI
-from .const import DOMAIN, DEFAULT_SCAN_INTERVAL
+from .logs import Payload
+from .schema import (
+    ALARMS_ENDPOINT,
+    CHATS_ENDPOINT,
+    CONTACTS_ENDPOINT,
+    SchemaError,
+    normalize_list,
+    normalize_status,
+)
+from .const import (
+    DOMAIN,
+    PUSH_ACTIVE_SECONDS,
+    PUSH_RECONCILE_INTERVAL,
+    REFRESH_MIN_SPACING,
+    REFRESH_SECTIONS,
+    SNAPSHOT_SAVE_DELAY,
+    SNAPSHOT_STORAGE_VERSION,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
 
-async def async_setup_coordinator(hass: HomeAssistant, entry: ConfigEntry) -> DataUpdateCoordinator:
-    """设置数据协调器。"""
-    # 创建API客户端
-    api = HXinWatchAPI(
-        token=entry.data["token"],
-        imei=entry.data["imei"],
-        language=entry.data.get("language", "zh-Hans"),
-    )
-    
-    async def async_update_data():
+def poll_phase(imei: str, interval: float) -> float:
+    """设备在刷新周期内的固定相位偏移（秒）。
+
+    由 IMEI 的哈希决定，重启后保持不变，且在多台设备之间近似均匀分布。
+    """
+    return zlib.crc32(imei.encode("utf-8")) / 2**32 * interval
+
+
+# 协调器数据中的列表分区：数据键 -> 对应接口
+LIST_SECTIONS = {
+    "voice_messages": CHATS_ENDPOINT,
+    "contacts": CONTACTS_ENDPOINT,
+    "alarms": ALARMS_ENDPOINT,
+}
+
+
+def normalize_payload(payload: dict[str, Any]) -> dict[str, Any]:
+    """规范化完整的协调器数据（例如旧版本保存的快照），结构不合法时抛出 SchemaError。"""
+    full_data, _errors = normalize_status(payload.get("data") or {})
+    for key, endpoint in LIST_SECTIONS.items():
+        full_data[key] = normalize_list(endpoint, full_data.get(key))
+    return {**payload, "data": full_data}
+
+
+def _summary(full_data: dict[str, Any]) -> dict[str, Any]:
+    """刷新摘要中记录的数据：各项读数以及列表的条数。"""
+    location = full_data["location"]
+    return {
+        "battery": full_data["info"]["battery"],
+        "heart": full_data["heart"]["heart"],
+        "oxygen": full_data["oxygen"]["oxygen"],
+        "temperature": full_data["temperature"]["temperature"],
+        "step": full_data["sport"]["step"],
+        "located": location["latitude"] is not None and location["longitude"] is not None,
+        **{key: len(full_data[key]) for key in LIST_SECTIONS},
+    }
+
+
+def snapshot_store(hass: HomeAssistant, entry_id: str) -> Store:
+    """返回保存配置入口最近一次有效数据的存储。"""
+    return Store(hass, SNAPSHOT_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.snapshot")
+
+
+class HXinWatchDataUpdateCoordinator(DataUpdateCoordinator):
+    """HXinWatch设备的数据协调器，负责轮询云端并持久化最近一次有效数据。"""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        api: HXinWatchAPI,
+        update_interval: timedelta,
+        jitter: float = 0,
+    ) -> None:
+        """初始化协调器。"""
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=f"{DOMAIN}_{entry.data['imei']}",
+            update_interval=update_interval,
+        )
+        self.api = api
+        self.log = api.log  # 本设备的日志记录器，见 logs.py
+        self._store = snapshot_store(hass, entry.entry_id)
+        self._unsaved_snapshot: dict[str, Any] | None = None  # 等待延迟写入的快照
+        self.poll_interval = update_interval.total_seconds()
+        self.poll_phase = poll_phase(entry.data["imei"], self.poll_interval)
+        self.poll_jitter = jitter
+        self.last_push: float | None = None  # 最近一次收到推送的单调时间
+        # 按需刷新：待刷新的分区，以及最近一次开始获取的分区和时间
+        self._pending_sections: set[str] = set()
+        self._fetched_sections: set[str] = set()
+        self._fetched_at = float("-inf")
+        self._sections_debouncer = Debouncer(
+            hass,
+            _LOGGER,
+            cooldown=REFRESH_MIN_SPACING,
+            immediate=True,
+            function=self._async_refresh_sections,
+        )
+
+    @property
+    def push_active(self) -> bool:
+        """最近是否持续收到推送。"""
+        return self.last_push is not None and time.monotonic() - self.last_push < PUSH_ACTIVE_SECONDS
+
+    def schedule_next_slot(self) -> None:
+        """把下一次定时刷新对齐到本设备的相位上，使多台设备的请求在周期内错开。
+
+        相位以系统时间为基准，每次刷新（无论成功与否）后重新计算，
+        因此手动刷新或刷新耗时不会让设备逐渐偏离自己的时间槽。
+        推送正常时改用较长的对账间隔，相位按比例换算。
+        """
+        interval = self.poll_interval
+        phase = self.poll_phase
+        if self.push_active and PUSH_RECONCILE_INTERVAL > interval:
+            phase = phase / interval * PUSH_RECONCILE_INTERVAL
+            interval = PUSH_RECONCILE_INTERVAL
+        delay = (phase - time.time()) % interval
+        if delay < 1:
+            # 刚好在时间槽附近完成刷新时，顺延到下一个周期
+            delay += interval
+        if self.poll_jitter:
+            delay += random.uniform(0, self.poll_jitter)
+        self.update_interval = timedelta(seconds=delay)
+
+    def set_poll_settings(self, interval: float, jitter: float) -> None:
+        """实时调整刷新间隔和抖动，设备在周期中的相对相位保持不变。"""
+        self.poll_phase = self.poll_phase / self.poll_interval * interval
+        self.poll_interval = float(interval)
+        self.poll_jitter = jitter
+        self.schedule_next_slot()
+        if self._listeners:
+            # 重新安排已经在计时的下一次刷新
+            self._schedule_refresh()
+
+    async def async_restore_snapshot(self) -> bool:
+        """从存储中恢复上次的数据，成功时返回 True。"""
+        snapshot = await self._store.async_load()
+        if not snapshot or not snapshot.get("payload"):
+            return False
+        try:
+            payload = normalize_payload(snapshot["payload"])
+        except SchemaError as error:
+            _LOGGER.warning("保存的快照结构不合法，改为从云端获取: %s", error)
+            return False
+        self.schedule_next_slot()
+        self.async_set_updated_data(payload)
+        _LOGGER.debug("已从 %s 保存的快照恢复设备数据。", snapshot.get("saved_at"))
+        return True
+
+    @callback
+    def async_apply_push(
+        self,
+        status: dict[str, Any] | None = None,
+        voice_messages: list[dict[str, Any]] | None = None,
+    ) -> None:
+        """把推送的状态分区或语音消息合并进当前数据，并立即通知实体。
+
+        推送的数据由 push.py 按 schema 校验和规范化。
+        """
+        current = self.data or normalize_payload({"msg": None, "code": 200, "data": {}})
+        full_data = dict(current["data"])
+        if status:
+            full_data.update(status)
+        if voice_messages is not None:
+            full_data["voice_messages"] = voice_messages
+        result = {**current, "data": full_data}
+        self.last_push = time.monotonic()
+        self.schedule_next_slot()
+        self.async_set_updated_data(result)
+        self._save_snapshot(result)
+
+    async def async_request_sections(self, sections: set[str]) -> None:
+        """请求立即刷新指定分区。
+
+        最短间隔内已经开始获取过的分区直接视为最新，不再请求；其余分区经防抖合并，
+        空闲时立即获取，否则在间隔结束时合并为一次获取。
+        """
+        if (
+            time.monotonic() - self._fetched_at < REFRESH_MIN_SPACING
+            and sections <= self._fetched_sections
+        ):
+            _LOGGER.debug("分区 %s 刚刚刷新过，忽略本次按需刷新。", sorted(sections))
+            return
+        self._pending_sections |= sections
+        await self._sections_debouncer.async_call()
+
+    def _mark_fetched(self, sections: set[str]) -> None:
+        self._fetched_sections = sections
+        self._fetched_at = time.monotonic()
+
+    async def _async_refresh_sections(self) -> None:
+        sections, self._pending_sections = self._pending_sections, set()
+        if not sections:
+            return
+        if self.data is None or sections >= set(REFRESH_SECTIONS):
+            self.api.invalidate_cache()
+            await self.async_refresh()
+            return
+
+        self._mark_fetched(sections)
+        api = self.api
+        result = dict(self.data)
+        full_data = dict(result["data"])
+        try:
+            if "status" in sections:
+                api.invalidate_cache("/related/main")
+                status = await api.async_get_device_status()
+                full_data.update(status["data"])
+                result["msg"] = status.get("msg")
+                result["code"] = status["code"]
+            for section, key, endpoint, fetch in (
+                ("voice", "voice_messages", "/chat/chats", api.async_get_voice_messages),
+                ("contacts", "contacts", "/device/config/contact", api.async_get_contacts),
+                ("alarms", "alarms", "/device/config/remind", api.async_get_alarms),
+            ):
+                if section in sections:
+                    api.invalidate_cache(endpoint)
+                    full_data[key] = await fetch()
+        except Exception as error:  # pylint: disable=broad-except
+            _LOGGER.error("按需刷新 %s 失败: %s", sorted(sections), error)
+            return
+
+        result["data"] = full_data
+        self.schedule_next_slot()
+        self.async_set_updated_data(result)
+        self._save_snapshot(result)
+
+    async def async_shutdown(self) -> None:
+        """停止协调器及按需刷新的防抖定时器，并立即写入尚未保存的快照。"""
+        await super().async_shutdown()
+        self._sections_debouncer.async_shutdown()
+        if self._unsaved_snapshot is not None:
+            # 同时移除 Store 的延迟写入定时器和 final_write 监听器，重新加载时不会累积
+            await self._store.async_save(self._snapshot_data())
+
+    def _snapshot_data(self) -> dict[str, Any]:
+        data = {"saved_at": dt_util.utcnow().isoformat(), "payload": self._unsaved_snapshot}
+        self._unsaved_snapshot = None
+        return data
+
+    def _save_snapshot(self, result: dict[str, Any]) -> None:
+        # 延迟合并写入，重启时用于立即恢复实体状态
+        self._unsaved_snapshot = result
+        self._store.async_delay_save(self._snapshot_data, SNAPSHOT_SAVE_DELAY)
+
+    async def _async_update_data(self) -> dict[str, Any]:
         """获取最新数据。"""
+        self._mark_fetched(set(REFRESH_SECTIONS))
+        started = time.perf_counter()
+        requests = self.api.metrics.total_requests
+        try:
+            result = await self._async_fetch()
+        finally:
+            # 刷新结束后协调器才会安排下一次定时刷新，此时更新间隔已指向下一个时间槽
+            self.schedule_next_slot()
+        # 每次刷新一条摘要，代替逐个属性输出完整数据
+        self.log.debug(
+            "refresh", "刷新完成，耗时 %.0f 毫秒，API 请求 %d 次，下次刷新在 %.0f 秒后: %s",
+            (time.perf_counter() - started) * 1000,
+            self.api.metrics.total_requests - requests,
+            self.update_interval.total_seconds(),
+            Payload(lambda: _summary(result["data"])),
+        )
+        return result
+
+    async def _async_fetch_list(
+        self, key: str, fetch: Callable[[], Awaitable[list[dict[str, Any]]]]
+    ) -> list[dict[str, Any]]:
+        """获取列表分区；结构不合法的列表被拒绝（已计入 API 统计），沿用上次的数据。"""
         try:
-            # 获取设备状态
+            return await fetch()
+        except SchemaError as error:
+            self.log.warning("schema", "%s，沿用上次获取的数据。", error)
+            return self.data["data"][key] if self.data else []
+
+    async def _async_fetch(self) -> dict[str, Any]:
+        api = self.api
+        try:
+            # 每个API方法内部会先调用 async_refresh_token_if_needed，
+            # 自动使用 appid 获取或刷新 token
             status = await api.async_get_device_status()
-            
-            # 获取最新语音消息
-            voice_messages = await api.async_get_voice_messages()
-            
-            # 将语音消息添加到状态数据中
-            status["voice_messages"] = voice_messages
-            
-            return status
+            voice_messages = await self._async_fetch_list("voice_messages", api.async_get_voice_messages)
+            contacts = await self._async_fetch_list("contacts", api.async_get_contacts)
+            alarms = await self._async_fetch_list("alarms", api.async_get_alarms)
+
+            full_data = status["data"]
+            full_data["voice_messages"] = voice_messages
+            full_data["contacts"] = contacts
+            full_data["alarms"] = alarms
         except Exception as error:
-            raise UpdateFailed(f"更新设备数据失败: {error}") from error
-    
-    # 创建数据协调器
-    coordinator = DataUpdateCoordinator(
-        hass,
-        _LOGGER,
-        name=f"{DOMAIN}_{entry.data['imei']}",
-        update_method=async_update_data,
-        update_interval=timedelta(seconds=DEFAULT_SCAN_INTERVAL),
-    )
-    
-    # 立即获取一次数据
-    await coordinator.async_config_entry_first_refresh()
-    
-    return coordinator    
\ No newline at end of file
+            self.log.error("refresh", "获取设备数据失败: %s", error)
+            raise UpdateFailed(f"获取设备数据失败: {error}") from error
+
+        result = {
+            "msg": status.get("msg"),
+            "code": status["code"],
+            "data": full_data,
+        }
+        self._save_snapshot(result)
+        return result
@@ -3,18 +3,27 @@
 from __future__ import annotations
 
 import logging
+import time
 
 from homeassistant.components.device_tracker import SourceType
 from homeassistant.components.device_tracker.config_entry import TrackerEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import (
     CoordinatorEntity,
     DataUpdateCoordinator,
 )
 
-from .const import DOMAIN
+from .const import (
+    DOMAIN,
+    CONF_MIN_DISTANCE,
+    CONF_MIN_PUBLISH_INTERVAL,
+    DEFAULT_MIN_DISTANCE,
+    DEFAULT_MIN_PUBLISH_INTERVAL,
+)
+from .geo import coerce_coordinates, haversine_distance
+from .options import entry_option
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -28,7 +37,11 @@ async def async_setup_entry(
     integration_data = hass.data[DOMAIN][entry.entry_id]
     coordinator = integration_data["coordinator"]
     
-    async_add_entities([HXinWatchDeviceTracker(coordinator, entry.unique_id)])
+    async_add_entities(
+        [
+            HXinWatchDeviceTracker(coordinator, entry)
+        ]
+    )
 
 
 class HXinWatchDeviceTracker(CoordinatorEntity, TrackerEntity):
@@ -40,10 +53,11 @@ class HXinWatchDeviceTracker(CoordinatorEntity, TrackerEntity):
     def __init__(
         self,
         coordinator: DataUpdateCoordinator,
-        device_id: str | None,
+        entry: ConfigEntry,
     ) -> None:
         """初始化HXinWatch设备追踪器。"""
         super().__init__(coordinator)
+        device_id = entry.unique_id
         self._attr_unique_id = f"{device_id}_location"
         self._attr_device_info = {
             "identifiers": {(DOMAIN, device_id)},
@@ -51,6 +65,42 @@ class HXinWatchDeviceTracker(CoordinatorEntity, TrackerEntity):
             "manufacturer": "华芯沃", # 修改这里
             "model": "Smart Watch",
         }
+        self._entry = entry
+        # 已发布的定位 (纬度, 经度, 地址) 及发布时间，抖动范围内的新定位不会替换它
+        self._fix: tuple[float, float, str | None] | None = None
+        self._fix_time = 0.0
+        self._update_fix()
+
+    def _update_fix(self) -> None:
+        """根据最新数据决定是否发布新的定位。"""
+        location = self.coordinator.data["data"]["location"]
+        coords = coerce_coordinates(location)
+        if coords is None:
+            return
+
+        now = time.monotonic()
+        if self._fix is not None:
+            # 过滤阈值每次读取，选项变更后立即生效
+            if now - self._fix_time < entry_option(
+                self._entry, CONF_MIN_PUBLISH_INTERVAL, DEFAULT_MIN_PUBLISH_INTERVAL
+            ):
+                return
+            min_distance = entry_option(self._entry, CONF_MIN_DISTANCE, DEFAULT_MIN_DISTANCE)
+            moved = haversine_distance(self._fix[0], self._fix[1], coords[0], coords[1])
+            if moved < min_distance:
+                self.coordinator.log.debug(
+                    "tracker", "设备追踪器位移 %.1f 米，小于阈值 %s 米，保持上次位置。", moved, min_distance
+                )
+                return
+
+        self._fix = (coords[0], coords[1], location["address"])
+        self._fix_time = now
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """处理协调器数据更新。"""
+        self._update_fix()
+        super()._handle_coordinator_update()
 
     @property
     def source_type(self) -> SourceType:
@@ -59,40 +109,25 @@ class HXinWatchDeviceTracker(CoordinatorEntity, TrackerEntity):
 
     @property
     def latitude(self) -> float | None:
-        """返回设备的纬度。"""
-        data = self.coordinator.data.get("data", {})
-        lat = data.get("location", {}).get("latitude")
-        _LOGGER.debug("设备追踪器纬度: %s, 原始数据: %s", lat, data)
-        return lat
+        """返回设备的纬度（已过滤抖动）。"""
+        return self._fix[0] if self._fix else None
 
     @property
     def longitude(self) -> float | None:
-        """返回设备的经度。"""
-        data = self.coordinator.data.get("data", {})
-        lon = data.get("location", {}).get("longitude")
-        _LOGGER.debug("设备追踪器经度: %s, 原始数据: %s", lon, data)
-        return lon
+        """返回设备的经度（已过滤抖动）。"""
+        return self._fix[1] if self._fix else None
 
     @property
     def name(self) -> str | None:
         """返回设备的名称。（这里将使用API返回的设备名称，如“安安”）"""
-        data = self.coordinator.data.get("data", {})
-        name = data.get("info", {}).get("name")
-        _LOGGER.debug("设备追踪器名称: %s, 原始数据: %s", name, data)
-        return name
+        return self.coordinator.data["data"]["info"]["name"]
 
     @property
     def location_name(self) -> str | None:
-        """返回设备的位置名称。"""
-        data = self.coordinator.data.get("data", {})
-        loc_name = data.get("location", {}).get("address")
-        _LOGGER.debug("设备追踪器位置名称: %s, 原始数据: %s", loc_name, data)
-        return loc_name
+        """返回设备的位置名称（与已发布的定位保持一致）。"""
+        return self._fix[2] if self._fix else None
 
     @property
     def battery_level(self) -> int | None:
         """返回设备的电池电量。"""
-        data = self.coordinator.data.get("data", {})
-        battery = data.get("info", {}).get("battery")
-        _LOGGER.debug("设备追踪器电池电量: %s, 原始数据: %s", battery, data)
-        return battery
\ No newline at end of file
+        return self.coordinator.data["data"]["info"]["battery"]
\ No newline at end of file
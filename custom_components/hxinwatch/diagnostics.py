@@ -0,0 +1,60 @@
+"""HXinWatch集成的诊断信息。"""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DATA_RATE_LIMITER, DOMAIN
+from .logs import REDACT_KEYS, REDACTED
+
+# 与日志使用相同的脱敏字段
+TO_REDACT = REDACT_KEYS
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """返回配置入口的诊断信息，条目未加载（例如设置失败）时只包含条目本身。"""
+    imei = entry.data.get("imei")
+    diagnostics: dict[str, Any] = {
+        "entry": {
+            # 默认标题包含 IMEI
+            "title": entry.title.replace(imei, REDACTED) if imei else entry.title,
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": async_redact_data(dict(entry.options), TO_REDACT),
+        },
+    }
+    integration_data = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+    if integration_data is None:
+        return diagnostics
+
+    coordinator = integration_data["coordinator"]
+    api = integration_data["api"]
+    capture = integration_data["capture"]
+    push = integration_data["push"]
+    rate_limiter = hass.data.get(DATA_RATE_LIMITER)
+
+    return {
+        **diagnostics,
+        "coordinator": {
+            "last_update_success": coordinator.last_update_success,
+            "update_interval": str(coordinator.update_interval),
+            "poll_interval_seconds": coordinator.poll_interval,
+            "poll_phase_seconds": round(coordinator.poll_phase, 3),
+            "data": async_redact_data(coordinator.data or {}, TO_REDACT),
+        },
+        "timings_seconds": {
+            phase: round(seconds, 4) for phase, seconds in integration_data["timings"].items()
+        },
+        "api_metrics": api.metrics.as_dict(),
+        "rate_limiter": rate_limiter.as_dict() if rate_limiter else None,
+        "aggregates": integration_data["aggregates"].as_dict(),
+        "alarm_schedule": integration_data["alarm_schedule"].as_dict(),
+        "capture": capture.as_dict() if capture else None,
+        "push": push.as_dict() if push else None,
+        "outbox": integration_data["outbox"].as_dict(),
+        "suppressed_logs": api.log.suppressed(),
+    }
@@ -0,0 +1,168 @@
+"""HXinWatch位置与健康历史数据的流式导出。
+
+历史数据来自 recorder 中本设备的设备追踪器和健康传感器状态。导出在 recorder 的线程池中执行：
+按固定时长分段查询，每段内各实体的状态按时间归并后逐行写入文件，
+内存占用只与单个时间段的数据量有关，与导出的总时间范围无关。
+"""
+from __future__ import annotations
+
+import csv
+from datetime import datetime, timedelta
+import heapq
+import json
+import logging
+import os
+from typing import Any, Iterator
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import STATE_UNAVAILABLE, STATE_UNKNOWN
+from homeassistant.core import HomeAssistant, State
+from homeassistant.helpers import entity_registry as er
+from homeassistant.util import dt as dt_util
+
+from .const import EXPORT_CHUNK_HOURS, EXPORT_DIRECTORY
+from .health import HEALTH_METRICS
+
+_LOGGER = logging.getLogger(__name__)
+
+EXPORT_FIELDS = ("time", "entity_id", "metric", "value", "latitude", "longitude", "gps_accuracy")
+METRIC_LOCATION = "location"
+
+# 分段查询的左边界向前放宽的秒数：recorder 按开区间查询，放宽后再按半开区间过滤，避免边界上的状态丢失
+_BOUNDARY_MARGIN = 1.0
+
+
+def export_entities(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, str]:
+    """返回配置入口中需要导出的实体：entity_id -> 指标名（location 或健康指标）。"""
+    metrics_by_unique_id = {f"{entry.unique_id}_{metric}": metric for metric in HEALTH_METRICS}
+    metrics_by_unique_id[f"{entry.unique_id}_location"] = METRIC_LOCATION
+    return {
+        registry_entry.entity_id: metrics_by_unique_id[registry_entry.unique_id]
+        for registry_entry in er.async_entries_for_config_entry(er.async_get(hass), entry.entry_id)
+        if registry_entry.unique_id in metrics_by_unique_id
+    }
+
+
+def _row(entity_id: str, metric: str, state: State) -> dict[str, Any] | None:
+    row: dict[str, Any] = {
+        "time": dt_util.as_local(state.last_updated).isoformat(),
+        "entity_id": entity_id,
+        "metric": metric,
+        "value": None,
+        "latitude": None,
+        "longitude": None,
+        "gps_accuracy": None,
+    }
+    if metric == METRIC_LOCATION:
+        attributes = state.attributes
+        if attributes.get("latitude") is None or attributes.get("longitude") is None:
+            return None
+        row["value"] = state.state
+        row["latitude"] = attributes["latitude"]
+        row["longitude"] = attributes["longitude"]
+        row["gps_accuracy"] = attributes.get("gps_accuracy")
+        return row
+    if state.state in (STATE_UNKNOWN, STATE_UNAVAILABLE):
+        return None
+    try:
+        row["value"] = float(state.state)
+    except ValueError:
+        return None
+    return row
+
+
+def _timeline(entity_id: str, states: list[State]) -> Iterator[tuple[datetime, str, State]]:
+    for state in states:
+        yield state.last_updated, entity_id, state
+
+
+def iter_history(
+    hass: HomeAssistant,
+    entities: dict[str, str],
+    start: datetime,
+    end: datetime,
+    chunk: timedelta,
+) -> Iterator[dict[str, Any]]:
+    """按时间顺序逐行产生历史数据，只能在 recorder 线程池中调用。"""
+    from homeassistant.components.recorder import history  # pylint: disable=import-outside-toplevel
+
+    margin = timedelta(seconds=_BOUNDARY_MARGIN)
+    cursor = start
+    while cursor < end:
+        chunk_end = min(cursor + chunk, end)
+        states = history.get_significant_states(
+            hass,
+            cursor - margin,
+            chunk_end,
+            list(entities),
+            include_start_time_state=False,
+            significant_changes_only=False,
+        )
+        streams = [
+            _timeline(entity_id, entity_states) for entity_id, entity_states in states.items()
+        ]
+        for last_updated, entity_id, state in heapq.merge(*streams, key=lambda item: item[0]):
+            if last_updated < cursor:
+                continue
+            row = _row(entity_id, entities[entity_id], state)
+            if row is not None:
+                yield row
+        # 查询下一段之前释放本段数据，内存中最多只有一个时间段的状态
+        del states, streams
+        cursor = chunk_end
+
+
+def _write_rows(path: str, export_format: str, rows: Iterator[dict[str, Any]]) -> int:
+    """把数据逐行写入临时文件，完成后替换为目标文件，返回行数。"""
+    temporary = f"{path}.part"
+    count = 0
+    try:
+        if export_format == "csv":
+            # 带 BOM，便于表格软件正确识别中文
+            with open(temporary, "w", encoding="utf-8-sig", newline="") as file:
+                writer = csv.DictWriter(file, fieldnames=EXPORT_FIELDS)
+                writer.writeheader()
+                for row in rows:
+                    writer.writerow(row)
+                    count += 1
+        else:
+            with open(temporary, "w", encoding="utf-8") as file:
+                for row in rows:
+                    file.write(json.dumps(row, ensure_ascii=False))
+                    file.write("\n")
+                    count += 1
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+    return count
+
+
+async def async_export_history(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    start: datetime,
+    end: datetime,
+    export_format: str,
+) -> dict[str, Any]:
+    """导出设备在 [start, end) 内的位置和健康历史，返回文件路径和行数。"""
+    from homeassistant.components.recorder import get_instance  # pylint: disable=import-outside-toplevel
+
+    entities = export_entities(hass, entry)
+    imei = entry.data["imei"]
+    start, end = dt_util.as_utc(start), dt_util.as_utc(end)
+    directory = hass.config.path(EXPORT_DIRECTORY)
+    path = os.path.join(
+        directory,
+        f"hxinwatch_{imei}_{dt_util.as_local(start):%Y%m%d%H%M%S}_{dt_util.as_local(end):%Y%m%d%H%M%S}.{export_format}",
+    )
+
+    def _export() -> int:
+        os.makedirs(directory, exist_ok=True)
+        rows = iter_history(hass, entities, start, end, timedelta(hours=EXPORT_CHUNK_HOURS))
+        return _write_rows(path, export_format, rows)
+
+    rows = await get_instance(hass).async_add_executor_job(_export)
+    _LOGGER.info("设备 %s 的历史数据已导出到 %s，共 %d 行。", imei, path, rows)
+    return {"path": path, "rows": rows, "entities": sorted(entities)}
@@ -0,0 +1,43 @@
+"""HXinWatch集成的地理计算辅助函数。"""
+from __future__ import annotations
+
+import math
+
+# 地球平均半径（米）
+EARTH_RADIUS_METERS = 6371008.8
+# 每纬度对应的米数，与 haversine_distance 使用同一地球半径，外接矩形不会比实际的圆小
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS_METERS / 180
+
+
+def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """计算两个经纬度之间的球面距离（米）。"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * math.asin(min(1.0, math.sqrt(a)))
+
+
+def meters_to_lon_degrees(meters: float, latitude: float) -> float:
+    """以给定纬度处为圆心、半径为 meters 米的球面圆，在东西方向覆盖的经度半宽。"""
+    # 圆上经度最大的点不在圆心所在纬线上，按球面公式计算；包含极点或高纬度时覆盖全部经度
+    cos_lat = math.cos(math.radians(latitude))
+    ratio = math.sin(meters / EARTH_RADIUS_METERS) / cos_lat if cos_lat > 1e-9 else 2.0
+    if ratio >= 1:
+        return 180.0
+    return math.degrees(math.asin(ratio))
+
+
+def coerce_coordinates(location: dict | None) -> tuple[float, float] | None:
+    """从API返回的位置字典中提取 (纬度, 经度)，无效时返回 None。"""
+    if not location:
+        return None
+    try:
+        lat = float(location["latitude"])
+        lon = float(location["longitude"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if not (-90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0):
+        return None
+    return lat, lon
@@ -0,0 +1,227 @@
+"""HXinWatch集成的地理围栏引擎。"""
+from __future__ import annotations
+
+import logging
+import math
+from typing import Any, Iterable
+
+from homeassistant.const import ATTR_FRIENDLY_NAME, ATTR_LATITUDE, ATTR_LONGITUDE
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+
+from .const import (
+    EVENT_GEOFENCE,
+    GEOFENCE_GRID_CELL_DEGREES,
+    GEOFENCE_HYSTERESIS_METERS,
+    GEOFENCE_MAX_CELLS_PER_FENCE,
+)
+from .geo import coerce_coordinates, haversine_distance, meters_to_lon_degrees, METERS_PER_DEGREE
+
+_LOGGER = logging.getLogger(__name__)
+
+ZONE_DOMAIN = "zone"
+ATTR_RADIUS = "radius"
+
+
+class Geofence:
+    """单个圆形围栏，附带预计算的外接矩形。"""
+
+    __slots__ = (
+        "fence_id",
+        "name",
+        "latitude",
+        "longitude",
+        "radius",
+        "exit_radius",
+        "min_lat",
+        "max_lat",
+        "min_lon",
+        "max_lon",
+    )
+
+    def __init__(
+        self,
+        fence_id: str,
+        name: str,
+        latitude: float,
+        longitude: float,
+        radius: float,
+        hysteresis: float,
+    ) -> None:
+        """初始化围栏并计算外接矩形（按离开半径扩展）。"""
+        self.fence_id = fence_id
+        self.name = name
+        self.latitude = latitude
+        self.longitude = longitude
+        self.radius = radius
+        # 进入判定使用 radius，离开判定使用 radius + hysteresis，避免GPS抖动导致反复进出
+        self.exit_radius = radius + hysteresis
+        d_lat = self.exit_radius / METERS_PER_DEGREE
+        d_lon = meters_to_lon_degrees(self.exit_radius, latitude)
+        self.min_lat = latitude - d_lat
+        self.max_lat = latitude + d_lat
+        self.min_lon = longitude - d_lon
+        self.max_lon = longitude + d_lon
+
+    def contains_bbox(self, lat: float, lon: float) -> bool:
+        """判断点是否落在外接矩形内。"""
+        return self.min_lat <= lat <= self.max_lat and self.min_lon <= lon <= self.max_lon
+
+
+class GeofenceEngine:
+    """基于网格索引的围栏判定引擎。
+
+    每个围栏按外接矩形登记到覆盖的网格单元中，每次定位只需要检查
+    定位点所在单元中的围栏，加上当前已处于其中的围栏（用于离开判定）。
+    覆盖单元过多的超大围栏单独存放，每次都检查。
+    """
+
+    def __init__(
+        self,
+        fences: Iterable[Geofence],
+        cell_size: float = GEOFENCE_GRID_CELL_DEGREES,
+    ) -> None:
+        """构建网格索引。"""
+        self._cell_size = cell_size
+        self._fences: dict[str, Geofence] = {}
+        self._grid: dict[tuple[int, int], list[Geofence]] = {}
+        self._large: list[Geofence] = []
+
+        for fence in fences:
+            self._fences[fence.fence_id] = fence
+            row_min, col_min = self._cell(fence.min_lat, fence.min_lon)
+            row_max, col_max = self._cell(fence.max_lat, fence.max_lon)
+            if (row_max - row_min + 1) * (col_max - col_min + 1) > GEOFENCE_MAX_CELLS_PER_FENCE:
+                self._large.append(fence)
+                continue
+            for row in range(row_min, row_max + 1):
+                for col in range(col_min, col_max + 1):
+                    self._grid.setdefault((row, col), []).append(fence)
+
+    def __len__(self) -> int:
+        """返回围栏数量。"""
+        return len(self._fences)
+
+    def _cell(self, lat: float, lon: float) -> tuple[int, int]:
+        """返回经纬度所在的网格单元。"""
+        return math.floor(lat / self._cell_size), math.floor(lon / self._cell_size)
+
+    def evaluate(
+        self, lat: float, lon: float, inside: set[str]
+    ) -> tuple[set[str], list[tuple[str, Geofence, float]]]:
+        """根据新的定位点计算所在围栏集合及进出事件。
+
+        返回 (新的所在围栏ID集合, [(事件类型, 围栏, 距离米), ...])。
+        """
+        now_inside: set[str] = set()
+        transitions: list[tuple[str, Geofence, float]] = []
+
+        candidates = self._grid.get(self._cell(lat, lon), [])
+        for fence in (*candidates, *self._large):
+            if not fence.contains_bbox(lat, lon):
+                continue
+            distance = haversine_distance(lat, lon, fence.latitude, fence.longitude)
+            if fence.fence_id in inside:
+                if distance <= fence.exit_radius:
+                    now_inside.add(fence.fence_id)
+            elif distance <= fence.radius:
+                now_inside.add(fence.fence_id)
+                transitions.append(("enter", fence, distance))
+
+        for fence_id in inside:
+            if fence_id in now_inside:
+                continue
+            fence = self._fences.get(fence_id)
+            if fence is None:
+                # 围栏已被删除，不再产生离开事件
+                continue
+            distance = haversine_distance(lat, lon, fence.latitude, fence.longitude)
+            transitions.append(("exit", fence, distance))
+
+        return now_inside, transitions
+
+
+def build_fences_from_zones(
+    hass: HomeAssistant, hysteresis: float = GEOFENCE_HYSTERESIS_METERS
+) -> list[Geofence]:
+    """根据 Home Assistant 中的 zone 实体构建围栏列表。"""
+    fences = []
+    for state in hass.states.async_all(ZONE_DOMAIN):
+        try:
+            lat = float(state.attributes[ATTR_LATITUDE])
+            lon = float(state.attributes[ATTR_LONGITUDE])
+            radius = float(state.attributes.get(ATTR_RADIUS, 0))
+        except (KeyError, TypeError, ValueError):
+            _LOGGER.debug("区域 %s 缺少有效的坐标或半径，跳过。", state.entity_id)
+            continue
+        fences.append(
+            Geofence(
+                state.entity_id,
+                state.attributes.get(ATTR_FRIENDLY_NAME, state.entity_id),
+                lat,
+                lon,
+                radius,
+                hysteresis,
+            )
+        )
+    return fences
+
+
+class GeofenceMonitor:
+    """将协调器的定位更新送入围栏引擎，并触发进出事件。"""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        coordinator: DataUpdateCoordinator,
+        entry_id: str,
+        imei: str,
+    ) -> None:
+        """初始化围栏监控。"""
+        self._hass = hass
+        self._coordinator = coordinator
+        self._entry_id = entry_id
+        self._imei = imei
+        self._engine: GeofenceEngine | None = None
+        self._inside: set[str] = set()
+        self._last_fix: tuple[float, float] | None = None
+        self._seeded = False
+
+    @callback
+    def async_handle_state_changed(self, event: Event) -> None:
+        """区域实体变化时，标记引擎需要重建（只订阅 zone 域的状态变化）。"""
+        self._engine = None
+
+    @callback
+    def async_handle_update(self) -> None:
+        """处理协调器的数据更新。"""
+        data = (self._coordinator.data or {}).get("data") or {}
+        fix = coerce_coordinates(data.get("location"))
+        if fix is None or fix == self._last_fix:
+            return
+        self._last_fix = fix
+
+        if self._engine is None:
+            self._engine = GeofenceEngine(build_fences_from_zones(self._hass))
+            _LOGGER.debug("设备 %s 的地理围栏索引已重建，共 %d 个围栏。", self._imei, len(self._engine))
+
+        self._inside, transitions = self._engine.evaluate(fix[0], fix[1], self._inside)
+
+        # 首次定位只建立初始状态，不触发事件
+        if not self._seeded:
+            self._seeded = True
+            return
+
+        for event_type, fence, distance in transitions:
+            event_data: dict[str, Any] = {
+                "entry_id": self._entry_id,
+                "imei": self._imei,
+                "event": event_type,
+                "zone": fence.fence_id,
+                "zone_name": fence.name,
+                "latitude": fix[0],
+                "longitude": fix[1],
+                "distance": round(distance, 1),
+            }
+            _LOGGER.debug("设备 %s %s 围栏 %s", self._imei, event_type, fence.fence_id)
+            self._hass.bus.async_fire(EVENT_GEOFENCE, event_data)
@@ -0,0 +1,275 @@
+"""HXinWatch集成的健康数据采样与长期统计导入。"""
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    HEALTH_STORAGE_VERSION,
+    SENSOR_TYPE_HEART_RATE,
+    SENSOR_TYPE_OXYGEN,
+    SENSOR_TYPE_STEPS,
+    SENSOR_TYPE_TEMPERATURE,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# 健康指标: (API 数据段, 字段, 单位, 名称)
+HEALTH_METRICS: dict[str, tuple[str, str, str, str]] = {
+    SENSOR_TYPE_HEART_RATE: ("heart", "heart", "BPM", "心率"),
+    SENSOR_TYPE_OXYGEN: ("oxygen", "oxygen", "%", "血氧饱和度"),
+    SENSOR_TYPE_TEMPERATURE: ("temperature", "temperature", "°C", "体温"),
+    SENSOR_TYPE_STEPS: ("sport", "step", "steps", "步数"),
+}
+
+# 数据段中可能携带测量时间的字段，按优先级排列
+_TIMESTAMP_KEYS = ("time", "create_time", "createtime", "update_time", "updatetime", "timestamp")
+
+
+def _parse_timestamp(value: Any) -> datetime | None:
+    """将API中的测量时间（毫秒/秒时间戳或日期字符串）解析为UTC时间。"""
+    if value in (None, ""):
+        return None
+    if isinstance(value, (int, float)) or (isinstance(value, str) and value.isdigit()):
+        seconds = float(value)
+        if seconds > 1e11:  # 毫秒时间戳
+            seconds /= 1000
+        return dt_util.utc_from_timestamp(seconds)
+    if isinstance(value, str):
+        parsed = dt_util.parse_datetime(value)
+        if parsed is None:
+            return None
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE)
+        return dt_util.as_utc(parsed)
+    return None
+
+
+def extract_health_samples(
+    data: dict[str, Any], fallback_time: datetime | None
+) -> list[tuple[str, datetime | None, float]]:
+    """从 /related/main 的 data 中提取健康采样 (指标, 测量时间, 数值)。
+
+    数据段中没有测量时间时使用 fallback_time（可以为 None）。
+    """
+    samples = []
+    for metric, (section_key, field, _unit, _name) in HEALTH_METRICS.items():
+        section = data.get(section_key)
+        if not isinstance(section, dict):
+            continue
+        try:
+            value = float(section[field])
+        except (KeyError, TypeError, ValueError):
+            continue
+        measured_at = None
+        for key in _TIMESTAMP_KEYS:
+            if key in section:
+                measured_at = _parse_timestamp(section[key])
+                break
+        samples.append((metric, measured_at or fallback_time, value))
+    return samples
+
+
+class _HourBucket:
+    """单个小时内的聚合值。"""
+
+    __slots__ = ("total", "count", "min", "max")
+
+    def __init__(self, value: float) -> None:
+        self.total = value
+        self.count = 1
+        self.min = value
+        self.max = value
+
+    @classmethod
+    def from_list(cls, values: list[float]) -> _HourBucket:
+        """从存储的 [total, count, min, max] 恢复。"""
+        bucket = cls(values[2])
+        bucket.total, bucket.count, bucket.min, bucket.max = values[0], int(values[1]), values[2], values[3]
+        return bucket
+
+    def as_list(self) -> list[float]:
+        """返回用于存储的 [total, count, min, max]。"""
+        return [self.total, self.count, self.min, self.max]
+
+    def add(self, value: float) -> None:
+        self.total += value
+        self.count += 1
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+
+def health_store(hass: HomeAssistant, entry_id: str) -> Store:
+    """返回保存配置入口未结束小时聚合和去重状态的存储。"""
+    return Store(hass, HEALTH_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.health")
+
+
+class HealthStatisticsImporter:
+    """把健康采样按小时聚合后批量导入 Home Assistant 长期统计。
+
+    每个指标只接受测量时间晚于上一次采样的数据，重复轮询到同一次测量不会重复计数；
+    数据段中没有测量时间时，只有数值变化才视为新的测量。
+    聚合结果定期批量写入；当前小时每次都会覆盖写入，已结束的小时写入后即丢弃，之后不再接受该小时的采样。
+    统计按小时覆盖写入，因此每次导入后都把未结束小时的聚合和去重状态保存到存储中，
+    重启后先恢复再继续累计，不会用只含重启后采样的聚合覆盖已导入的整小时数据。
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        coordinator: DataUpdateCoordinator,
+        imei: str,
+        store: Store,
+    ) -> None:
+        """初始化统计导入器。"""
+        self._hass = hass
+        self._coordinator = coordinator
+        self._imei = imei
+        self._store = store
+        self._buckets: dict[str, dict[datetime, _HourBucket]] = {}
+        self._last_measured: dict[str, datetime] = {}
+        self._last_value: dict[str, float] = {}  # 没有测量时间的指标最近一次接受的数值
+        self._closed_before: datetime | None = None  # 此前的小时已经导入完毕
+        self._dirty = False
+        self._unsaved = False
+
+    async def async_load(self) -> None:
+        """从存储中恢复未结束小时的聚合和去重状态，应在处理第一次数据更新之前调用。"""
+        stored = await self._store.async_load()
+        if not stored:
+            return
+        parse = dt_util.parse_datetime
+        self._last_measured = {
+            metric: parsed
+            for metric, value in stored.get("last_measured", {}).items()
+            if metric in HEALTH_METRICS and (parsed := parse(value)) is not None
+        }
+        self._last_value = {
+            metric: value for metric, value in stored.get("last_value", {}).items() if metric in HEALTH_METRICS
+        }
+        if stored.get("closed_before"):
+            self._closed_before = parse(stored["closed_before"])
+        self._buckets = {
+            metric: {
+                parsed: _HourBucket.from_list(values)
+                for hour, values in buckets.items()
+                if (parsed := parse(hour)) is not None
+            }
+            for metric, buckets in stored.get("buckets", {}).items()
+            if metric in HEALTH_METRICS
+        }
+        self._dirty = any(self._buckets.values())
+
+    def statistic_id(self, metric: str) -> str:
+        """返回指标对应的外部统计ID。"""
+        return f"{DOMAIN}:{self._imei}_{metric}".lower()
+
+    @callback
+    def async_handle_update(self) -> None:
+        """处理协调器的数据更新，记录新的采样。"""
+        data = (self._coordinator.data or {}).get("data") or {}
+        now = dt_util.utcnow()
+        for metric, measured_at, value in extract_health_samples(data, None):
+            last = self._last_measured.get(metric)
+            if measured_at is None:
+                # 没有测量时间：数值不变视为同一次测量，否则按收到的时间计入
+                if self._last_value.get(metric) == value:
+                    continue
+                measured_at = now if last is None or now > last else last
+            elif last is not None and measured_at <= last:
+                continue
+            self._last_measured[metric] = measured_at
+            self._last_value[metric] = value
+            self._unsaved = True
+            hour = measured_at.replace(minute=0, second=0, microsecond=0)
+            if self._closed_before is not None and hour < self._closed_before:
+                # 该小时已经导入完毕，再次导入会用部分数据覆盖整小时的统计
+                _LOGGER.debug("设备 %s 的 %s 采样属于已导入的小时 %s，忽略。", self._imei, metric, hour)
+                continue
+            buckets = self._buckets.setdefault(metric, {})
+            bucket = buckets.get(hour)
+            if bucket is None:
+                buckets[hour] = _HourBucket(value)
+            else:
+                bucket.add(value)
+            self._dirty = True
+
+    async def async_shutdown(self) -> None:
+        """卸载时导入待写入的聚合，并立即保存状态。"""
+        self.async_flush()
+        if self._unsaved:
+            await self._store.async_save(self._stored_data())
+
+    def _stored_data(self) -> dict[str, Any]:
+        self._unsaved = False
+        return {
+            "last_measured": {metric: value.isoformat() for metric, value in self._last_measured.items()},
+            "last_value": dict(self._last_value),
+            "closed_before": self._closed_before.isoformat() if self._closed_before else None,
+            "buckets": {
+                metric: {hour.isoformat(): bucket.as_list() for hour, bucket in buckets.items()}
+                for metric, buckets in self._buckets.items()
+                if buckets
+            },
+        }
+
+    @callback
+    def async_flush(self, now: datetime | None = None) -> None:
+        """把待写入的小时聚合批量导入长期统计，并保存导入后的状态。"""
+        if not self._dirty:
+            if self._unsaved:
+                self._store.async_delay_save(self._stored_data)
+            return
+        if "recorder" not in self._hass.config.components:
+            _LOGGER.debug("recorder 未加载，跳过健康数据统计导入。")
+            self._buckets.clear()
+            self._dirty = False
+            self._store.async_delay_save(self._stored_data)
+            return
+
+        from homeassistant.components.recorder.statistics import (  # pylint: disable=import-outside-toplevel
+            async_add_external_statistics,
+        )
+
+        current_hour = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+        for metric, buckets in self._buckets.items():
+            if not buckets:
+                continue
+            _section, _field, unit, name = HEALTH_METRICS[metric]
+            metadata = {
+                "has_mean": True,
+                "has_sum": False,
+                "name": f"{self._imei} {name}",
+                "source": DOMAIN,
+                "statistic_id": self.statistic_id(metric),
+                "unit_of_measurement": unit,
+            }
+            statistics = [
+                {
+                    "start": hour,
+                    "mean": bucket.total / bucket.count,
+                    "min": bucket.min,
+                    "max": bucket.max,
+                }
+                for hour, bucket in sorted(buckets.items())
+            ]
+            async_add_external_statistics(self._hass, metadata, statistics)
+            # 已结束的小时不会再有新采样，写入后丢弃
+            for hour in [hour for hour in buckets if hour < current_hour]:
+                del buckets[hour]
+
+        self._closed_before = current_hour
+        self._dirty = False
+        # 保存的状态与已导入的数据一致，重启后在此基础上继续累计
+        self._store.async_delay_save(self._stored_data)
+        _LOGGER.debug("设备 %s 的健康统计已批量导入。", self._imei)
+
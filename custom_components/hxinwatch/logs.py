@@ -0,0 +1,162 @@
+"""HXinWatch集成的设备日志（不依赖 Home Assistant）。
+
+每台设备一个子记录器 ``custom_components.hxinwatch.device.<IMEI>``，可以只为一台设备开启调试日志：
+
+    logger:
+      logs:
+        custom_components.hxinwatch.device.860000000000001: debug
+
+每条日志属于一个类别（刷新摘要、API 请求、推送等）。调试和信息日志按类别 1/N 采样并受每个类别的
+令牌桶限速，超出的日志只计数，在该类别下一条输出的日志中报告被抑制的条数。警告和错误日志总是输出
+（同样消耗令牌，并附带此前被抑制的条数），不会因采样或限速隐藏真实的故障。日志参数中的数据用 Payload
+包装，只有在日志真正输出时才脱敏并截断为 JSON；级别未开启时只有一次 isEnabledFor 检查。
+"""
+from __future__ import annotations
+
+import json
+import logging
+import time
+from typing import Any, Callable, Dict, Tuple
+
+# 日志和诊断信息中需要脱敏的字段
+REDACT_KEYS = frozenset(
+    {"appid", "imei", "token", "phone", "latitude", "longitude", "address", "webhook_id"}
+)
+REDACTED = "**REDACTED**"
+MAX_PAYLOAD_CHARS = 500  # Payload 渲染后的最大长度
+
+# 日志类别: (每分钟条数, 突发条数, 调试日志采样间隔 N，即每 N 条输出 1 条)
+LOG_CATEGORIES: Dict[str, Tuple[float, int, int]] = {
+    "refresh": (30, 10, 1),  # 每次刷新一条摘要
+    "api": (20, 10, 1),  # 单个请求的响应和错误
+    "schema": (10, 5, 1),  # 响应结构错误
+    "push": (30, 10, 1),  # 推送的接受和拒绝
+    "tracker": (10, 5, 10),  # 设备追踪器的定位过滤
+}
+
+_ROOT_LOGGER = __name__.rpartition(".")[0]
+
+
+def redact(value: Any) -> Any:
+    """返回脱敏后的副本：REDACT_KEYS 中的字段替换为占位符。"""
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if key in REDACT_KEYS and item is not None else redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    return value
+
+
+class Payload:
+    """延迟渲染的日志参数：日志输出时才脱敏并序列化为 JSON，超长部分截断。
+
+    value 可以是返回数据的无参函数，构造数据本身的开销也只在输出时产生。
+    """
+
+    __slots__ = ("_value", "_limit")
+
+    def __init__(self, value: Any, limit: int = MAX_PAYLOAD_CHARS) -> None:
+        """包装要记录的数据。"""
+        self._value = value
+        self._limit = limit
+
+    def __str__(self) -> str:
+        """渲染为脱敏、截断后的 JSON。"""
+        value = self._value() if callable(self._value) else self._value
+        text = json.dumps(redact(value), ensure_ascii=False, default=str, separators=(",", ":"))
+        if len(text) > self._limit:
+            return f"{text[:self._limit]}…（共 {len(text)} 字符）"
+        return text
+
+    __repr__ = __str__
+
+
+class _Budget:
+    """单个类别的采样计数和令牌桶。"""
+
+    __slots__ = ("rate", "burst", "sample_every", "tokens", "updated", "seen", "suppressed")
+
+    def __init__(self, per_minute: float, burst: int, sample_every: int, now: float) -> None:
+        self.rate = per_minute / 60
+        self.burst = burst
+        self.sample_every = sample_every
+        self.tokens = float(burst)
+        self.updated = now
+        self.seen = 0
+        self.suppressed = 0
+
+
+class DeviceLogger:
+    """单台设备的日志记录器，按类别采样和限速。"""
+
+    def __init__(
+        self,
+        imei: str,
+        categories: Dict[str, Tuple[float, int, int]] = LOG_CATEGORIES,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """初始化记录器，categories 为各类别的 (每分钟条数, 突发条数, 采样间隔)。"""
+        self.logger = logging.getLogger(f"{_ROOT_LOGGER}.device.{imei}")
+        self._clock = clock
+        now = clock()
+        self._budgets = {
+            category: _Budget(per_minute, burst, sample_every, now)
+            for category, (per_minute, burst, sample_every) in categories.items()
+        }
+
+    def enabled(self, level: int = logging.DEBUG) -> bool:
+        """该级别的日志是否会输出。"""
+        return self.logger.isEnabledFor(level)
+
+    def debug(self, category: str, msg: str, *args: Any) -> None:
+        """记录调试日志。"""
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self._log(category, logging.DEBUG, msg, args)
+
+    def info(self, category: str, msg: str, *args: Any) -> None:
+        """记录信息日志。"""
+        if self.logger.isEnabledFor(logging.INFO):
+            self._log(category, logging.INFO, msg, args)
+
+    def warning(self, category: str, msg: str, *args: Any) -> None:
+        """记录警告日志。"""
+        if self.logger.isEnabledFor(logging.WARNING):
+            self._log(category, logging.WARNING, msg, args)
+
+    def error(self, category: str, msg: str, *args: Any) -> None:
+        """记录错误日志。"""
+        if self.logger.isEnabledFor(logging.ERROR):
+            self._log(category, logging.ERROR, msg, args)
+
+    def suppressed(self) -> Dict[str, int]:
+        """各类别当前被抑制、尚未报告的日志条数。"""
+        return {
+            category: budget.suppressed
+            for category, budget in self._budgets.items()
+            if budget.suppressed
+        }
+
+    def _log(self, category: str, level: int, msg: str, args: Tuple[Any, ...]) -> None:
+        budget = self._budgets[category]
+        limited = level < logging.WARNING
+        if limited and budget.sample_every > 1:
+            budget.seen += 1
+            if budget.seen % budget.sample_every != 1:
+                budget.suppressed += 1
+                return
+        now = self._clock()
+        budget.tokens = min(budget.burst, budget.tokens + (now - budget.updated) * budget.rate)
+        budget.updated = now
+        if budget.tokens < 1:
+            if limited:
+                budget.suppressed += 1
+                return
+        else:
+            budget.tokens -= 1
+        if budget.suppressed:
+            msg = f"{msg}（此前另有 %d 条同类日志被抑制）"
+            args = (*args, budget.suppressed)
+            budget.suppressed = 0
+        self.logger.log(level, msg, *args)
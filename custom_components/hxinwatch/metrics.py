@@ -0,0 +1,159 @@
+"""HXinWatch API 请求的轻量级统计（不依赖 Home Assistant）。"""
+from __future__ import annotations
+
+import bisect
+from typing import Any, Dict, Optional
+
+# 延迟直方图的桶上界（毫秒），最后一个桶收纳所有更慢的请求
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class LatencyHistogram:
+    """固定分桶的延迟直方图，记录为 O(log b)，分位数按桶内线性插值估算。"""
+
+    __slots__ = ("counts", "total", "sum_ms", "max_ms")
+
+    def __init__(self) -> None:
+        """初始化直方图。"""
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, value_ms: float) -> None:
+        """记录一次耗时。"""
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS_MS, value_ms)] += 1
+        self.total += 1
+        self.sum_ms += value_ms
+        if value_ms > self.max_ms:
+            self.max_ms = value_ms
+
+    def percentile(self, quantile: float) -> Optional[float]:
+        """估算分位数（毫秒）。"""
+        if not self.total:
+            return None
+        rank = quantile * self.total
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if not count:
+                continue
+            if seen + count >= rank:
+                lower = LATENCY_BUCKETS_MS[index - 1] if index else 0.0
+                upper = LATENCY_BUCKETS_MS[index] if index < len(LATENCY_BUCKETS_MS) else self.max_ms
+                upper = min(upper, self.max_ms)
+                fraction = (rank - seen) / count
+                return round(lower + (upper - lower) * fraction, 1)
+            seen += count
+        return round(self.max_ms, 1)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """返回可序列化的摘要。"""
+        return {
+            "count": self.total,
+            "mean_ms": round(self.sum_ms / self.total, 1) if self.total else None,
+            "max_ms": round(self.max_ms, 1),
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+        }
+
+
+class EndpointStats:
+    """单个接口的请求计数、错误分类、延迟和流量。"""
+
+    __slots__ = (
+        "requests", "errors", "bytes_received", "latency", "cache_hits", "coalesced", "schema_errors",
+    )
+
+    def __init__(self) -> None:
+        """初始化统计。"""
+        self.requests = 0
+        self.errors: Dict[str, int] = {}
+        self.bytes_received = 0
+        self.latency = LatencyHistogram()
+        self.cache_hits = 0  # 由响应缓存直接返回、未发出请求的次数
+        self.coalesced = 0  # 合并到进行中的相同请求的次数
+        self.schema_errors: Dict[str, int] = {}  # 字段路径 -> 响应结构不合法的次数
+
+    def as_dict(self) -> Dict[str, Any]:
+        """返回可序列化的摘要。"""
+        return {
+            "requests": self.requests,
+            "errors": dict(self.errors),
+            "bytes_received": self.bytes_received,
+            "latency": self.latency.as_dict(),
+            "cache_hits": self.cache_hits,
+            "coalesced": self.coalesced,
+            "schema_errors": dict(self.schema_errors),
+        }
+
+
+class ApiMetrics:
+    """按接口路径汇总的 API 请求统计。"""
+
+    def __init__(self) -> None:
+        """初始化统计。"""
+        self.endpoints: Dict[str, EndpointStats] = {}
+        self.total_latency = LatencyHistogram()
+
+    def _stats(self, endpoint: str) -> EndpointStats:
+        stats = self.endpoints.get(endpoint)
+        if stats is None:
+            stats = self.endpoints[endpoint] = EndpointStats()
+        return stats
+
+    def record(
+        self,
+        endpoint: str,
+        elapsed_ms: float,
+        size: int = 0,
+        error: Optional[str] = None,
+    ) -> None:
+        """记录一次请求。"""
+        stats = self._stats(endpoint)
+        stats.requests += 1
+        stats.bytes_received += size
+        stats.latency.observe(elapsed_ms)
+        self.total_latency.observe(elapsed_ms)
+        if error is not None:
+            stats.errors[error] = stats.errors.get(error, 0) + 1
+
+    def record_cache_hit(self, endpoint: str) -> None:
+        """记录一次缓存命中。"""
+        self._stats(endpoint).cache_hits += 1
+
+    def record_coalesced(self, endpoint: str) -> None:
+        """记录一次合并到进行中请求的调用。"""
+        self._stats(endpoint).coalesced += 1
+
+    def record_schema_error(self, endpoint: str, path: str) -> None:
+        """记录一次响应结构错误。"""
+        errors = self._stats(endpoint).schema_errors
+        errors[path] = errors.get(path, 0) + 1
+
+    @property
+    def total_requests(self) -> int:
+        """所有接口的请求总数。"""
+        return self.total_latency.total
+
+    @property
+    def total_errors(self) -> int:
+        """所有接口的错误总数。"""
+        return sum(sum(stats.errors.values()) for stats in self.endpoints.values())
+
+    @property
+    def total_schema_errors(self) -> int:
+        """所有接口的响应结构错误总数。"""
+        return sum(sum(stats.schema_errors.values()) for stats in self.endpoints.values())
+
+    def as_dict(self) -> Dict[str, Any]:
+        """返回可序列化的摘要。"""
+        return {
+            "total_requests": self.total_requests,
+            "total_errors": self.total_errors,
+            "total_schema_errors": self.total_schema_errors,
+            "latency": self.total_latency.as_dict(),
+            "endpoints": {
+                endpoint: stats.as_dict() for endpoint, stats in sorted(self.endpoints.items())
+            },
+        }
@@ -7,14 +7,16 @@ from typing import Any
 
 from homeassistant.components.notify import (
     ATTR_DATA,
+    ATTR_TITLE,
     BaseNotificationService,
 )
+from homeassistant.components.notify.legacy import NOTIFY_SERVICES
 from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.typing import ConfigType, DiscoveryInfoType
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
 from .const import DOMAIN
-from .api import HXinWatchAPI
+from .outbound import MESSAGE_TEXT, MESSAGE_VOICE, OutboundQueueFull
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -27,44 +29,66 @@ async def async_get_service(
     if discovery_info is None or "entry_id" not in discovery_info:
         _LOGGER.error("无法获取配置入口ID，无法设置通知服务。")
         return None
-    
+
     entry_id = discovery_info["entry_id"]
-    entry = hass.config_entries.async_get_entry(entry_id)
-    
-    if not entry:
+    integration_data = hass.data.get(DOMAIN, {}).get(entry_id)
+    if integration_data is None:
         _LOGGER.error(f"找不到ID为 {entry_id} 的配置入口，无法设置通知服务。")
         return None
 
-    # 获取配置中的参数
-    imei = entry.data["imei"]
-    appid = entry.data["appid"] # 新增 appid 参数
-    language = entry.data.get("language", "zh-Hans")
+    service = HXinWatchNotificationService(hass, entry_id)
+    # 卸载配置入口时据此注销服务
+    integration_data["notify"] = service
+    return service
+
 
-    session = async_get_clientsession(hass) 
-    
-    # HXinWatchAPI 实例化时传入 appid
-    api = HXinWatchAPI(
-        imei=imei,
-        appid=appid,
-        language=language,
-        session=session,
-    )
-    
-    return HXinWatchNotificationService(api)
+async def async_unload_service(hass: HomeAssistant, service: BaseNotificationService) -> None:
+    """注销配置入口的通知服务，并从 notify 集成的服务列表中移除，避免重新加载后旧服务对象累积。"""
+    if hasattr(service, "registered_targets"):
+        # notify 集成调用 async_setup 之后才有已注册的服务
+        await service.async_unregister_services()
+    services = hass.data.get(NOTIFY_SERVICES, {}).get(DOMAIN)
+    if services and service in services:
+        services.remove(service)
 
 
 class HXinWatchNotificationService(BaseNotificationService):
-    """HXinWatch通知服务。"""
+    """HXinWatch通知服务。
+
+    消息交给配置入口的出站队列后立即返回，投递结果通过 hxinwatch_notify_result 事件报告。
+    每次发送时按 entry_id 查找当前的队列；配置入口卸载时服务随之注销。
+    """
 
-    def __init__(self, api) -> None:
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
         """初始化服务。"""
-        self.api = api
+        self.hass = hass
+        self._entry_id = entry_id
 
     async def async_send_message(self, message: str = "", **kwargs: Any) -> None:
-        """发送消息。"""
+        """发送消息。
+
+        默认发送文字消息，标题（如果有）作为第一行；data.type 为 voice 时发送 data.url 指向的语音文件。
+        """
         data = kwargs.get(ATTR_DATA) or {}
-        
-        _LOGGER.info("Sending message: %s with data: %s", message, data)
-        
-        # 实际实现中应替换为真实的API调用
-        # await self.api.async_send_message(message, data)
+        integration_data = self.hass.data.get(DOMAIN, {}).get(self._entry_id)
+        if integration_data is None:
+            raise HomeAssistantError("HXinWatch设备未加载，无法发送消息")
+
+        kind = data.get("type", MESSAGE_TEXT)
+        if kind == MESSAGE_VOICE:
+            content = data.get("url")
+            if not content:
+                raise HomeAssistantError("发送语音消息需要在 data 中提供 url")
+        elif kind == MESSAGE_TEXT:
+            title = kwargs.get(ATTR_TITLE)
+            content = f"{title}\n{message}" if title else message
+            if not content:
+                raise HomeAssistantError("消息内容不能为空")
+        else:
+            raise HomeAssistantError(f"不支持的消息类型: {kind}")
+
+        try:
+            message_id = integration_data["outbox"].enqueue(kind, content)
+        except OutboundQueueFull as err:
+            raise HomeAssistantError(str(err)) from err
+        _LOGGER.debug("消息 %s 已加入设备 %s 的发送队列。", message_id, self._entry_id)
@@ -0,0 +1,85 @@
+"""HXinWatch配置入口选项的读取与实时应用。"""
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    DOMAIN,
+    DEFAULT_SCAN_INTERVAL,
+    CONF_MIN_DISTANCE,
+    CONF_MIN_PUBLISH_INTERVAL,
+    DEFAULT_MIN_DISTANCE,
+    DEFAULT_MIN_PUBLISH_INTERVAL,
+    CONF_AGGREGATE_WINDOWS,
+    DEFAULT_AGGREGATE_WINDOWS,
+    CONF_CAPTURE,
+    CONF_POLL_JITTER,
+    DEFAULT_POLL_JITTER,
+    CONF_PUSH,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+CONF_SCAN_INTERVAL = "scan_interval"
+CONF_LANGUAGE = "language"
+
+# 可在选项中调整的配置项及其缺省值
+OPTION_DEFAULTS: dict[str, Any] = {
+    CONF_SCAN_INTERVAL: DEFAULT_SCAN_INTERVAL,
+    CONF_LANGUAGE: "zh-Hans",
+    CONF_MIN_DISTANCE: DEFAULT_MIN_DISTANCE,
+    CONF_MIN_PUBLISH_INTERVAL: DEFAULT_MIN_PUBLISH_INTERVAL,
+    CONF_POLL_JITTER: DEFAULT_POLL_JITTER,
+    CONF_AGGREGATE_WINDOWS: DEFAULT_AGGREGATE_WINDOWS,
+    CONF_PUSH: False,
+    CONF_CAPTURE: False,
+}
+
+# 这些选项会增删实体、webhook 或抓取文件，变更后需要重新加载配置入口；其余选项实时生效
+RELOAD_OPTIONS = {CONF_AGGREGATE_WINDOWS, CONF_PUSH, CONF_CAPTURE}
+
+
+def entry_option(entry: ConfigEntry, key: str, default: Any = None) -> Any:
+    """返回配置项的生效值：选项优先于创建条目时填写的配置。"""
+    if key in entry.options:
+        return entry.options[key]
+    return entry.data.get(key, OPTION_DEFAULTS.get(key, default))
+
+
+def effective_options(entry: ConfigEntry) -> dict[str, Any]:
+    """返回所有可调整配置项的生效值。"""
+    return {key: entry_option(entry, key) for key in OPTION_DEFAULTS}
+
+
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """配置入口更新时调用：把变更的选项应用到运行中的协调器和 API 客户端。
+
+    Token、响应缓存和实体状态都会保留；只有 RELOAD_OPTIONS 中的选项变化时才重新加载。
+    """
+    integration_data = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+    if integration_data is None:
+        return
+    applied = integration_data["options"]
+    current = effective_options(entry)
+    changed = {key for key, value in current.items() if applied.get(key) != value}
+    if not changed:
+        # 例如只更新了条目数据中的 webhook ID
+        return
+
+    if changed & RELOAD_OPTIONS:
+        _LOGGER.info("选项 %s 已变更，重新加载配置入口。", sorted(changed & RELOAD_OPTIONS))
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+
+    coordinator = integration_data["coordinator"]
+    if CONF_LANGUAGE in changed:
+        integration_data["api"].set_language(current[CONF_LANGUAGE])
+    if changed & {CONF_SCAN_INTERVAL, CONF_POLL_JITTER}:
+        coordinator.set_poll_settings(current[CONF_SCAN_INTERVAL], current[CONF_POLL_JITTER])
+    # 设备追踪器在每次更新时读取过滤阈值，无需额外处理
+    integration_data["options"] = current
+    _LOGGER.info("已实时应用选项: %s", sorted(changed))
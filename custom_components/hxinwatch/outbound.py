@@ -0,0 +1,184 @@
+"""发往设备的出站消息队列（不依赖 Home Assistant）。
+
+每台设备一个队列：短时间内连续发送的文字消息合并为一条，由后台任务按顺序投递，
+网络错误、超时和服务端 5xx/429 等暂时性失败按退避间隔重试，投递结果通过回调报告。
+"""
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+import itertools
+import logging
+from typing import Any, Awaitable, Callable, Optional
+
+import aiohttp
+
+_LOGGER = logging.getLogger(__name__)
+
+MESSAGE_TEXT = "text"
+MESSAGE_VOICE = "voice"
+
+# 视为暂时性失败、可以重试的 HTTP 状态码
+RETRY_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+
+class OutboundQueueFull(Exception):
+    """待发送的消息过多，拒绝新的消息。"""
+
+
+def is_transient(error: BaseException) -> bool:
+    """判断投递失败是否值得重试。"""
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status in RETRY_STATUSES
+    return isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError))
+
+
+class _Message:
+    __slots__ = ("message_id", "kind", "content")
+
+    def __init__(self, message_id: int, kind: str, content: str) -> None:
+        self.message_id = message_id
+        self.kind = kind
+        self.content = content
+
+
+class OutboundQueue:
+    """按顺序投递单台设备的消息，合并突发的文字消息并重试暂时性失败。"""
+
+    def __init__(
+        self,
+        send: Callable[[str, str], Awaitable[dict[str, Any]]],
+        on_result: Callable[[dict[str, Any]], None],
+        coalesce_window: float = 1.0,
+        retry_delays: tuple[float, ...] = (2.0, 10.0, 30.0),
+        max_pending: int = 50,
+        max_text_length: int = 500,
+    ) -> None:
+        """初始化队列。
+
+        send(kind, content) 负责实际发送，失败（包括业务错误）时抛出异常；on_result 在每批消息投递成功或最终失败后调用。
+        """
+        self._send = send
+        self._on_result = on_result
+        self.coalesce_window = coalesce_window
+        self.retry_delays = retry_delays
+        self.max_pending = max_pending
+        self.max_text_length = max_text_length
+        self._pending: deque[_Message] = deque()
+        self._ids = itertools.count(1)
+        self._worker: Optional[asyncio.Task] = None
+        self._closed = False
+        self._inflight: Optional[list[_Message]] = None  # 正在投递（含重试等待）的一批消息
+        self._attempts = 0  # 正在投递的一批已经尝试的次数
+        self.delivered = 0  # 成功投递的消息数（合并前）
+        self.failed = 0
+        self.sent = 0  # 实际发出的消息数（合并后）
+        self.retries = 0
+
+    @property
+    def pending(self) -> int:
+        """等待投递的消息数。"""
+        return len(self._pending)
+
+    def enqueue(self, kind: str, content: str) -> int:
+        """加入一条消息并立即返回消息编号，不等待投递。"""
+        if self._closed:
+            raise OutboundQueueFull("消息队列已关闭")
+        if len(self._pending) >= self.max_pending:
+            raise OutboundQueueFull(f"待发送消息已达上限 {self.max_pending} 条")
+        message = _Message(next(self._ids), kind, content)
+        self._pending.append(message)
+        if self._worker is None:
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+        return message.message_id
+
+    def _take_batch(self) -> list[_Message]:
+        """取出下一批消息：连续的文字消息在长度上限内合并，语音消息单独发送。"""
+        batch = [self._pending.popleft()]
+        if batch[0].kind != MESSAGE_TEXT:
+            return batch
+        length = len(batch[0].content)
+        while self._pending and self._pending[0].kind == MESSAGE_TEXT:
+            length += 1 + len(self._pending[0].content)
+            if length > self.max_text_length:
+                break
+            batch.append(self._pending.popleft())
+        return batch
+
+    async def _run(self) -> None:
+        try:
+            while self._pending:
+                # 等待一个合并窗口，收集同一时刻触发的多条通知
+                await asyncio.sleep(self.coalesce_window)
+                while self._pending:
+                    await self._deliver(self._take_batch())
+        finally:
+            self._worker = None
+
+    async def _deliver(self, batch: list[_Message]) -> None:
+        kind = batch[0].kind
+        content = "\n".join(message.content for message in batch)
+        self._inflight = batch
+        attempts = 0
+        error: Optional[str] = None
+        while True:
+            attempts += 1
+            self._attempts = attempts
+            try:
+                # 业务错误由 send 以异常（ApiError）抛出，重试不会成功，不属于暂时性失败
+                await self._send(kind, content)
+            except Exception as err:  # pylint: disable=broad-except
+                error = f"{type(err).__name__}: {err}"
+                if attempts > len(self.retry_delays) or not is_transient(err):
+                    break
+                delay = self.retry_delays[attempts - 1]
+                self.retries += 1
+                _LOGGER.debug("消息投递失败（%s），%.0f 秒后第 %d 次重试。", error, delay, attempts)
+                await asyncio.sleep(delay)
+                continue
+            error = None
+            break
+
+        self._inflight = None
+        self.sent += 1
+        if error is None:
+            self.delivered += len(batch)
+        else:
+            self.failed += len(batch)
+            _LOGGER.warning("消息 %s 投递失败: %s", [message.message_id for message in batch], error)
+        self._report(batch, attempts, error)
+
+    def _report(self, batch: list[_Message], attempts: int, error: Optional[str]) -> None:
+        self._on_result(
+            {
+                "message_ids": [message.message_id for message in batch],
+                "type": batch[0].kind,
+                "success": error is None,
+                "attempts": attempts,
+                "error": error,
+            }
+        )
+
+    def close(self) -> None:
+        """停止投递，正在投递和尚未发出的消息都报告为失败。"""
+        self._closed = True
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        if self._inflight is not None:
+            batch, self._inflight = self._inflight, None
+            self.failed += len(batch)
+            self._report(batch, self._attempts, "设备已卸载，消息投递被中断，可能未送达")
+        while self._pending:
+            self.failed += 1
+            self._report([self._pending.popleft()], 0, "设备已卸载，消息未发送")
+
+    def as_dict(self) -> dict[str, Any]:
+        """返回队列统计，用于诊断信息。"""
+        return {
+            "pending": len(self._pending),
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "sent": self.sent,
+            "retries": self.retries,
+        }
@@ -0,0 +1,268 @@
+"""协调器刷新周期的按需性能分析。
+
+启动后在协调器实例上替换 _async_refresh，接下来 N 次刷新期间开启分析器，覆盖 _async_update_data
+中的 API 请求和响应处理，以及刷新结束后通知实体时的属性计算和状态写入。完成或取消后恢复原方法，
+未启动时协调器上没有任何额外代码。
+
+分析器作用于整个事件循环线程：刷新期间（包括等待网络响应时）事件循环中其他任务的调用同样会被记录；
+线程池中执行的工作不会被记录。
+"""
+from __future__ import annotations
+
+import cProfile
+from collections import Counter
+import logging
+import os
+import sys
+import time
+from types import CodeType, FrameType
+from typing import Any, Callable
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util import dt as dt_util
+
+from .const import DATA_PROFILER, EVENT_PROFILE_COMPLETE, PROFILE_DIRECTORY
+
+_LOGGER = logging.getLogger(__name__)
+
+MAX_STACK_DEPTH = 128  # 折叠栈记录的最大调用深度，更深的部分截断
+
+
+class StackCollector:
+    """按完整调用栈累计耗时的分析器，输出 flamegraph.pl、speedscope 等工具可读取的折叠栈格式。
+
+    接口与 cProfile.Profile 的 enable/disable 一致。
+    """
+
+    def __init__(self) -> None:
+        """初始化分析器。"""
+        self.stacks: Counter[tuple[str, ...]] = Counter()  # 调用栈 -> 累计秒数
+        self._labels: dict[Any, str] = {}
+        self._current: tuple[str, ...] = ()
+        self._last = 0.0
+
+    def enable(self) -> None:
+        """开始记录当前线程。"""
+        self._current = self._stack(sys._getframe(1))  # pylint: disable=protected-access
+        self._last = time.perf_counter()
+        sys.setprofile(self._trace)
+
+    def disable(self) -> None:
+        """停止记录。"""
+        sys.setprofile(None)
+        self.stacks[self._current] += time.perf_counter() - self._last
+
+    def collapsed(self) -> list[str]:
+        """返回折叠栈格式的行：以分号分隔的调用栈和微秒数。"""
+        lines = []
+        for stack, seconds in self.stacks.items():
+            microseconds = round(seconds * 1_000_000)
+            if stack and microseconds:
+                lines.append(f"{';'.join(stack)} {microseconds}")
+        lines.sort()
+        return lines
+
+    def _label(self, code: CodeType) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = (
+                f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            )
+        return label
+
+    def _c_label(self, function: Any) -> str:
+        label = self._labels.get(function)
+        if label is None:
+            module = getattr(function, "__module__", None) or type(getattr(function, "__self__", None)).__name__
+            label = self._labels[function] = f"{module}.{getattr(function, '__qualname__', function)}"
+        return label
+
+    def _stack(self, frame: FrameType | None) -> tuple[str, ...]:
+        labels = []
+        while frame is not None and len(labels) < MAX_STACK_DEPTH:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+        labels.reverse()
+        return tuple(labels)
+
+    def _trace(self, frame: FrameType, event: str, arg: Any) -> None:
+        # 两次事件之间的耗时计入前一个位置的调用栈
+        self.stacks[self._current] += time.perf_counter() - self._last
+        if event == "call":
+            self._current = self._stack(frame)
+        elif event == "return":
+            self._current = self._stack(frame.f_back)
+        elif event == "c_call":
+            self._current = self._stack(frame) + (self._c_label(arg),)
+        else:  # c_return、c_exception
+            self._current = self._stack(frame)
+        # 不计入本函数自身的开销
+        self._last = time.perf_counter()
+
+
+class RefreshProfiler:
+    """分析一个协调器接下来若干次刷新的分析会话。"""
+
+    def __init__(
+        self,
+        cycles: int,
+        profile_format: str,
+        on_complete: Callable[[RefreshProfiler], None],
+    ) -> None:
+        """初始化会话，profile_format 为 pstats 或 collapsed。"""
+        self.cycles = cycles
+        self.format = profile_format
+        self.completed = 0
+        self.seconds = 0.0  # 被分析的刷新累计耗时
+        self.error: str | None = None  # 分析器无法启动时的原因，会话随之结束
+        self._profiler: Any = cProfile.Profile() if profile_format == "pstats" else StackCollector()
+        self._on_complete = on_complete
+        self._coordinator: Any = None
+        self._active = False
+
+    @property
+    def attached(self) -> bool:
+        """会话是否仍在等待刷新。"""
+        return self._coordinator is not None
+
+    def attach(self, coordinator: Any) -> None:
+        """替换协调器实例上的 _async_refresh，从下一次刷新开始分析。"""
+        original = coordinator._async_refresh  # pylint: disable=protected-access
+
+        async def _profiled_refresh(*args: Any, **kwargs: Any) -> None:
+            if self._active:
+                # 分析进行中又开始的刷新已包含在当前的分析范围内，不单独计数
+                await original(*args, **kwargs)
+                return
+            self._active = True
+            started = time.perf_counter()
+            enabled = False
+            try:
+                try:
+                    self._profiler.enable()
+                    enabled = True
+                except ValueError as err:
+                    # Python 3.12 起 cProfile 通过 sys.monitoring 注册，启动前的 sys.getprofile()
+                    # 检查看不到这类分析器；刷新照常进行，会话以错误结束
+                    self.error = f"无法启动分析器: {err}"
+                await original(*args, **kwargs)
+            finally:
+                if enabled:
+                    self._profiler.disable()
+                    self.seconds += time.perf_counter() - started
+                    self.completed += 1
+                self._active = False
+                if (self.error is not None or self.completed >= self.cycles) and self.attached:
+                    self.detach()
+                    self._on_complete(self)
+
+        self._coordinator = coordinator
+        coordinator._async_refresh = _profiled_refresh  # pylint: disable=protected-access
+
+    def detach(self) -> None:
+        """恢复协调器的原方法。"""
+        if self._coordinator is not None:
+            vars(self._coordinator).pop("_async_refresh", None)
+            self._coordinator = None
+
+    def write(self, path: str) -> None:
+        """把分析结果写入文件，会进行文件读写，应在线程池中调用。"""
+        if self.format == "pstats":
+            self._profiler.dump_stats(path)
+            return
+        with open(path, "w", encoding="utf-8") as file:
+            for line in self._profiler.collapsed():
+                file.write(line)
+                file.write("\n")
+
+
+async def async_start_profiling(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    coordinator: Any,
+    cycles: int,
+    profile_format: str,
+) -> dict[str, Any]:
+    """开始分析配置入口接下来的 cycles 次刷新，返回结果文件将写入的路径。
+
+    同一时间只允许一个分析会话，因为 Python 每个线程只能有一个分析器。
+    """
+    current = hass.data.get(DATA_PROFILER)
+    if current is not None:
+        raise HomeAssistantError(f"配置入口 {current[0]} 的性能分析尚未完成。")
+    if sys.getprofile() is not None:
+        raise HomeAssistantError("已有其他分析器在运行，无法开始性能分析。")
+
+    imei = entry.data["imei"]
+    suffix = "pstats" if profile_format == "pstats" else "collapsed.txt"
+    path = os.path.join(
+        hass.config.path(PROFILE_DIRECTORY),
+        f"hxinwatch_{imei}_{dt_util.now():%Y%m%d%H%M%S}.{suffix}",
+    )
+
+    async def _async_finish(profiler: RefreshProfiler) -> None:
+        if profiler.error is not None:
+            hass.data.pop(DATA_PROFILER, None)
+            _LOGGER.warning("设备 %s 的性能分析已中止: %s", imei, profiler.error)
+            hass.bus.async_fire(
+                EVENT_PROFILE_COMPLETE,
+                {
+                    "entry_id": entry.entry_id,
+                    "imei": imei,
+                    "path": None,
+                    "format": profile_format,
+                    "cycles": profiler.completed,
+                    "seconds": round(profiler.seconds, 3),
+                    "error": profiler.error,
+                },
+            )
+            return
+
+        def _write() -> None:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            profiler.write(path)
+
+        try:
+            await hass.async_add_executor_job(_write)
+        finally:
+            hass.data.pop(DATA_PROFILER, None)
+        _LOGGER.info(
+            "设备 %s 的 %d 次刷新性能分析已写入 %s，刷新共耗时 %.3f 秒。",
+            imei, profiler.completed, path, profiler.seconds,
+        )
+        hass.bus.async_fire(
+            EVENT_PROFILE_COMPLETE,
+            {
+                "entry_id": entry.entry_id,
+                "imei": imei,
+                "path": path,
+                "format": profile_format,
+                "cycles": profiler.completed,
+                "seconds": round(profiler.seconds, 3),
+                "error": None,
+            },
+        )
+
+    profiler = RefreshProfiler(
+        cycles,
+        profile_format,
+        lambda profiler: hass.async_create_task(_async_finish(profiler)),
+    )
+    profiler.attach(coordinator)
+    hass.data[DATA_PROFILER] = (entry.entry_id, profiler)
+    _LOGGER.info("开始分析设备 %s 接下来 %d 次刷新，结果将写入 %s。", imei, cycles, path)
+    return {"path": path, "cycles": cycles, "format": profile_format}
+
+
+def async_cancel_profiling(hass: HomeAssistant, entry_id: str) -> None:
+    """配置入口卸载时放弃其未完成的分析会话。"""
+    current = hass.data.get(DATA_PROFILER)
+    if current is None or current[0] != entry_id:
+        return
+    _entry_id, profiler = current
+    if profiler.attached:
+        profiler.detach()
+        hass.data.pop(DATA_PROFILER)
+        _LOGGER.info("配置入口 %s 已卸载，放弃未完成的性能分析。", entry_id)
@@ -0,0 +1,132 @@
+"""HXinWatch推送模式：通过 webhook 接收本地中继转发的设备数据。"""
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any
+
+from aiohttp import web
+
+from homeassistant.components import webhook
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_WEBHOOK_ID
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, PUSH_RESERVED_KEYS
+from .coordinator import HXinWatchDataUpdateCoordinator
+from .logs import Payload
+from .schema import CHATS_ENDPOINT, SchemaError, normalize_list, normalize_status
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def async_ensure_webhook_id(hass: HomeAssistant, entry: ConfigEntry) -> str:
+    """返回配置入口的 webhook ID，首次启用推送时生成并保存。"""
+    webhook_id = entry.data.get(CONF_WEBHOOK_ID)
+    if not webhook_id:
+        webhook_id = webhook.async_generate_id()
+        hass.config_entries.async_update_entry(
+            entry, data={**entry.data, CONF_WEBHOOK_ID: webhook_id}
+        )
+    return webhook_id
+
+
+class PushReceiver:
+    """处理单个配置入口的 webhook 推送。
+
+    请求体与云端接口响应格式相同：data 为对象时按 /related/main 的状态分区
+    （info、location、heart 等，可只包含其中一部分）合并；data 为数组时按 /chat/chats
+    的消息列表处理。也接受省略 code/data 外层、直接发送 data 内容的请求体。
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        coordinator: HXinWatchDataUpdateCoordinator,
+        imei: str,
+        webhook_id: str,
+    ) -> None:
+        """初始化接收器。"""
+        self.hass = hass
+        self.coordinator = coordinator
+        self.imei = imei
+        self.webhook_id = webhook_id
+        self.accepted = 0
+        self.rejected = 0
+        self.last_push: float | None = None  # 最近一次接受推送的系统时间
+
+    def async_register(self, name: str) -> None:
+        """注册 webhook，仅接受本地网络的 POST 请求。"""
+        webhook.async_register(
+            self.hass,
+            DOMAIN,
+            name,
+            self.webhook_id,
+            self.async_handle_webhook,
+            local_only=True,
+            allowed_methods=["POST"],
+        )
+        _LOGGER.info("HXinWatch推送已启用，中继请 POST 到 %s", webhook.async_generate_path(self.webhook_id))
+
+    def async_unregister(self) -> None:
+        """注销 webhook。"""
+        webhook.async_unregister(self.hass, self.webhook_id)
+
+    def _reject(self, reason: str) -> web.Response:
+        self.rejected += 1
+        self.coordinator.log.warning("push", "已拒绝设备 %s 的推送: %s", self.imei, reason)
+        return web.Response(status=400, text=reason)
+
+    async def async_handle_webhook(
+        self, hass: HomeAssistant, webhook_id: str, request: web.Request
+    ) -> web.Response | None:
+        """处理一次推送。"""
+        try:
+            body = await request.json()
+        except ValueError:
+            return self._reject("请求体不是有效的JSON")
+
+        payload: Any = body
+        if isinstance(body, dict) and "data" in body:
+            if body.get("code", 200) != 200:
+                return self._reject(f"业务状态码为 {body.get('code')}")
+            payload = body["data"]
+
+        if isinstance(payload, list):
+            try:
+                messages = normalize_list(CHATS_ENDPOINT, payload)
+            except SchemaError as err:
+                return self._reject(str(err))
+            voice_messages = [message for message in messages if message["fromme"] == 0]
+            self.coordinator.async_apply_push(voice_messages=voice_messages)
+        elif isinstance(payload, dict):
+            status = {
+                key: value for key, value in payload.items() if key not in PUSH_RESERVED_KEYS
+            }
+            if not status:
+                return self._reject("没有可合并的状态数据")
+            normalized, errors = normalize_status(status)
+            if errors:
+                return self._reject(str(errors[0]))
+            # 只合并推送中实际出现的数据段
+            status = {key: normalized[key] for key in status}
+            info = status.get("info")
+            if info and info["imei"] and info["imei"] != self.imei:
+                return self._reject("IMEI 与配置入口不一致")
+            self.coordinator.async_apply_push(status=status)
+        else:
+            return self._reject("data 必须是对象或数组")
+
+        self.accepted += 1
+        self.last_push = time.time()
+        self.coordinator.log.debug("push", "已接受推送: %s", Payload(payload))
+        return None
+
+    def as_dict(self) -> dict[str, Any]:
+        """返回推送统计，用于诊断信息。"""
+        return {
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "last_push": self.last_push,
+            "push_active": self.coordinator.push_active,
+        }
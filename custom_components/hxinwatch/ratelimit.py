@@ -0,0 +1,150 @@
+"""所有配置入口共享的、按优先级排队的令牌桶限流器（不依赖 Home Assistant）。"""
+from __future__ import annotations
+
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+import heapq
+import itertools
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .metrics import LatencyHistogram
+
+# 优先级，数值越小越先获得令牌
+PRIORITY_INTERACTIVE = 0  # 用户发起的服务调用
+PRIORITY_POLL = 1  # 状态轮询
+PRIORITY_CONFIG = 2  # 通讯录、闹钟等低频配置读取
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_POLL: "poll",
+    PRIORITY_CONFIG: "config",
+}
+
+_REQUEST_PRIORITY: ContextVar[Optional[int]] = ContextVar("hxinwatch_request_priority", default=None)
+
+
+def current_priority() -> Optional[int]:
+    """返回当前上下文指定的请求优先级，未指定时为 None。"""
+    return _REQUEST_PRIORITY.get()
+
+
+@contextmanager
+def request_priority(priority: int) -> Iterator[None]:
+    """在该上下文（及其中创建的任务）内发出的请求使用指定优先级。"""
+    token = _REQUEST_PRIORITY.set(priority)
+    try:
+        yield
+    finally:
+        _REQUEST_PRIORITY.reset(token)
+
+
+class _PriorityStats:
+    __slots__ = ("acquired", "waited", "wait", "queued", "max_queued")
+
+    def __init__(self) -> None:
+        self.acquired = 0
+        self.waited = 0  # 需要排队的次数
+        self.wait = LatencyHistogram()
+        self.queued = 0
+        self.max_queued = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "acquired": self.acquired,
+            "waited": self.waited,
+            "queue_depth": self.queued,
+            "max_queue_depth": self.max_queued,
+            "wait": self.wait.as_dict(),
+        }
+
+
+class PriorityRateLimiter:
+    """令牌桶限流器：令牌不足时按优先级（同级先到先得）排队。"""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        """rate 为每秒补充的令牌数，burst 为桶容量。"""
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._stats = {priority: _PriorityStats() for priority in PRIORITY_NAMES}
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, priority: int = PRIORITY_POLL) -> float:
+        """获取一个令牌，返回等待的秒数。"""
+        stats = self._stats[priority]
+        self._refill()
+        if not self._waiters and self._tokens >= 1:
+            self._tokens -= 1
+            stats.acquired += 1
+            stats.wait.observe(0.0)
+            return 0.0
+
+        start = time.monotonic()
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        stats.queued += 1
+        stats.max_queued = max(stats.max_queued, stats.queued)
+        self._schedule()
+        try:
+            await future
+        finally:
+            stats.queued -= 1
+        waited = time.monotonic() - start
+        stats.acquired += 1
+        stats.waited += 1
+        stats.wait.observe(waited * 1000)
+        return waited
+
+    def _schedule(self) -> None:
+        if self._timer is not None or not self._waiters:
+            return
+        delay = max(0.0, (1 - self._tokens) / self.rate)
+        self._timer = asyncio.get_running_loop().call_later(delay, self._release)
+
+    def _release(self) -> None:
+        self._timer = None
+        self._refill()
+        while self._waiters and self._tokens >= 1:
+            _priority, _sequence, future = heapq.heappop(self._waiters)
+            if future.done():
+                # 等待者已被取消，不消耗令牌
+                continue
+            self._tokens -= 1
+            future.set_result(None)
+        # 丢弃队首已取消的等待者，避免为它们空等
+        while self._waiters and self._waiters[0][2].done():
+            heapq.heappop(self._waiters)
+        self._schedule()
+
+    def close(self) -> None:
+        """取消定时器，并让仍在排队的请求立即失败。"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for _priority, _sequence, future in self._waiters:
+            if not future.done():
+                future.set_exception(RuntimeError("限流器已关闭"))
+        self._waiters.clear()
+
+    def as_dict(self) -> Dict[str, Any]:
+        """返回可序列化的状态和各优先级的排队统计。"""
+        self._refill()
+        return {
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "tokens": round(self._tokens, 2),
+            "queue_depth": sum(1 for waiter in self._waiters if not waiter[2].done()),
+            "priorities": {
+                PRIORITY_NAMES[priority]: stats.as_dict() for priority, stats in self._stats.items()
+            },
+        }
@@ -0,0 +1,120 @@
+"""HXinWatch闹钟的每周计划（不依赖 Home Assistant）。
+
+闹钟列表编译为一个按下次响铃时间排序的最小堆，只有闹钟列表（id、时间、星期、开关）变化时才重新编译。
+查询下一个闹钟时先弹出已经响过的条目：重复闹钟按星期掩码算出下一次响铃时间后放回堆中，一次性闹钟
+（星期为 ``0000000``）直接移除。未响铃时查询为 O(1)，每次响铃的维护为 O(log n)。
+
+- ``status`` 为 0 的闹钟已关闭，不进入计划。
+- 一次性闹钟在时间到达前按下一次出现的该时刻响铃（今天未到则今天，否则明天），与手表的行为一致；
+  手表响铃后通常会把它关闭，下一次刷新时闹钟列表随之变化。
+- 闹钟时间按传入时间的时区（Home Assistant 的本地时区）解释，堆中以 UTC 时间排序，夏令时切换不影响顺序。
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta, timezone
+import heapq
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+ONE_SHOT_WEEK = "0000000"
+
+# 闹钟中参与计划的字段，用于判断闹钟列表是否变化
+_SIGNATURE_FIELDS = ("id", "time", "week", "status")
+
+
+def _parse_time(value: Any) -> Optional[time]:
+    """解析 HH:MM 格式的时间，不合法时返回 None。"""
+    try:
+        hour, minute = str(value).split(":")
+        return time(int(hour), int(minute))
+    except (TypeError, ValueError):
+        return None
+
+
+class _Entry:
+    """计划中的一个闹钟。"""
+
+    __slots__ = ("alarm", "at", "days")
+
+    def __init__(self, alarm: Dict[str, Any], at: time, days: Tuple[int, ...]) -> None:
+        self.alarm = alarm
+        self.at = at
+        self.days = days  # 重复的星期（0 为周一），空元组表示一次性闹钟
+
+    def next_after(self, after: datetime) -> Optional[datetime]:
+        """after（本地时间）之后的下一次响铃时间（UTC）。"""
+        tz = after.tzinfo
+        today = after.date()
+        for offset in range(8):
+            day: date = today + timedelta(days=offset)
+            if self.days and day.weekday() not in self.days:
+                continue
+            fire = datetime.combine(day, self.at, tzinfo=tz).astimezone(timezone.utc)
+            if fire > after:
+                return fire
+        return None
+
+
+class AlarmSchedule:
+    """一台设备的闹钟计划。"""
+
+    def __init__(self) -> None:
+        """初始化空计划。"""
+        self._signature: Tuple[Tuple[Any, ...], ...] = ()
+        self._entries: List[_Entry] = []
+        self._heap: List[Tuple[datetime, int]] = []  # (下次响铃的 UTC 时间, 条目序号)
+        self._stale = False  # 闹钟列表已变化，下次查询时重新编译
+        self.rebuilds = 0
+
+    def __len__(self) -> int:
+        """计划中已开启的闹钟数（包括已经响过的一次性闹钟）。"""
+        return len(self._entries)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """返回计划的统计（用于诊断）。"""
+        return {"enabled": len(self._entries), "pending": len(self._heap), "rebuilds": self.rebuilds}
+
+    def update(self, alarms: Sequence[Dict[str, Any]]) -> bool:
+        """传入最新的闹钟列表，列表变化时返回 True。"""
+        signature = tuple(
+            tuple(alarm.get(field) for field in _SIGNATURE_FIELDS) for alarm in alarms
+        )
+        if signature == self._signature:
+            return False
+        self._signature = signature
+        self._entries = []
+        for alarm in alarms:
+            at = _parse_time(alarm.get("time"))
+            if at is None or alarm.get("status") == 0:
+                continue
+            week = alarm.get("week") or ONE_SHOT_WEEK
+            days = tuple(index for index, bit in enumerate(week) if bit == "1")
+            self._entries.append(_Entry(alarm, at, days))
+        self._heap = []
+        self._stale = True
+        return True
+
+    def next_alarm(self, now: datetime) -> Optional[Tuple[datetime, Dict[str, Any]]]:
+        """返回 now（带时区的本地时间）之后的下一个闹钟：(响铃的 UTC 时间, 闹钟)，没有时返回 None。"""
+        heap = self._heap
+        if self._stale:
+            self._stale = False
+            self.rebuilds += 1
+            heap[:] = [
+                (fire, index)
+                for index, entry in enumerate(self._entries)
+                if (fire := entry.next_after(now)) is not None
+            ]
+            heapq.heapify(heap)
+        while heap and heap[0][0] <= now:
+            _fired, index = heap[0]
+            entry = self._entries[index]
+            fire = entry.next_after(now) if entry.days else None
+            if fire is None:
+                # 一次性闹钟已经响过
+                heapq.heappop(heap)
+            else:
+                heapq.heapreplace(heap, (fire, index))
+        if not heap:
+            return None
+        fire, index = heap[0]
+        return fire, self._entries[index].alarm
@@ -0,0 +1,221 @@
+"""HXinWatch API 响应的结构校验与规范化（不依赖 Home Assistant）。
+
+每个接口的响应结构在导入时编译为嵌套的校验函数，每次获取只校验一次（缓存中保存的是规范化后的结果）。
+校验同时把数值字段转换为正确的类型：整数字段接受整数、整数值的浮点数和数字字符串，浮点字段接受任意数字。
+
+- /related/main：各数据段分别校验，不合法的数据段整体丢弃（以空数据段代替），其余数据段照常使用。
+  已声明的数据段和字段在结果中总是存在，缺失时为 None。
+- 列表接口（通讯录、闹钟、消息）：任何一项不合法时整个列表被拒绝，避免写回时丢失无法识别的条目。
+
+错误以“接口 + 字段路径”计数，例如 ``/device/config/contact data[3].phone``。
+"""
+from __future__ import annotations
+
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+STATUS_ENDPOINT = "/related/main"
+CONTACTS_ENDPOINT = "/device/config/contact"
+ALARMS_ENDPOINT = "/device/config/remind"
+CHATS_ENDPOINT = "/chat/chats"
+
+# 校验函数：(值, 字段路径) -> 规范化后的值，不合法时抛出 _Invalid
+Checker = Callable[[Any, str], Any]
+
+
+class SchemaError(ValueError):
+    """响应结构不合法。"""
+
+    def __init__(self, endpoint: str, path: str, reason: str) -> None:
+        """记录出错的接口、字段路径和原因。"""
+        super().__init__(f"{endpoint} 响应的 {path} {reason}")
+        self.endpoint = endpoint
+        self.path = path
+        self.reason = reason
+
+
+class _Invalid(Exception):
+    """校验函数内部使用，由外层转换为 SchemaError。"""
+
+    def __init__(self, path: str, reason: str) -> None:
+        super().__init__(path, reason)
+        self.path = path
+        self.reason = reason
+
+
+def _integer(value: Any, path: str) -> Optional[int]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool):
+        raise _Invalid(path, "不是整数")
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            try:
+                number = float(value)
+            except ValueError:
+                pass
+            else:
+                if number.is_integer():
+                    return int(number)
+    raise _Invalid(path, f"不是整数: {value!r}")
+
+
+def _float(value: Any, path: str) -> Optional[float]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool):
+        raise _Invalid(path, "不是数字")
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            pass
+    raise _Invalid(path, f"不是数字: {value!r}")
+
+
+def _string(value: Any, path: str) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        # 电话号码、ID 等字段有时以数字返回
+        return str(value)
+    raise _Invalid(path, f"不是字符串: {value!r}")
+
+
+def _pattern(regex: str, description: str) -> Checker:
+    match = re.compile(regex).fullmatch
+
+    def check(value: Any, path: str) -> Optional[str]:
+        value = _string(value, path)
+        if value is not None and match(value) is None:
+            raise _Invalid(path, f"不是{description}: {value!r}")
+        return value
+
+    return check
+
+
+def _required(checker: Checker) -> Checker:
+    def check(value: Any, path: str) -> Any:
+        value = checker(value, path)
+        if value is None:
+            raise _Invalid(path, "缺失")
+        return value
+
+    return check
+
+
+def _record(fields: Dict[str, Checker], fill: bool = True) -> Checker:
+    """对象：声明的字段逐一校验，未声明的字段原样保留。
+
+    fill 为 True 时缺失的字段以 None 出现在结果中；列表中的条目会被原样写回云端，
+    不添加原本没有的字段。
+    """
+    items = tuple(fields.items())
+
+    def check(value: Any, path: str) -> Dict[str, Any]:
+        if not isinstance(value, dict):
+            raise _Invalid(path, "不是对象")
+        result = dict(value)
+        for key, checker in items:
+            if not fill and key not in value:
+                # 缺失的字段不添加，但必填字段仍然报错
+                checker(None, f"{path}.{key}")
+                continue
+            result[key] = checker(value.get(key), f"{path}.{key}")
+        return result
+
+    return check
+
+
+def _list_of(item: Checker) -> Checker:
+    """列表：None 视为空列表，任何一项不合法时整个列表不合法。"""
+
+    def check(value: Any, path: str) -> List[Any]:
+        if value is None:
+            return []
+        if not isinstance(value, list):
+            raise _Invalid(path, "不是数组")
+        return [item(element, f"{path}[{index}]") for index, element in enumerate(value)]
+
+    return check
+
+
+# /related/main 的数据段：数据段名 -> 字段校验
+STATUS_SECTIONS: Dict[str, Checker] = {
+    "info": _record({"name": _string, "battery": _integer, "imei": _string}),
+    "location": _record({"latitude": _float, "longitude": _float, "address": _string}),
+    "heart": _record({"heart": _integer}),
+    "oxygen": _record({"oxygen": _integer}),
+    "temperature": _record({"temperature": _float}),
+    "sport": _record({"step": _integer}),
+}
+# 数据段缺失或被丢弃时使用的空数据段
+_EMPTY_SECTIONS: Dict[str, Dict[str, Any]] = {
+    name: checker({}, name) for name, checker in STATUS_SECTIONS.items()
+}
+
+_contact = _record(
+    {"id": _required(_integer), "name": _string, "phone": _required(_string)}, fill=False
+)
+_alarm = _record({
+    "id": _required(_string),
+    "name": _string,
+    "time": _required(_pattern(r"\d{1,2}:\d{2}", "HH:MM 格式的时间")),
+    "week": _pattern(r"[01]{7}", "7 位星期字符串"),
+    "status": _integer,
+}, fill=False)
+_chat = _record({
+    "id": _integer,
+    "fromme": _required(_integer),
+    "type": _integer,
+    "content": _string,
+    "duration": _float,
+    "time": _integer,
+}, fill=False)
+
+LIST_SCHEMAS: Dict[str, Checker] = {
+    CONTACTS_ENDPOINT: _list_of(_contact),
+    ALARMS_ENDPOINT: _list_of(_alarm),
+    CHATS_ENDPOINT: _list_of(_chat),
+}
+
+
+def normalize_status(data: Any) -> Tuple[Dict[str, Any], List[SchemaError]]:
+    """规范化 /related/main 的 data，返回 (结果, 被丢弃的数据段的错误)。
+
+    data 本身不是对象时抛出 SchemaError；未声明的数据段原样保留。
+    推送的状态只包含部分数据段，调用方可以只取其中实际出现的数据段。
+    """
+    if not isinstance(data, dict):
+        raise SchemaError(STATUS_ENDPOINT, "data", "不是对象")
+    result = dict(data)
+    errors = []
+    for name, checker in STATUS_SECTIONS.items():
+        section = data.get(name)
+        if section is None:
+            result[name] = dict(_EMPTY_SECTIONS[name])
+            continue
+        try:
+            result[name] = checker(section, f"data.{name}")
+        except _Invalid as err:
+            errors.append(SchemaError(STATUS_ENDPOINT, err.path, err.reason))
+            result[name] = dict(_EMPTY_SECTIONS[name])
+    return result, errors
+
+
+def normalize_list(endpoint: str, data: Any) -> List[Dict[str, Any]]:
+    """规范化列表接口的 data，任何一项不合法时抛出 SchemaError。"""
+    try:
+        return LIST_SCHEMAS[endpoint](data, "data")
+    except _Invalid as err:
+        raise SchemaError(endpoint, err.path, err.reason) from None
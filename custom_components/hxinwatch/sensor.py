@@ -11,13 +11,16 @@ from homeassistant.components.sensor import (
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EntityCategory
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_track_point_in_utc_time
 from homeassistant.helpers.typing import StateType
 from homeassistant.helpers.update_coordinator import (
     CoordinatorEntity,
     DataUpdateCoordinator,
 )
+from homeassistant.util import dt as dt_util
 
 from .const import (
     DOMAIN, 
@@ -28,7 +31,12 @@ from .const import (
     SENSOR_TYPE_TEMPERATURE,
     SENSOR_TYPE_CONTACT_COUNT,
     SENSOR_TYPE_ALARM_COUNT,
+    SENSOR_TYPE_NEXT_ALARM,
 )
+from .aggregates import AGGREGATE_METRICS, HealthAggregator
+from .logs import Payload
+from .metrics import ApiMetrics
+from .schedule import AlarmSchedule
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -72,6 +80,15 @@ def _convert_binary_to_weekdays_string(binary_week: str) -> str:
     return ", ".join(selected_days)
 
 
+# 直接读取 /related/main 数据的传感器: 类型 -> (数据段, 字段)
+_READINGS = {
+    SENSOR_TYPE_BATTERY: ("info", "battery"),
+    SENSOR_TYPE_HEART_RATE: ("heart", "heart"),
+    SENSOR_TYPE_OXYGEN: ("oxygen", "oxygen"),
+    SENSOR_TYPE_TEMPERATURE: ("temperature", "temperature"),
+    SENSOR_TYPE_STEPS: ("sport", "step"),
+}
+
 # 定义传感器类型和描述
 SENSOR_TYPES: tuple[SensorEntityDescription, ...] = (
     SensorEntityDescription(
@@ -125,6 +142,42 @@ SENSOR_TYPES: tuple[SensorEntityDescription, ...] = (
     ),
 )
 
+NEXT_ALARM_SENSOR_TYPE = SensorEntityDescription(
+    key=SENSOR_TYPE_NEXT_ALARM,
+    name="下一个闹钟",
+    icon="mdi:alarm",
+    device_class=SensorDeviceClass.TIMESTAMP,
+)
+
+# API 诊断传感器（默认禁用）
+API_METRIC_SENSOR_TYPES: tuple[SensorEntityDescription, ...] = (
+    SensorEntityDescription(
+        key="api_requests",
+        name="API请求数",
+        icon="mdi:counter",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+    ),
+    SensorEntityDescription(
+        key="api_errors",
+        name="API错误数",
+        icon="mdi:alert-circle-outline",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+    ),
+    SensorEntityDescription(
+        key="api_latency_p95",
+        name="API延迟P95",
+        icon="mdi:timer-outline",
+        native_unit_of_measurement="ms",
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+    ),
+)
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -136,9 +189,29 @@ async def async_setup_entry(
     coordinator = integration_data["coordinator"]
     
     entities = []
-    _LOGGER.debug("开始设置传感器实体，协调器数据: %s", coordinator.data)
+    _LOGGER.debug("开始设置传感器实体，协调器数据: %s", Payload(coordinator.data))
     for description in SENSOR_TYPES:
         entities.append(HXinWatchSensor(coordinator, description, entry.unique_id))
+    entities.append(
+        HXinWatchNextAlarmSensor(
+            coordinator, integration_data["alarm_schedule"], NEXT_ALARM_SENSOR_TYPE, entry.unique_id
+        )
+    )
+
+    # 滚动窗口聚合传感器（默认禁用，需要时在实体设置中启用）
+    aggregates: HealthAggregator = integration_data["aggregates"]
+    descriptions = {description.key: description for description in SENSOR_TYPES}
+    for metric in AGGREGATE_METRICS:
+        for minutes in aggregates.windows_minutes:
+            entities.append(
+                HXinWatchAggregateSensor(
+                    coordinator, aggregates, descriptions[metric], minutes, entry.unique_id
+                )
+            )
+
+    api_metrics: ApiMetrics = integration_data["api"].metrics
+    for description in API_METRIC_SENSOR_TYPES:
+        entities.append(HXinWatchApiMetricSensor(coordinator, api_metrics, description, entry.unique_id))
     
     async_add_entities(entities)
 
@@ -168,58 +241,27 @@ class HXinWatchSensor(CoordinatorEntity, SensorEntity):
     @property
     def native_value(self) -> StateType:
         """返回传感器的值。"""
-        data = self.coordinator.data.get("data", {})
-        _LOGGER.debug("传感器 '%s' 获取到协调器数据（已解析顶层 'data'）：%s", self.entity_description.key, data)
-        
-        if self.entity_description.key == SENSOR_TYPE_BATTERY:
-            value = data.get("info", {}).get("battery")
-            _LOGGER.debug("传感器 '%s' 电池值: %s", self.entity_description.key, value)
-            return value
-        
-        if self.entity_description.key == SENSOR_TYPE_HEART_RATE:
-            value = data.get("heart", {}).get("heart")
-            _LOGGER.debug("传感器 '%s' 心率值: %s", self.entity_description.key, value)
-            return value
-        
-        if self.entity_description.key == SENSOR_TYPE_OXYGEN:
-            value = data.get("oxygen", {}).get("oxygen")
-            _LOGGER.debug("传感器 '%s' 氧饱和度值: %s", self.entity_description.key, value)
-            return value
-        
-        if self.entity_description.key == SENSOR_TYPE_TEMPERATURE:
-            value = data.get("temperature", {}).get("temperature")
-            _LOGGER.debug("传感器 '%s' 温度值: %s", self.entity_description.key, value)
-            return value
-        
-        if self.entity_description.key == SENSOR_TYPE_STEPS:
-            value = data.get("sport", {}).get("step")
-            _LOGGER.debug("传感器 '%s' 步数值: %s", self.entity_description.key, value)
-            return value
-
-        if self.entity_description.key == SENSOR_TYPE_CONTACT_COUNT:
-            contacts = data.get("contacts", [])
-            _LOGGER.debug("传感器 '%s' 通讯录列表: %s, 数量: %s", self.entity_description.key, contacts, len(contacts))
-            return len(contacts)
-
-        if self.entity_description.key == SENSOR_TYPE_ALARM_COUNT:
-            alarms = data.get("alarms", [])
-            _LOGGER.debug("传感器 '%s' 闹钟列表: %s, 数量: %s", self.entity_description.key, alarms, len(alarms))
-            return len(alarms)
-        
-        _LOGGER.debug("传感器 '%s' 未找到对应数据", self.entity_description.key)
+        data = self.coordinator.data["data"]
+        key = self.entity_description.key
+        if key in _READINGS:
+            section, field = _READINGS[key]
+            return data[section][field]
+        if key == SENSOR_TYPE_CONTACT_COUNT:
+            return len(data["contacts"])
+        if key == SENSOR_TYPE_ALARM_COUNT:
+            return len(data["alarms"])
         return None
 
     @property
     def extra_state_attributes(self) -> dict[str, Any] | None:
         """返回传感器的额外状态属性。"""
-        data = self.coordinator.data.get("data", {})
+        data = self.coordinator.data["data"]
         
         if self.entity_description.key == SENSOR_TYPE_CONTACT_COUNT:
-            contacts = data.get("contacts", [])
-            return {"contacts": contacts}
+            return {"contacts": data["contacts"]}
 
         if self.entity_description.key == SENSOR_TYPE_ALARM_COUNT:
-            alarms_raw = data.get("alarms", [])
+            alarms_raw = data["alarms"]
             # 复制并转换闹钟列表中的 week 字段
             alarms_display = []
             for alarm in alarms_raw:
@@ -230,3 +272,188 @@ class HXinWatchSensor(CoordinatorEntity, SensorEntity):
             return {"alarms": alarms_display}
             
         return None
+
+
+class HXinWatchNextAlarmSensor(CoordinatorEntity, SensorEntity):
+    """表示下一个闹钟响铃时间的实体。
+
+    从配置入口预先编译的闹钟计划中读取，闹钟响铃时由定时器更新，不需要等待下一次刷新。
+    """
+
+    _attr_has_entity_name = True
+
+    def __init__(
+        self,
+        coordinator: DataUpdateCoordinator,
+        schedule: AlarmSchedule,
+        description: SensorEntityDescription,
+        device_id: str | None,
+    ) -> None:
+        """初始化下一个闹钟传感器。"""
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._schedule = schedule
+        self._cancel_timer: Any = None
+        self._attr_unique_id = f"{device_id}_{description.key}"
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, device_id)},
+            "name": "华芯沃设备",
+            "manufacturer": "华芯沃",
+            "model": "Smart Watch",
+        }
+
+    async def async_added_to_hass(self) -> None:
+        """计算初始值，并在移除时取消定时器。"""
+        await super().async_added_to_hass()
+        self.async_on_remove(self._cancel_alarm_timer)
+        self._update_next_alarm()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """闹钟列表可能已变化，重新读取计划。"""
+        self._update_next_alarm()
+        super()._handle_coordinator_update()
+
+    @callback
+    def _async_alarm_fired(self, _now: Any) -> None:
+        self._cancel_timer = None
+        self._update_next_alarm()
+        self.async_write_ha_state()
+
+    @callback
+    def _cancel_alarm_timer(self) -> None:
+        if self._cancel_timer is not None:
+            self._cancel_timer()
+            self._cancel_timer = None
+
+    @callback
+    def _update_next_alarm(self) -> None:
+        self._cancel_alarm_timer()
+        upcoming = self._schedule.next_alarm(dt_util.now())
+        if upcoming is None:
+            self._attr_native_value = None
+            self._attr_extra_state_attributes = {"enabled_alarms": len(self._schedule)}
+            return
+        fire, alarm = upcoming
+        self._attr_native_value = fire
+        self._attr_extra_state_attributes = {
+            "alarm_id": alarm["id"],
+            "alarm_name": alarm.get("name"),
+            "time": alarm["time"],
+            "week_readable": _convert_binary_to_weekdays_string(alarm.get("week") or "0000000"),
+            "enabled_alarms": len(self._schedule),
+        }
+        self._cancel_timer = async_track_point_in_utc_time(
+            self.hass, self._async_alarm_fired, fire
+        )
+
+
+class HXinWatchAggregateSensor(CoordinatorEntity, SensorEntity):
+    """表示健康指标滚动窗口聚合的实体，状态为窗口均值，属性包含最小值、最大值和采样数。"""
+
+    _attr_has_entity_name = True
+    _attr_entity_registry_enabled_default = False
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(
+        self,
+        coordinator: DataUpdateCoordinator,
+        aggregates: HealthAggregator,
+        description: SensorEntityDescription,
+        minutes: int,
+        device_id: str | None,
+    ) -> None:
+        """初始化聚合传感器。"""
+        super().__init__(coordinator)
+        self._window = aggregates.window(description.key, minutes)
+        self._minutes = minutes
+        self._attr_unique_id = f"{device_id}_{description.key}_{minutes}m_mean"
+        self._attr_name = f"{description.name} {minutes}分钟均值"
+        self._attr_icon = description.icon
+        self._attr_device_class = description.device_class
+        self._attr_native_unit_of_measurement = description.native_unit_of_measurement
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, device_id)},
+            "name": "华芯沃设备",
+            "manufacturer": "华芯沃",
+            "model": "Smart Watch",
+        }
+
+    @property
+    def native_value(self) -> StateType:
+        """返回窗口均值。"""
+        mean = self._window.mean
+        return round(mean, 1) if mean is not None else None
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """返回窗口内的最小值、最大值和采样数。"""
+        return {
+            "window_minutes": self._minutes,
+            "min": self._window.min,
+            "max": self._window.max,
+            "count": self._window.count,
+        }
+
+
+class HXinWatchApiMetricSensor(CoordinatorEntity, SensorEntity):
+    """表示 API 请求统计的诊断实体，随协调器刷新更新。"""
+
+    _attr_has_entity_name = True
+
+    def __init__(
+        self,
+        coordinator: DataUpdateCoordinator,
+        api_metrics: ApiMetrics,
+        description: SensorEntityDescription,
+        device_id: str | None,
+    ) -> None:
+        """初始化诊断传感器。"""
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._api_metrics = api_metrics
+        self._attr_unique_id = f"{device_id}_{description.key}"
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, device_id)},
+            "name": "华芯沃设备",
+            "manufacturer": "华芯沃",
+            "model": "Smart Watch",
+        }
+
+    @property
+    def available(self) -> bool:
+        """诊断传感器不依赖最近一次刷新是否成功。"""
+        return True
+
+    @property
+    def native_value(self) -> StateType:
+        """返回统计值。"""
+        key = self.entity_description.key
+        if key == "api_requests":
+            return self._api_metrics.total_requests
+        if key == "api_errors":
+            return self._api_metrics.total_errors
+        if key == "api_latency_p95":
+            return self._api_metrics.total_latency.percentile(0.95)
+        return None
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """按接口列出请求数、错误数和延迟分位数。"""
+        if self.entity_description.key == "api_requests":
+            return {
+                endpoint: stats.requests
+                for endpoint, stats in self._api_metrics.endpoints.items()
+            }
+        if self.entity_description.key == "api_errors":
+            return {
+                endpoint: dict(stats.errors)
+                for endpoint, stats in self._api_metrics.endpoints.items()
+                if stats.errors
+            }
+        if self.entity_description.key == "api_latency_p95":
+            return {
+                endpoint: stats.latency.percentile(0.95)
+                for endpoint, stats in self._api_metrics.endpoints.items()
+            }
+        return None
@@ -1,15 +1,17 @@
 # hxinwatch/services.py
 from __future__ import annotations # <--- 确保这一行是文件的绝对第一行！
 
+import functools
 import logging
-from typing import Any, List, Union # 导入 Union
+from typing import Any, Awaitable, Callable, List, Union # 导入 Union
 import voluptuous as vol
 from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers import device_registry as dr
 
-from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
 from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util import dt as dt_util
 
 from .const import (
     DOMAIN,
@@ -17,7 +19,15 @@ from .const import (
     SERVICE_DELETE_CONTACT,
     SERVICE_ADD_ALARM,
     SERVICE_DELETE_ALARM,
+    SERVICE_REFRESH,
+    REFRESH_SECTIONS,
+    SERVICE_EXPORT_HISTORY,
+    EXPORT_FORMATS,
+    SERVICE_PROFILE,
+    PROFILE_FORMATS,
+    PROFILE_MAX_CYCLES,
 )
+from .ratelimit import PRIORITY_INTERACTIVE, request_priority
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -92,11 +102,24 @@ def _normalize_weekday_input(item: Union[str, int]) -> str:
     raise vol.Invalid(f"星期输入 '{item}' 类型无效，必须是数字或字符串。")
 
 
+def _interactive(
+    handler: Callable[[ServiceCall], Awaitable[None]]
+) -> Callable[[ServiceCall], Awaitable[None]]:
+    """服务调用由用户发起，其API请求在共享限流器中优先于后台轮询。"""
+
+    @functools.wraps(handler)
+    async def wrapper(call: ServiceCall) -> None:
+        with request_priority(PRIORITY_INTERACTIVE):
+            await handler(call)
+
+    return wrapper
+
+
 async def async_setup_services(hass: HomeAssistant) -> None:
     """设置HXinWatch集成的服务。"""
 
-    async def get_api_instance(call: ServiceCall):
-        """辅助函数：安全地从 hass.data 中获取 API 实例，通过 entity_id 或 entry_id 推断。"""
+    async def get_integration_data(call: ServiceCall) -> dict[str, Any]:
+        """辅助函数：通过 entity_id 或 entry_id 推断配置入口，返回其在 hass.data 中的数据。"""
         entry_id = None
         
         if "entry_id" in call.data and call.data["entry_id"]:
@@ -127,12 +150,11 @@ async def async_setup_services(hass: HomeAssistant) -> None:
         if not integration_data:
             _LOGGER.error("未找到配置入口 ID 为 '%s' 的集成数据。请确保集成已正确设置并加载。", entry_id)
             raise HomeAssistantError(f"未找到集成数据，请确保集成已设置并加载: {entry_id}")
-            
-        api = integration_data.get("api")
-        if not api:
-            _LOGGER.error("未找到配置入口 ID 为 '%s' 的 API 实例。集成数据: %s", entry_id, integration_data)
-            raise HomeAssistantError(f"API 实例不可用: {entry_id}")
-        return api
+        return integration_data
+
+    async def get_api_instance(call: ServiceCall):
+        """辅助函数：安全地从 hass.data 中获取 API 实例，通过 entity_id 或 entry_id 推断。"""
+        return (await get_integration_data(call))["api"]
 
 
     async def add_contact(call: ServiceCall) -> None:
@@ -247,6 +269,37 @@ async def async_setup_services(hass: HomeAssistant) -> None:
             _LOGGER.error("删除闹钟时发生意外错误: %s", e)
             raise HomeAssistantError(f"删除闹钟时发生意外错误: {e}")
 
+    async def refresh(call: ServiceCall) -> None:
+        """按需刷新服务，短时间内的重复调用会被合并。"""
+        coordinator = (await get_integration_data(call))["coordinator"]
+        await coordinator.async_request_sections(set(call.data["sections"]))
+
+    async def export_history(call: ServiceCall) -> ServiceResponse:
+        """导出设备的位置和健康历史到配置目录下的文件，返回文件路径。"""
+        if "recorder" not in hass.config.components:
+            raise HomeAssistantError("导出历史数据需要启用 recorder 集成。")
+        start = call.data["start"]
+        end = call.data.get("end") or dt_util.now()
+        if dt_util.as_utc(start) >= dt_util.as_utc(end):
+            raise HomeAssistantError("开始时间必须早于结束时间。")
+        coordinator = (await get_integration_data(call))["coordinator"]
+
+        from .export import async_export_history  # pylint: disable=import-outside-toplevel
+
+        return await async_export_history(
+            hass, coordinator.config_entry, start, end, call.data["format"]
+        )
+
+    async def profile(call: ServiceCall) -> ServiceResponse:
+        """分析设备接下来若干次刷新，结果写入配置目录下的文件，返回文件路径。"""
+        coordinator = (await get_integration_data(call))["coordinator"]
+
+        from .profiler import async_start_profiling  # pylint: disable=import-outside-toplevel
+
+        return await async_start_profiling(
+            hass, coordinator.config_entry, coordinator, call.data["cycles"], call.data["format"]
+        )
+
     # 定义服务 schema
     BASE_SERVICE_SCHEMA = vol.Schema({
         vol.Exclusive("entity_id", "target_identifier"): cv.entity_id,
@@ -257,7 +310,7 @@ async def async_setup_services(hass: HomeAssistant) -> None:
     hass.services.async_register(
         DOMAIN,
         SERVICE_ADD_CONTACT,
-        add_contact,
+        _interactive(add_contact),
         schema=BASE_SERVICE_SCHEMA.extend({
             vol.Required("name"): str,
             vol.Required("phone"): str,
@@ -266,7 +319,7 @@ async def async_setup_services(hass: HomeAssistant) -> None:
     hass.services.async_register(
         DOMAIN,
         SERVICE_DELETE_CONTACT,
-        delete_contact,
+        _interactive(delete_contact),
         schema=BASE_SERVICE_SCHEMA.extend({
             vol.Required("contact_id"): cv.positive_int,
         })
@@ -274,7 +327,7 @@ async def async_setup_services(hass: HomeAssistant) -> None:
     hass.services.async_register(
         DOMAIN,
         SERVICE_ADD_ALARM,
-        add_alarm,
+        _interactive(add_alarm),
         schema=BASE_SERVICE_SCHEMA.extend({
             vol.Required("name"): str,
             vol.Required("time"): str, # HH:MM 格式，这里不严格验证
@@ -291,8 +344,56 @@ async def async_setup_services(hass: HomeAssistant) -> None:
     hass.services.async_register(
         DOMAIN,
         SERVICE_DELETE_ALARM,
-        delete_alarm,
+        _interactive(delete_alarm),
         schema=BASE_SERVICE_SCHEMA.extend({
             vol.Required("alarm_id"): str,
         })
     )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_REFRESH,
+        _interactive(refresh),
+        schema=BASE_SERVICE_SCHEMA.extend({
+            vol.Optional("sections", default=list(REFRESH_SECTIONS)): vol.All(
+                cv.ensure_list,
+                [vol.In(REFRESH_SECTIONS)],
+            ),
+        })
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_EXPORT_HISTORY,
+        export_history,
+        schema=BASE_SERVICE_SCHEMA.extend({
+            vol.Required("start"): cv.datetime,
+            vol.Optional("end"): cv.datetime,
+            vol.Optional("format", default="csv"): vol.In(EXPORT_FORMATS),
+        }),
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE,
+        profile,
+        schema=BASE_SERVICE_SCHEMA.extend({
+            vol.Optional("cycles", default=3): vol.All(
+                vol.Coerce(int), vol.Range(min=1, max=PROFILE_MAX_CYCLES)
+            ),
+            vol.Optional("format", default="pstats"): vol.In(PROFILE_FORMATS),
+        }),
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+
+async def async_unload_services(hass: HomeAssistant) -> None:
+    """移除HXinWatch集成注册的所有服务。"""
+    for service in (
+        SERVICE_ADD_CONTACT,
+        SERVICE_DELETE_CONTACT,
+        SERVICE_ADD_ALARM,
+        SERVICE_DELETE_ALARM,
+        SERVICE_REFRESH,
+        SERVICE_EXPORT_HISTORY,
+        SERVICE_PROFILE,
+    ):
+        hass.services.async_remove(DOMAIN, service)
@@ -0,0 +1,7 @@
+"""不依赖 Home Assistant 的 HXinWatch 车队轮询与指标导出工具。
+
+复用集成中的 HXinWatchAPI，按设备列表定期查询状态，以 Prometheus 文本格式或 JSON Lines 输出
+电量、定位新鲜度和 API 健康状况，只需要 aiohttp：
+
+    python -m hxinwatch_fleet devices.csv --interval 60 --format prometheus --output fleet.prom
+"""
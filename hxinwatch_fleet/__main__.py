@@ -0,0 +1,140 @@
+"""HXinWatch 车队轮询与指标导出工具的命令行入口。
+
+    python -m hxinwatch_fleet devices.csv --interval 60 --format prometheus --output /var/lib/node_exporter/hxinwatch.prom
+    python -m hxinwatch_fleet devices.csv --format prometheus --listen 0.0.0.0:9487
+    python -m hxinwatch_fleet devices.csv --once --format jsonl
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from typing import Optional
+
+import aiohttp
+from aiohttp import web
+
+from .exporters import render_jsonl, render_prometheus
+from .poller import FleetPoller, load_devices
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _write(path: str, text: str, append: bool) -> None:
+    """写入输出；Prometheus 文件先写临时文件再替换，避免采集到写了一半的内容。"""
+    if path == "-":
+        sys.stdout.write(text)
+        sys.stdout.flush()
+        return
+    if append:
+        with open(path, "a", encoding="utf-8") as file:
+            file.write(text)
+        return
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as file:
+        file.write(text)
+    os.replace(temporary, path)
+
+
+async def _start_listener(address: str, latest: dict[str, str]) -> web.AppRunner:
+    """在 address（host:port）上提供 /metrics。"""
+    host, _sep, port = address.rpartition(":")
+
+    async def handle_metrics(_request: web.Request) -> web.Response:
+        return web.Response(text=latest["text"], content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host or "0.0.0.0", int(port)).start()
+    _LOGGER.info("指标已在 http://%s/metrics 提供", address)
+    return runner
+
+
+async def run(args: argparse.Namespace) -> None:
+    """按固定间隔轮询并输出指标。"""
+    devices = load_devices(args.devices)
+    render = render_prometheus if args.format == "prometheus" else render_jsonl
+    latest = {"text": ""}
+    # 连接池上限与并发数一致，所有设备复用同一组连接
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        poller = FleetPoller(
+            devices,
+            session,
+            concurrency=args.concurrency,
+            base_url=args.base_url,
+            rate_limit=args.rate_limit,
+            burst=args.burst,
+        )
+        runner: Optional[web.AppRunner] = None
+        if args.listen:
+            runner = await _start_listener(args.listen, latest)
+        try:
+            next_round = time.monotonic()
+            while True:
+                await poller.async_poll_round()
+                latest["text"] = render(poller)
+                if args.output:
+                    _write(args.output, latest["text"], append=args.format == "jsonl")
+                _LOGGER.info(
+                    "第 %d 轮完成：%d 台设备，耗时 %.2f 秒",
+                    poller.rounds, len(poller.samples), poller.round_seconds,
+                )
+                if args.once:
+                    break
+                # 按固定节拍轮询；某一轮超时则跳过错过的节拍
+                next_round += args.interval
+                now = time.monotonic()
+                if next_round < now:
+                    next_round = now
+                await asyncio.sleep(next_round - now)
+        finally:
+            poller.close()
+            if runner is not None:
+                await runner.cleanup()
+
+
+def main() -> None:
+    """命令行入口。"""
+    parser = argparse.ArgumentParser(description="HXinWatch 车队轮询与指标导出")
+    parser.add_argument("devices", help="设备列表文件，每行一个 IMEI,AppID")
+    parser.add_argument("--interval", type=float, default=60.0, help="轮询间隔（秒）")
+    parser.add_argument("--once", action="store_true", help="只轮询一轮后退出")
+    parser.add_argument("--concurrency", type=int, default=20, help="同时进行的请求数上限")
+    parser.add_argument("--timeout", type=float, default=15.0, help="单个请求的超时时间（秒）")
+    parser.add_argument("--rate-limit", type=float, default=None, help="每秒请求数上限，默认不限流")
+    parser.add_argument("--burst", type=int, default=None, help="限流器的突发容量，默认为速率的 2 倍")
+    parser.add_argument("--format", choices=("prometheus", "jsonl"), default="prometheus")
+    parser.add_argument(
+        "--output", default=None,
+        help="输出文件，- 表示标准输出；prometheus 每轮覆盖写入，jsonl 追加写入",
+    )
+    parser.add_argument("--listen", default=None, help="以 host:port 提供 /metrics，例如 0.0.0.0:9487")
+    parser.add_argument("--base-url", default=None, help="云端接口地址，默认为官方地址")
+    parser.add_argument("-v", "--verbose", action="store_true", help="输出调试日志")
+    args = parser.parse_args()
+    if not args.output and not args.listen:
+        args.output = "-"
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+        stream=sys.stderr,
+    )
+    # 单台设备的请求错误计入指标，不逐条输出
+    if not args.verbose:
+        logging.getLogger("hxinwatch_core").setLevel(logging.CRITICAL)
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
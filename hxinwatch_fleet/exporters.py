@@ -0,0 +1,104 @@
+"""把轮询结果渲染为 Prometheus 文本格式或 JSON Lines。"""
+from __future__ import annotations
+
+import json
+import time
+from typing import Any
+
+from .poller import FleetPoller
+
+# (指标名, 类型, 说明)
+_DEVICE_METRICS = (
+    ("hxinwatch_device_up", "gauge", "最近一次轮询是否成功"),
+    ("hxinwatch_battery_percent", "gauge", "设备电量"),
+    ("hxinwatch_location_age_seconds", "gauge", "定位数据距今的秒数"),
+    ("hxinwatch_poll_latency_milliseconds", "gauge", "最近一次轮询的耗时"),
+)
+_QUANTILES = (("0.5", 0.50), ("0.95", 0.95), ("0.99", 0.99))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: str) -> str:
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _header(lines: list[str], name: str, kind: str, help_text: str) -> None:
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+
+
+def render_prometheus(poller: FleetPoller, now: float | None = None) -> str:
+    """返回 Prometheus 文本格式的设备指标和 API 健康指标。"""
+    now = time.time() if now is None else now
+    samples = list(poller.samples.values())
+    lines: list[str] = []
+
+    columns: dict[str, list[str]] = {name: [] for name, _kind, _help in _DEVICE_METRICS}
+    for sample in samples:
+        label = _labels(imei=sample.imei)
+        columns["hxinwatch_device_up"].append(f"hxinwatch_device_up{label} {int(sample.ok)}")
+        if sample.battery is not None:
+            columns["hxinwatch_battery_percent"].append(f"hxinwatch_battery_percent{label} {sample.battery:g}")
+        age = sample.location_age(now)
+        if age is not None:
+            columns["hxinwatch_location_age_seconds"].append(f"hxinwatch_location_age_seconds{label} {age:.1f}")
+        if sample.latency_ms is not None:
+            columns["hxinwatch_poll_latency_milliseconds"].append(
+                f"hxinwatch_poll_latency_milliseconds{label} {sample.latency_ms:.1f}"
+            )
+    for name, kind, help_text in _DEVICE_METRICS:
+        _header(lines, name, kind, help_text)
+        lines.extend(columns[name])
+
+    endpoints = sorted(poller.metrics.endpoints.items())
+    _header(lines, "hxinwatch_api_requests_total", "counter", "各接口的请求数")
+    for endpoint, stats in endpoints:
+        lines.append(f"hxinwatch_api_requests_total{_labels(endpoint=endpoint)} {stats.requests}")
+    _header(lines, "hxinwatch_api_errors_total", "counter", "各接口按类型分类的错误数")
+    for endpoint, stats in endpoints:
+        for error, count in sorted(stats.errors.items()):
+            lines.append(f"hxinwatch_api_errors_total{_labels(endpoint=endpoint, error=error)} {count}")
+    _header(lines, "hxinwatch_api_schema_errors_total", "counter", "各接口按字段路径分类的响应结构错误数")
+    for endpoint, stats in endpoints:
+        for path, count in sorted(stats.schema_errors.items()):
+            lines.append(f"hxinwatch_api_schema_errors_total{_labels(endpoint=endpoint, path=path)} {count}")
+    _header(lines, "hxinwatch_api_latency_milliseconds", "summary", "各接口的请求延迟")
+    for endpoint, stats in endpoints:
+        for label, quantile in _QUANTILES:
+            value = stats.latency.percentile(quantile)
+            if value is not None:
+                lines.append(
+                    f"hxinwatch_api_latency_milliseconds{_labels(endpoint=endpoint, quantile=label)} {value}"
+                )
+        label = _labels(endpoint=endpoint)
+        lines.append(f"hxinwatch_api_latency_milliseconds_sum{label} {stats.latency.sum_ms:.1f}")
+        lines.append(f"hxinwatch_api_latency_milliseconds_count{label} {stats.latency.total}")
+
+    _header(lines, "hxinwatch_fleet_devices", "gauge", "轮询的设备数")
+    lines.append(f"hxinwatch_fleet_devices {len(samples)}")
+    _header(lines, "hxinwatch_fleet_devices_up", "gauge", "最近一次轮询成功的设备数")
+    lines.append(f"hxinwatch_fleet_devices_up {sum(1 for sample in samples if sample.ok)}")
+    if poller.round_seconds is not None:
+        _header(lines, "hxinwatch_fleet_round_seconds", "gauge", "最近一轮轮询的耗时")
+        lines.append(f"hxinwatch_fleet_round_seconds {poller.round_seconds:.3f}")
+    return "\n".join(lines) + "\n"
+
+
+def render_jsonl(poller: FleetPoller, now: float | None = None) -> str:
+    """返回每台设备一行的 JSON Lines，以及一行 API 健康摘要（imei 为 null）。"""
+    now = time.time() if now is None else now
+    lines = [
+        json.dumps(sample.as_dict(now), ensure_ascii=False) for sample in poller.samples.values()
+    ]
+    summary: dict[str, Any] = {
+        "time": round(now, 3),
+        "imei": None,
+        "round": poller.rounds,
+        "round_seconds": round(poller.round_seconds, 3) if poller.round_seconds is not None else None,
+        "api": poller.metrics.as_dict(),
+    }
+    lines.append(json.dumps(summary, ensure_ascii=False))
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,33 @@
+"""加载集成中不依赖 Home Assistant 的模块（api、metrics、ratelimit 等）。
+
+默认使用与本包同一仓库中的 ``custom_components/hxinwatch``；集成安装在其他位置时，
+可通过环境变量 ``HXINWATCH_INTEGRATION_DIR`` 指定集成目录。
+"""
+from __future__ import annotations
+
+import importlib
+import os
+from pathlib import Path
+import sys
+from types import ModuleType
+
+INTEGRATION_DIR = Path(
+    os.environ.get("HXINWATCH_INTEGRATION_DIR")
+    or Path(__file__).resolve().parent.parent / "custom_components" / "hxinwatch"
+)
+
+# 不执行集成的 __init__.py，以独立的包名加载其中的模块
+_CORE_PACKAGE = "hxinwatch_core"
+
+
+def load_core_module(name: str) -> ModuleType:
+    """加载集成中不依赖 Home Assistant 的模块，且不执行集成的 __init__.py。"""
+    if _CORE_PACKAGE not in sys.modules:
+        if not (INTEGRATION_DIR / "api.py").is_file():
+            raise ImportError(
+                f"在 {INTEGRATION_DIR} 找不到 HXinWatch 集成，请设置 HXINWATCH_INTEGRATION_DIR"
+            )
+        package = ModuleType(_CORE_PACKAGE)
+        package.__path__ = [str(INTEGRATION_DIR)]
+        sys.modules[_CORE_PACKAGE] = package
+    return importlib.import_module(f"{_CORE_PACKAGE}.{name}")
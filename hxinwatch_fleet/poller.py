@@ -0,0 +1,179 @@
+"""车队轮询：有限并发、共享连接池和 Token。"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Iterable, Optional
+
+import aiohttp
+
+from .integration import load_core_module
+
+_LOGGER = logging.getLogger(__name__)
+
+STATUS_ENDPOINT = "/related/main"
+
+
+def load_devices(path: str) -> list[tuple[str, str]]:
+    """读取设备列表，每行一个 “IMEI,AppID”（也可用空白分隔），# 开头的行为注释。"""
+    devices: list[tuple[str, str]] = []
+    seen: set[str] = set()
+    with open(path, encoding="utf-8") as file:
+        for number, line in enumerate(file, 1):
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            fields = line.replace(",", " ").split()
+            if len(fields) != 2:
+                raise SystemExit(f"{path} 第 {number} 行格式错误，应为 IMEI,AppID")
+            imei, appid = fields
+            if imei in seen:
+                continue
+            seen.add(imei)
+            devices.append((imei, appid))
+    if not devices:
+        raise SystemExit(f"{path} 中没有设备")
+    return devices
+
+
+class DeviceSample:
+    """单台设备最近一次轮询的结果。"""
+
+    __slots__ = ("imei", "ok", "battery", "location_time", "polled_at", "latency_ms", "error")
+
+    def __init__(self, imei: str) -> None:
+        self.imei = imei
+        self.ok = False
+        self.battery: Optional[float] = None
+        self.location_time: Optional[float] = None  # 定位时间（Unix 秒）
+        self.polled_at: Optional[float] = None
+        self.latency_ms: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def location_age(self, now: float) -> Optional[float]:
+        """定位数据距今的秒数。"""
+        if self.location_time is None:
+            return None
+        return max(0.0, now - self.location_time)
+
+    def as_dict(self, now: float) -> dict[str, Any]:
+        """返回可序列化的结果。"""
+        age = self.location_age(now)
+        return {
+            "time": round(self.polled_at, 3) if self.polled_at else None,
+            "imei": self.imei,
+            "ok": self.ok,
+            "battery": self.battery,
+            "location_age_seconds": round(age, 1) if age is not None else None,
+            "latency_ms": round(self.latency_ms, 1) if self.latency_ms is not None else None,
+            "error": self.error,
+        }
+
+
+def _number(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class FleetPoller:
+    """以有限并发轮询一组设备。
+
+    所有 API 客户端共享一个 aiohttp 连接池、一份按 AppID 的 Token 缓存、一个请求统计，
+    以及可选的令牌桶限流器；同一 AppID 的 Token 在每轮开始前由一个客户端统一获取或续期。
+    """
+
+    def __init__(
+        self,
+        devices: Iterable[tuple[str, str]],
+        session: aiohttp.ClientSession,
+        concurrency: int = 20,
+        base_url: Optional[str] = None,
+        rate_limit: Optional[float] = None,
+        burst: Optional[int] = None,
+    ) -> None:
+        """初始化轮询器，rate_limit 为每秒请求数上限，None 表示不限流。"""
+        api_module = load_core_module("api")
+        self._api_error = api_module.ApiError
+        metrics_module = load_core_module("metrics")
+        rate_limiter = None
+        if rate_limit:
+            ratelimit = load_core_module("ratelimit")
+            rate_limiter = ratelimit.PriorityRateLimiter(rate_limit, burst or max(1, int(rate_limit * 2)))
+        self.rate_limiter = rate_limiter
+        self.metrics = metrics_module.ApiMetrics()
+        self._credentials: dict[str, tuple[str, int]] = {}
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.rounds = 0
+        self.round_seconds: Optional[float] = None
+        self.clients: dict[str, Any] = {}
+        self.appids: dict[str, str] = {}
+        self.samples: dict[str, DeviceSample] = {}
+        for imei, appid in devices:
+            api = api_module.HXinWatchAPI(
+                imei=imei,
+                appid=appid,
+                session=session,
+                base_url=base_url,
+                rate_limiter=rate_limiter,
+                credentials=self._credentials,
+            )
+            api.metrics = self.metrics  # 汇总所有设备的请求统计
+            self.clients[imei] = api
+            self.appids[imei] = appid
+            self.samples[imei] = DeviceSample(imei)
+
+    async def _authenticate(self) -> None:
+        """每个 AppID 只由一个客户端认证（Token 未过期时不发出请求），其余客户端从共享缓存取得 Token。"""
+        first: dict[str, Any] = {}
+        for imei, appid in self.appids.items():
+            first.setdefault(appid, self.clients[imei])
+        results = await asyncio.gather(
+            *(api.async_refresh_token_if_needed() for api in first.values()), return_exceptions=True
+        )
+        for appid, result in zip(first, results):
+            if isinstance(result, BaseException):
+                # 该 AppID 的设备会在轮询时各自重试认证
+                _LOGGER.warning("AppID %s 认证失败: %s", appid, result)
+
+    async def _poll(self, imei: str) -> None:
+        sample = self.samples[imei]
+        api = self.clients[imei]
+        async with self._semaphore:
+            start = time.perf_counter()
+            try:
+                # 每轮都请求实际状态，而不是上一轮的缓存
+                api.invalidate_cache(STATUS_ENDPOINT)
+                response = await api.async_get_device_status()
+            except self._api_error as err:
+                sample.ok = False
+                sample.error = f"code_{err.code}"
+            except Exception as err:  # pylint: disable=broad-except
+                sample.ok = False
+                sample.error = type(err).__name__
+            else:
+                # 响应已经过 schema 规范化，数据段和字段总是存在
+                data = response["data"]
+                sample.ok = True
+                sample.error = None
+                sample.battery = data["info"]["battery"]
+                location_time = _number(data["location"].get("time"))
+                sample.location_time = location_time / 1000 if location_time else None
+            sample.latency_ms = (time.perf_counter() - start) * 1000
+            sample.polled_at = time.time()
+
+    async def async_poll_round(self) -> None:
+        """轮询所有设备一次。"""
+        # 每轮开始前集中续期，避免 Token 到期时所有客户端各自认证
+        await self._authenticate()
+        start = time.perf_counter()
+        await asyncio.gather(*(self._poll(imei) for imei in self.clients))
+        self.round_seconds = time.perf_counter() - start
+        self.rounds += 1
+
+    def close(self) -> None:
+        """释放限流器。"""
+        if self.rate_limiter is not None:
+            self.rate_limiter.close()